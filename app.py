@@ -1,14 +1,67 @@
 import os
 import sqlite3
 import csv
-from flask import Flask, render_template, request, redirect, url_for, flash, session, Response
+import json
+import re
+import base64
+from flask import Flask, render_template, request, redirect, url_for, flash, session, Response, g, jsonify, has_app_context, stream_with_context, send_file, abort, make_response, message_flashed, before_render_template, template_rendered
+from markupsafe import escape
 from datetime import datetime, timedelta
+from collections import deque, OrderedDict
 from functools import wraps
 import io
+import zlib
+import tempfile
+import uuid
+import hashlib
+import hmac
+import threading
+import time
+from duty_solver import solve_balanced_allocation
+from hall_packing import pack_halls, pack_session
+from migrations import migrate
+from report_aggregates import check_report_aggregates, rebuild_report_aggregates
+from job_runner import ACTIVE_STATUSES, JobLimitExceeded, JobRunner
+from metrics import InstrumentedConnection, RequestMetrics, format_metric, statement_label
+from db_backup import create_snapshot, list_snapshots
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-123' 
-DB_NAME = "seating.db"
+DB_NAME = os.environ.get('DB_NAME', "seating.db")
+
+# SQLite pragma profiles applied to every new connection
+SQLITE_PRAGMA_PROFILES = {
+    # Readers never wait for writers; fsync only at checkpoints
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 134217728,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000
+    },
+    # WAL with a full fsync on every commit
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000
+    },
+    # Rollback journal as before, only waits for locks instead of failing
+    'legacy': {
+        'busy_timeout': 5000
+    }
+}
+app.config['SQLITE_PRAGMA_PROFILE'] = os.environ.get('SQLITE_PRAGMA_PROFILE', 'wal')
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 8))
+app.config['RESPONSE_CACHE_MAX_BYTES'] = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOBS_PER_USER'] = int(os.environ.get('JOBS_PER_USER', 2))
+app.config['JOB_QUEUE_LIMIT'] = int(os.environ.get('JOB_QUEUE_LIMIT', 10))
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')
+app.config['METRICS_DEBUG_FOOTER'] = os.environ.get('METRICS_DEBUG_FOOTER', '') not in ('', '0')
+app.config['BACKUP_DIR'] = os.environ.get('BACKUP_DIR', os.path.dirname(os.path.abspath(DB_NAME)))
+app.config['BACKUP_KEEP'] = int(os.environ.get('BACKUP_KEEP', 7))
+app.config['BACKUP_INTERVAL_HOURS'] = float(os.environ.get('BACKUP_INTERVAL_HOURS', 0))
 
 def init_db():
     conn = sqlite3.connect(DB_NAME)
@@ -17,80 +70,11 @@ def init_db():
     c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
     users_table_exists = c.fetchone() is not None
     
-    # Faculty table
-    c.execute('''CREATE TABLE IF NOT EXISTS faculty (
-                faculty_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                designation TEXT CHECK(designation IN ('Professor', 'Associate Professor', 'Assistant Professor', 'Lecturer')) NOT NULL,
-                department TEXT NOT NULL,
-                total_duties INTEGER DEFAULT 0,
-                remaining_duties INTEGER DEFAULT 0,
-                is_available BOOLEAN DEFAULT TRUE
-            )''')
-    
-    # Exam halls table
-    c.execute('''CREATE TABLE IF NOT EXISTS halls (
-                    hall_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    hall_name TEXT NOT NULL UNIQUE,
-                    capacity INTEGER NOT NULL,
-                    is_available BOOLEAN DEFAULT TRUE
-                )''')
-    
-    # Exams table
-    c.execute('''CREATE TABLE IF NOT EXISTS exams (
-                    exam_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    exam_type TEXT CHECK(exam_type IN ('Mid Term', 'Missed Evaluation', 'End Sem', 'Supplementary Exam')) NOT NULL,
-                    date DATE NOT NULL,
-                    session TEXT CHECK(session IN ('Forenoon', 'Afternoon')) NOT NULL,
-                    invigilators_required INTEGER NOT NULL,
-                    course_code TEXT,
-                    course_name TEXT,
-                    students_count INTEGER NOT NULL DEFAULT 0
-                )''')
-    
-    # Faculty duty allocation table
-    c.execute('''CREATE TABLE IF NOT EXISTS faculty_duties (
-                    duty_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    faculty_id INTEGER NOT NULL,
-                    exam_id INTEGER NOT NULL,
-                    duties_assigned INTEGER DEFAULT 1,
-                    FOREIGN KEY (faculty_id) REFERENCES faculty (faculty_id),
-                    FOREIGN KEY (exam_id) REFERENCES exams (exam_id),
-                    UNIQUE(faculty_id, exam_id)
-                )''')
-    
-    # Duty allocation table
-    c.execute('''CREATE TABLE IF NOT EXISTS duty_allocations (
-                    allocation_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    exam_id INTEGER NOT NULL,
-                    date DATE NOT NULL,
-                    session TEXT NOT NULL,
-                    faculty_id INTEGER NOT NULL,
-                    FOREIGN KEY (exam_id) REFERENCES exams (exam_id),
-                    FOREIGN KEY (faculty_id) REFERENCES faculty (faculty_id),
-                    UNIQUE(exam_id, faculty_id, date, session)
-                )''')
-    
-    # Exam hall allocations table - FIXED: Added UNIQUE constraint
-    c.execute('''CREATE TABLE IF NOT EXISTS exam_hall_allocations (
-                    allocation_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    exam_id INTEGER NOT NULL,
-                    hall_id INTEGER NOT NULL,
-                    FOREIGN KEY (exam_id) REFERENCES exams (exam_id),
-                    FOREIGN KEY (hall_id) REFERENCES halls (hall_id),
-                    UNIQUE(exam_id, hall_id)
-                )''')
-    
-    # Users table for authentication
+    # Create or upgrade the schema (see migrations.py)
+    migrate(conn)
+    
+    # Default admin user for a freshly created users table
     if not users_table_exists:
-        c.execute('''CREATE TABLE users (
-                        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        username TEXT UNIQUE NOT NULL,
-                        password TEXT NOT NULL,
-                        role TEXT DEFAULT 'admin'
-                    )''')
-        
-        # Default admin user
         c.execute('''INSERT INTO users (username, password, role)
                      VALUES (?, ?, ?)''', ('admin', 'admin123', 'admin'))
         print("Created users table and added default admin user")
@@ -174,29 +158,6 @@ def validate_date(date_string):
     except ValueError:
         return False, "Invalid date format. Please use YYYY-MM-DD"
 
-def validate_exam_scheduling(exam_date, session, faculty_ids):
-    conn = get_db_connection()
-    
-    conflict_faculty = []
-    for faculty_id in faculty_ids:
-        existing_duty = conn.execute("""
-            SELECT f.name, e.date, e.session 
-            FROM duty_allocations da
-            JOIN faculty f ON da.faculty_id = f.faculty_id
-            JOIN exams e ON da.exam_id = e.exam_id
-            WHERE da.faculty_id = ? AND e.date = ? AND e.session = ?
-        """, (faculty_id, exam_date, session)).fetchone()
-        
-        if existing_duty:
-            conflict_faculty.append(existing_duty['name'])
-    
-    conn.close()
-    
-    if conflict_faculty:
-        return False, f"Faculty members {', '.join(conflict_faculty)} already have duties on {exam_date} ({session})"
-    
-    return True, "No conflicts"
-
 def validate_students_count(students_count):
     try:
         count = int(students_count)
@@ -218,11 +179,77 @@ def sanitize_input(text):
     return cleaned[:255]  # Limit length
 
 # ---------- UTILITY FUNCTIONS ----------
-def get_db_connection():
-    conn = sqlite3.connect(DB_NAME)
+class PooledConnection(InstrumentedConnection):
+    """Connection shared by everything in one request.
+    
+    close() only discards uncommitted work; the connection itself goes back to
+    the pool when the app context is torn down.
+    """
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+    
+    def dispose(self):
+        sqlite3.Connection.close(self)
+
+_pool = deque()
+_pool_lock = threading.Lock()
+_pool_stats = {'opened': 0, 'reused': 0, 'released': 0, 'discarded': 0, 'in_use': 0}
+
+def apply_pragmas(conn, profile=None):
+    pragmas = SQLITE_PRAGMA_PROFILES.get(profile or app.config['SQLITE_PRAGMA_PROFILE'], {})
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+def open_db_connection(factory=sqlite3.Connection, **kwargs):
+    conn = sqlite3.connect(DB_NAME, factory=factory, **kwargs)
     conn.row_factory = sqlite3.Row
+    apply_pragmas(conn)
+    # Deleting an exam, faculty member or hall cascades to its allocations (migration 8)
+    conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
+def _acquire_connection():
+    with _pool_lock:
+        _pool_stats['in_use'] += 1
+        if _pool:
+            _pool_stats['reused'] += 1
+            return _pool.pop()
+        _pool_stats['opened'] += 1
+    return open_db_connection(PooledConnection, check_same_thread=False)
+
+def _release_connection(conn):
+    conn.close()
+    with _pool_lock:
+        _pool_stats['in_use'] -= 1
+        if len(_pool) < app.config['DB_POOL_SIZE']:
+            _pool_stats['released'] += 1
+            _pool.append(conn)
+            return
+        _pool_stats['discarded'] += 1
+    conn.dispose()
+
+def get_db_connection():
+    """One pooled connection per request; a private one outside the app context"""
+    if not has_app_context():
+        return open_db_connection()
+    if 'db' not in g:
+        g.db = _acquire_connection()
+        g.db.query_stats.reset()
+        g.db_changes = g.db.total_changes
+    return g.db
+
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    conn = g.pop('db', None)
+    if conn is not None:
+        _release_connection(conn)
+
+def get_pool_stats():
+    with _pool_lock:
+        return dict(_pool_stats, idle=len(_pool), max_idle=app.config['DB_POOL_SIZE'],
+                    pragma_profile=app.config['SQLITE_PRAGMA_PROFILE'])
+
 def calculate_invigilators_required(exam_type, students_count):
     """Calculate invigilators required based on exam type and student count"""
     # Base invigilators per student range
@@ -247,42 +274,86 @@ def calculate_invigilators_required(exam_type, students_count):
     return max(2, int(base_invigilators * multiplier))
 
 def calculate_required_halls(students_count, available_halls):
-    """Calculate how many halls are needed based on student count"""
+    """Pick the fewest halls that seat everyone, then the fewest empty seats"""
     if not available_halls:
         return [], 0
     
-    # Sort halls by capacity (descending)
-    sorted_halls = sorted(available_halls, key=lambda x: x['capacity'], reverse=True)
-    
-    assigned_halls = []
-    remaining_students = students_count
-    
-    for hall in sorted_halls:
-        if remaining_students <= 0:
-            break
-        assigned_halls.append(hall)
-        remaining_students -= hall['capacity']
-    
+    assigned_halls = pack_halls(students_count, available_halls)
     total_capacity = sum(hall['capacity'] for hall in assigned_halls)
     return assigned_halls, total_capacity
 
+# Per-exam invigilator and hall totals as correlated subqueries on e.exam_id.
+# Each total is computed on its own through the exam_id indexes, so
+# invigilators and halls never multiply each other the way joining both
+# tables at once does, and only the exams actually selected are visited.
+EXAM_ROLLUPS = {
+    'invigilators': """(SELECT COUNT(DISTINCT da.faculty_id) FROM duty_allocations da
+         WHERE da.exam_id = e.exam_id)""",
+    'halls': """(SELECT COUNT(*) FROM exam_hall_allocations eha
+         WHERE eha.exam_id = e.exam_id)""",
+    'capacity': """(SELECT SUM(h.capacity) FROM exam_hall_allocations eha
+         JOIN halls h ON eha.hall_id = h.hall_id
+         WHERE eha.exam_id = e.exam_id)""",
+}
+
+def exam_rollup_columns(invigilators, halls, capacity):
+    """SELECT columns for EXAM_ROLLUPS under the given aliases"""
+    return f"""
+        {EXAM_ROLLUPS['invigilators']} as {invigilators},
+        {EXAM_ROLLUPS['halls']} as {halls},
+        {EXAM_ROLLUPS['capacity']} as {capacity}"""
+
+DUTY_REQUIREMENTS = {
+    'Mid Term': 2,
+    'Missed Evaluation': 2,
+    'End Sem': 1,
+    'Supplementary Exam': 2
+}
+
 def get_duty_requirement(exam_type):
-    duty_requirements = {
-        'Mid Term': 2,
-        'Missed Evaluation': 2,
-        'End Sem': 1,
-        'Supplementary Exam': 2
-    }
-    return duty_requirements.get(exam_type, 1)
+    return DUTY_REQUIREMENTS.get(exam_type, 1)
+
+def duty_requirement_sql(exam_type_column):
+    """get_duty_requirement() as a SQL CASE over exam_type_column"""
+    cases = " ".join(f"WHEN '{exam_type}' THEN {duties}" for exam_type, duties in DUTY_REQUIREMENTS.items())
+    return f"CASE {exam_type_column} {cases} ELSE 1 END"
+
+def release_duties(conn, where, params=()):
+    """Give back the duties of the duty_allocations rows (alias da) matching where, in one grouped UPDATE.
+    
+    The allocations themselves are left for the caller to delete. Returns their
+    (faculty_id, date, session) entries for unmark_busy_slots() once committed.
+    """
+    released = conn.execute(f"""
+        SELECT da.faculty_id, e.date, e.session
+        FROM duty_allocations da
+        JOIN exams e ON da.exam_id = e.exam_id
+        WHERE {where}
+    """, params).fetchall()
+    conn.execute(f"""
+        UPDATE faculty
+        SET remaining_duties = remaining_duties + restored.duties
+        FROM (
+            SELECT da.faculty_id, SUM(COALESCE(fd.duties_assigned, {duty_requirement_sql('e.exam_type')})) AS duties
+            FROM duty_allocations da
+            JOIN exams e ON da.exam_id = e.exam_id
+            LEFT JOIN faculty_duties fd ON fd.faculty_id = da.faculty_id AND fd.exam_id = da.exam_id
+            WHERE {where}
+            GROUP BY da.faculty_id
+        ) AS restored
+        WHERE faculty.faculty_id = restored.faculty_id
+    """, params)
+    return [tuple(row) for row in released]
+
+DESIGNATION_DUTIES = {
+    'Professor': 10,
+    'Associate Professor': 12,
+    'Assistant Professor': 15,
+    'Lecturer': 20
+}
 
 def get_designation_duties(designation):
-    designation_duties = {
-        'Professor': 10,
-        'Associate Professor': 12,
-        'Assistant Professor': 15,
-        'Lecturer': 20
-    }
-    return designation_duties.get(designation, 10)
+    return DESIGNATION_DUTIES.get(designation, 10)
 
 def reset_semester_duties():
     conn = get_db_connection()
@@ -292,62 +363,1267 @@ def reset_semester_duties():
     ''')
     conn.commit()
     conn.close()
-    flash("Semester duties reset successfully!", "success")
 
-def update_faculty_designations():
+# Live tables moved to their archive copies by a semester rollover, with the
+# columns copied; each is selected through its exam, so the moves line up
+ROLLOVER_TABLES = [
+    ('exams', 'archived_exams', "exam_id, exam_type, date, session, invigilators_required, course_code, course_name, students_count, updated_at"),
+    ('duty_allocations', 'archived_duty_allocations', "allocation_id, exam_id, date, session, faculty_id, updated_at"),
+    ('faculty_duties', 'archived_faculty_duties', "duty_id, faculty_id, exam_id, duties_assigned"),
+    ('exam_hall_allocations', 'archived_exam_hall_allocations', "allocation_id, exam_id, hall_id, updated_at"),
+]
+
+def rollover_semester(label, cutoff_date, progress=None):
+    """Close a semester: archive every exam before cutoff_date with its allocations, in one transaction.
+    
+    The archived exams are then deleted from the live tables (their
+    allocations go with them through ON DELETE CASCADE), so live pages only
+    ever scan the current term. Each faculty member's workload is archived as
+    it stood and remaining duties are reset in a single UPDATE, net of the
+    duties they still hold in the exams that stay live.
+    """
     conn = get_db_connection()
-    c = conn.cursor()
-    
     try:
-        designation_mapping = {
-            'Level1': 'Professor',
-            'Level2': 'Associate Professor', 
-            'Level3': 'Assistant Professor',
-            'Level4': 'Lecturer'
-        }
-        
-        for old_designation, new_designation in designation_mapping.items():
-            c.execute("UPDATE faculty SET designation = ? WHERE designation = ?", 
-                     (new_designation, old_designation))
-            updated_count = c.rowcount
-            if updated_count > 0:
-                print(f"Updated {updated_count} faculty from {old_designation} to {new_designation}")
-        
+        conn.execute("BEGIN IMMEDIATE")
+        semester_id = conn.execute("""
+            INSERT INTO semesters (label, cutoff_date, closed_at) VALUES (?, ?, ?)
+        """, (label, cutoff_date, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))).lastrowid
+        conn.execute("""
+            INSERT INTO archived_faculty (semester_id, faculty_id, name, designation, department, total_duties, remaining_duties)
+            SELECT ?, faculty_id, name, designation, department, total_duties, remaining_duties FROM faculty
+        """, (semester_id,))
+        
+        moved = {}
+        for step, (table, archive, columns) in enumerate(ROLLOVER_TABLES):
+            if progress:
+                progress(0.8 * step / len(ROLLOVER_TABLES), f"Archiving {table.replace('_', ' ')}")
+            moved[table] = conn.execute(f"""
+                INSERT INTO {archive} (semester_id, {columns})
+                SELECT ?, {columns} FROM {table}
+                WHERE exam_id IN (SELECT exam_id FROM exams WHERE date < ?)
+            """, (semester_id, cutoff_date)).rowcount
+        
+        if progress:
+            progress(0.8, "Removing archived exams from the live tables")
+        conn.execute("DELETE FROM exams WHERE date < ?", (cutoff_date,))
+        conn.execute(f"""
+            UPDATE faculty
+            SET remaining_duties = total_duties - COALESCE((
+                SELECT SUM(COALESCE(fd.duties_assigned, {duty_requirement_sql('e.exam_type')}))
+                FROM duty_allocations da
+                JOIN exams e ON da.exam_id = e.exam_id
+                LEFT JOIN faculty_duties fd ON fd.faculty_id = da.faculty_id AND fd.exam_id = da.exam_id
+                WHERE da.faculty_id = faculty.faculty_id
+            ), 0)
+        """)
+        conn.execute("UPDATE semesters SET exam_count = ?, assignment_count = ? WHERE semester_id = ?",
+                     (moved['exams'], moved['duty_allocations'], semester_id))
         conn.commit()
-        print("Faculty designations updated successfully!")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    # Only current-term duties are left, so the index is quick to rebuild
+    load_busy_slots()
+    return {'semester_id': semester_id, 'exams': moved['exams'],
+            'assignments': moved['duty_allocations'], 'hall_allocations': moved['exam_hall_allocations']}
+
+def rollover_messages(label, result):
+    return [("success", f"Semester '{label}' closed: archived {result['exams']} exam(s), "
+                        f"{result['assignments']} invigilator assignment(s) and {result['hall_allocations']} hall allocation(s). "
+                        "Faculty duties have been reset.")]
+
+# ---------- BULK IMPORT ----------
+IMPORT_CHUNK_ROWS = 1000
+IMPORT_REPORT_DIR = os.path.join(tempfile.gettempdir(), "invigilation_imports")
+
+class ImportErrorReport:
+    """Per-row import errors, written to a CSV file as they happen instead of kept in memory"""
+    def __init__(self, kind, header):
+        self.kind = kind
+        self.token = uuid.uuid4().hex
+        self.header = header
+        self.count = 0
+        self._file = None
+        self._writer = None
+    
+    @property
+    def path(self):
+        return import_report_path(self.kind, self.token)
+    
+    def add(self, row_number, row, reason):
+        if self._file is None:
+            os.makedirs(IMPORT_REPORT_DIR, exist_ok=True)
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self.header)
+        self._writer.writerow([row_number, *row, reason])
+        self.count += 1
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def remember(self):
+        """Keep a pointer in the session so the page can offer the download"""
+        if self.count:
+            session['import_report'] = {'kind': self.kind, 'token': self.token, 'errors': self.count}
+        else:
+            session.pop('import_report', None)
+
+    def download(self):
+        """Pointer to the report for a job result, or None when every row was imported"""
+        if self.count:
+            return {'kind': self.kind, 'token': self.token, 'name': f"{self.kind}_import_errors.csv"}
+        return None
+
+def import_report_path(kind, token):
+    return os.path.join(IMPORT_REPORT_DIR, f"{kind}_{token}.csv")
+
+EXAM_TYPES = ('Mid Term', 'Missed Evaluation', 'End Sem', 'Supplementary Exam')
+EXAM_SESSIONS = ('Forenoon', 'Afternoon')
+EXAM_IMPORT_FIELDS = ('exam_type', 'date', 'session', 'students_count', 'course_code', 'course_name')
+
+def read_exam_timetable(stream, filename):
+    """Yield (row number, record dict) from an uploaded CSV or JSON timetable"""
+    if filename.lower().endswith('.json'):
+        data = json.load(stream)
+        if isinstance(data, dict):
+            data = data.get('exams', [])
+        if not isinstance(data, list):
+            raise ValueError("JSON timetable must be a list of exams")
+        for row_num, record in enumerate(data, start=1):
+            yield row_num, record if isinstance(record, dict) else {}
+        return
+    
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    reader = csv.reader(text)
+    headers = [h.strip().lower().replace(' ', '_') for h in next(reader, [])]
+    missing = [field for field in EXAM_IMPORT_FIELDS[:4] if field not in headers]
+    if missing:
+        raise ValueError(f"Timetable is missing column(s): {', '.join(missing)}")
+    for row_num, row in enumerate(reader, start=2):
+        if any(cell.strip() for cell in row):
+            yield row_num, dict(zip(headers, row))
+
+def validate_exam_timetable(records, conn, report):
+    """Validate every timetable row in one pass and compute invigilators_required for all of them.
+    
+    Rows that fail are written to report; the rest come back as INSERT parameter tuples.
+    Exams already scheduled, or repeated within the file, with the same course code,
+    date and session are rejected as duplicates.
+    """
+    parsed_dates = {}
+    today = datetime.now().date()
+    rows = []
+    for row_num, record in records:
+        values = [sanitize_input(record.get(field, "")) for field in EXAM_IMPORT_FIELDS]
+        exam_type, date, session, students_count, course_code, course_name = values
+        
+        error = None
+        if not exam_type or not date or not session or not students_count:
+            error = "exam_type, date, session and students_count are required"
+        elif exam_type not in EXAM_TYPES:
+            error = f"Unknown exam type '{exam_type}'"
+        elif session not in EXAM_SESSIONS:
+            error = f"Unknown session '{session}'"
+        else:
+            if date not in parsed_dates:
+                try:
+                    parsed = datetime.strptime(date, '%Y-%m-%d').date()
+                    parsed_dates[date] = parsed if parsed >= today else "Date cannot be in the past"
+                except ValueError:
+                    parsed_dates[date] = "Invalid date format. Please use YYYY-MM-DD"
+            if isinstance(parsed_dates[date], str):
+                error = parsed_dates[date]
+            else:
+                is_valid_students, students_result = validate_students_count(students_count)
+                if is_valid_students:
+                    values[3] = students_result
+                else:
+                    error = students_result
         
-    except Exception as e:
-        print(f"Error updating designations: {e}")
+        if error:
+            report.add(row_num, values, error)
+        else:
+            rows.append((row_num, values))
+    
+    if not rows:
+        return []
+    
+    dates = [values[1] for _, values in rows]
+    seen = {(row['course_code'], row['date'], row['session']) for row in conn.execute("""
+        SELECT course_code, date, session FROM exams
+        WHERE course_code != '' AND date BETWEEN ? AND ?
+    """, (min(dates), max(dates)))}
+    
+    invigilators = {}
+    valid = []
+    for row_num, values in rows:
+        exam_type, date, session, students_count, course_code, course_name = values
+        key = (course_code, date, session)
+        if course_code and key in seen:
+            report.add(row_num, values, f"{course_code} is already scheduled on {date} ({session})")
+            continue
+        seen.add(key)
+        
+        # Many papers share a type and size, so each combination is computed once
+        if (exam_type, students_count) not in invigilators:
+            invigilators[exam_type, students_count] = calculate_invigilators_required(exam_type, students_count)
+        valid.append((exam_type, date, session, invigilators[exam_type, students_count],
+                      course_code, course_name, students_count))
+    return valid
+
+def import_exam_timetable(stream, filename, progress=None):
+    """Validate a timetable and insert its exams in one transaction; returns (inserted rows, report)"""
+    report = ImportErrorReport('exams', ['Row', *EXAM_IMPORT_FIELDS, 'Error'])
+    conn = get_db_connection()
+    try:
+        valid = validate_exam_timetable(read_exam_timetable(stream, filename), conn, report)
+
+        conn.execute("BEGIN IMMEDIATE")
+        for start in range(0, len(valid), IMPORT_CHUNK_ROWS):
+            if progress:
+                progress(0.5 + 0.5 * start / len(valid), f"Scheduling exams {start + 1}-{min(start + IMPORT_CHUNK_ROWS, len(valid))} of {len(valid)}")
+            conn.executemany("""
+                INSERT INTO exams (exam_type, date, session, invigilators_required, course_code, course_name, students_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, valid[start:start + IMPORT_CHUNK_ROWS])
+        conn.commit()
+    except Exception:
         conn.rollback()
+        raise
     finally:
+        report.close()
         conn.close()
+    return valid, report
+
+def import_faculty_csv(stream, progress=None, total_bytes=None):
+    """Import Name, Designation, Department rows from a binary CSV stream in one transaction.
+
+    Returns (imported, duplicates, report). Raises ValueError when the header is unusable.
+    """
+    # Decode the upload incrementally instead of reading it into memory
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    csv_data = csv.reader(text)
+    headers = next(csv_data, None)  # Skip header
+
+    if not headers or len(headers) < 3:
+        raise ValueError("CSV file must have at least 3 columns: Name, Designation, Department")
 
-def remove_duplicate_faculty():
+    report = ImportErrorReport('faculty', ['Row', 'Name', 'Designation', 'Department', 'Error'])
     conn = get_db_connection()
-    c = conn.cursor()
+    valid_count = 0
+    imported_count = 0
+    batch = []
+
+    def write_batch():
+        # Existing (name, designation, department) rows are skipped by the unique index
+        cursor = conn.executemany("""
+            INSERT INTO faculty (name, designation, department, total_duties, remaining_duties)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (name, designation, department) DO NOTHING
+        """, batch)
+        batch.clear()
+        if progress and total_bytes:
+            progress(stream.tell() / total_bytes, f"{valid_count} faculty rows read")
+        return cursor.rowcount
+
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for row_num, row in enumerate(csv_data, start=2):
+            if not any(cell.strip() for cell in row):
+                continue
+            if len(row) < 3:
+                report.add(row_num, row[:3], "Expected 3 columns: Name, Designation, Department")
+                continue
+
+            name = sanitize_input(row[0])
+            designation = sanitize_input(row[1])
+            department = sanitize_input(row[2])
+
+            if not name or not designation or not department:
+                report.add(row_num, row[:3], "Name, designation and department are required")
+            elif designation not in DESIGNATION_DUTIES:
+                report.add(row_num, row[:3], f"Unknown designation '{designation}'")
+            else:
+                total_duties = get_designation_duties(designation)
+                batch.append((name, designation, department, total_duties, total_duties))
+                valid_count += 1
+                if len(batch) >= IMPORT_CHUNK_ROWS:
+                    imported_count += write_batch()
+
+        if batch:
+            imported_count += write_batch()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        report.close()
+        conn.close()
+
+    return imported_count, valid_count - imported_count, report
+
+def stage_upload(file):
+    """Save an upload for a background job, which deletes it when done"""
+    os.makedirs(IMPORT_REPORT_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_REPORT_DIR, f"upload_{uuid.uuid4().hex}")
+    file.save(path)
+    return path
+
+# Outcome messages as (category, text) pairs, flashed by the routes and stored in job results
+def faculty_import_messages(imported_count, duplicate_count, failed_count):
+    messages = []
+    if imported_count > 0:
+        messages.append(("success", f"Faculty data uploaded successfully! {imported_count} records imported."))
+    if duplicate_count > 0:
+        messages.append(("info", f"{duplicate_count} records already existed and were skipped."))
+    if failed_count > 0:
+        messages.append(("warning", f"{failed_count} records failed to import. Download the error report for details."))
+    return messages
+
+def exam_import_messages(valid, failed_count):
+    messages = []
+    if valid:
+        messages.append(("success", f"Timetable imported! {len(valid)} exams scheduled, {sum(row[3] for row in valid)} invigilator duties required."))
+    if failed_count:
+        messages.append(("warning", f"{failed_count} rows failed to import. Download the error report for details."))
+    return messages
+
+def invigilator_allocation_messages(result):
+    if not result['exams_considered']:
+        return [("info", "All exams in the selected range already have enough invigilators.")]
+    messages = [("success", f"Auto-assigned {result['assignments']} invigilator duties across {result['exams_considered']} exam(s)!")]
+    if result['shortfalls']:
+        missing = sum(result['shortfalls'].values())
+        slots = ", ".join(f"{date} {session} ({count})" for (date, session), count in sorted(result['unfilled_slots'].items()))
+        messages.append(("warning", f"{len(result['shortfalls'])} exam(s) are still short of {missing} invigilator(s). Unfilled slots: {slots}"))
+    return messages
+
+def hall_allocation_messages(result):
+    if not result['exams']:
+        messages = [("info", "Every exam in the selected range already has enough hall capacity.")]
+    else:
+        messages = [("success", f"Auto-assigned {result['halls_assigned']} hall(s) to {result['exams']} exam(s) across {result['slots']} session(s)!")]
+    if result['shortfalls']:
+        messages.append(("warning", f"{len(result['shortfalls'])} exam(s) still need seats for {sum(result['shortfalls'].values())} students. Not enough free halls in their session."))
+    return messages
+
+def substitution_result(faculty, start_date, end_date, changes, started):
+    """JSON-ready diff of a substitute_duties() run for one faculty member"""
+    substituted = sum(1 for change in changes if change['substitute_faculty_id'] is not None)
+    return {
+        'faculty_id': faculty['faculty_id'],
+        'name': faculty['name'],
+        'start_date': start_date,
+        'end_date': end_date,
+        'substituted': substituted,
+        'unfilled': len(changes) - substituted,
+        'changes': changes,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+
+def substitution_messages(result):
+    if not result['changes']:
+        return [("info", f"{result['name']} had no upcoming duties to hand over.")]
+    messages = []
+    if result['substituted']:
+        moves = ", ".join(f"{change['course_code']} {change['date']} {change['session']} to {change['substitute_name']}"
+                          for change in result['changes'] if change['substitute_faculty_id'] is not None)
+        messages.append(("success", f"Handed {result['substituted']} of {result['name']}'s duties to substitutes: {moves}"))
+    if result['unfilled']:
+        slots = ", ".join(f"{change['course_code']} {change['date']} {change['session']}"
+                          for change in result['changes'] if change['substitute_faculty_id'] is None)
+        messages.append(("warning", f"No substitute was free for {result['unfilled']} duty/duties, so these exams are now short: {slots}"))
+    return messages
+
+def flash_messages(messages):
+    for category, message in messages:
+        flash(message, category)
+
+# ---------- BUSY SLOT INDEX ----------
+# Process-wide map of (date, session) -> {faculty_id: number of duties in that slot}.
+# Loaded once from duty_allocations and kept current by the assignment and
+# deletion routes after they commit. Pages use it to list free faculty; writers
+# check conflicts against duty_allocations inside their own transaction, since
+# the index lags a commit and is never shared between worker processes.
+_busy_slots = None
+_busy_slots_lock = threading.RLock()
+
+def _build_busy_slots(conn, start_date=None, end_date=None):
+    date_filter = ""
+    params = []
+    if start_date:
+        date_filter += " AND e.date >= ?"
+        params.append(start_date)
+    if end_date:
+        date_filter += " AND e.date <= ?"
+        params.append(end_date)
     
+    busy = {}
+    for row in conn.execute(f"""
+        SELECT da.faculty_id, e.date, e.session
+        FROM duty_allocations da
+        JOIN exams e ON da.exam_id = e.exam_id
+        WHERE 1=1 {date_filter}
+    """, params):
+        slot = busy.setdefault((row['date'], row['session']), {})
+        slot[row['faculty_id']] = slot.get(row['faculty_id'], 0) + 1
+    return busy
+
+def load_busy_slots(conn=None):
+    """(Re)build the busy slot index from duty_allocations"""
+    global _busy_slots
+    own_conn = conn is None
+    if own_conn:
+        # Not the request's pooled connection: the first lookup can come from
+        # inside a transaction, which closing that connection would roll back
+        conn = open_db_connection()
     try:
-        # Find and remove duplicates
-        c.execute("""
-            DELETE FROM faculty 
-            WHERE faculty_id NOT IN (
-                SELECT MIN(faculty_id) 
-                FROM faculty 
-                GROUP BY name, designation, department
-            )
-        """)
+        busy = _build_busy_slots(conn)
+    finally:
+        if own_conn:
+            conn.close()
+    
+    with _busy_slots_lock:
+        _busy_slots = busy
+
+def _get_busy_slots():
+    if _busy_slots is None:
+        load_busy_slots()
+    return _busy_slots
+
+def busy_faculty_counts(date, session):
+    """Copy of {faculty_id: duties} for one (date, session) slot"""
+    with _busy_slots_lock:
+        return dict(_get_busy_slots().get((date, session), {}))
+
+def read_busy_slots(conn, start_date=None, end_date=None):
+    """{(date, session): set of busy faculty ids} inside the date range, read in the caller's transaction"""
+    return {slot: set(counts) for slot, counts in _build_busy_slots(conn, start_date, end_date).items()}
+
+def mark_busy_slots(entries):
+    """Record committed (faculty_id, date, session) duties in the index"""
+    with _busy_slots_lock:
+        # Not loaded yet: the first lookup reads them from the database anyway
+        if _busy_slots is None:
+            return
+        busy = _busy_slots
+        for faculty_id, date, session in entries:
+            slot = busy.setdefault((date, session), {})
+            slot[faculty_id] = slot.get(faculty_id, 0) + 1
+
+def unmark_busy_slots(entries):
+    """Drop committed (faculty_id, date, session) duties from the index"""
+    with _busy_slots_lock:
+        if _busy_slots is None:
+            return
+        busy = _busy_slots
+        for faculty_id, date, session in entries:
+            slot = busy.get((date, session))
+            if not slot or faculty_id not in slot:
+                continue
+            slot[faculty_id] -= 1
+            if slot[faculty_id] <= 0:
+                del slot[faculty_id]
+            if not slot:
+                del busy[(date, session)]
+
+def check_busy_slot_index(conn=None, repair=False):
+    """Compare the index with duty_allocations.
+    
+    Returns a list of (date, session, faculty_id, expected, indexed) mismatches
+    and rebuilds the index from the database when repair is set.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    try:
+        expected = _build_busy_slots(conn)
+    finally:
+        if own_conn:
+            conn.close()
+    
+    with _busy_slots_lock:
+        indexed = _get_busy_slots()
+        mismatches = []
+        for slot in set(expected) | set(indexed):
+            expected_counts = expected.get(slot, {})
+            indexed_counts = indexed.get(slot, {})
+            for faculty_id in set(expected_counts) | set(indexed_counts):
+                if expected_counts.get(faculty_id, 0) != indexed_counts.get(faculty_id, 0):
+                    mismatches.append((slot[0], slot[1], faculty_id,
+                                       expected_counts.get(faculty_id, 0),
+                                       indexed_counts.get(faculty_id, 0)))
+        
+        if repair and mismatches:
+            global _busy_slots
+            _busy_slots = expected
+    
+    return sorted(mismatches)
+
+# ---------- ALLOCATION ENGINE ----------
+def load_allocation_snapshot(conn, start_date=None, end_date=None):
+    """Load under-staffed exams, available faculty and busy slots for a date range"""
+    date_filter = ""
+    params = []
+    if start_date:
+        date_filter += " AND e.date >= ?"
+        params.append(start_date)
+    if end_date:
+        date_filter += " AND e.date <= ?"
+        params.append(end_date)
+    
+    exams = conn.execute(f"""
+        SELECT e.exam_id, e.exam_type, e.date, e.session, e.invigilators_required,
+               e.course_code, COUNT(da.allocation_id) as assigned
+        FROM exams e
+        LEFT JOIN duty_allocations da ON e.exam_id = da.exam_id
+        WHERE 1=1 {date_filter}
+        GROUP BY e.exam_id
+        HAVING COUNT(da.allocation_id) < e.invigilators_required
+        ORDER BY e.date, e.session, e.invigilators_required DESC
+    """, params).fetchall()
+    
+    faculty = conn.execute("""
+        SELECT faculty_id, name, designation, total_duties, remaining_duties
+        FROM faculty
+        WHERE is_available = TRUE
+        ORDER BY designation, remaining_duties DESC
+    """).fetchall()
+    
+    busy_slots = read_busy_slots(conn, start_date, end_date)
+    add_leave_to_busy_slots(conn, busy_slots, {(exam['date'], exam['session']) for exam in exams})
+    return exams, faculty, busy_slots
+
+def plan_invigilator_allocation(exams, faculty, busy_slots):
+    """Pick invigilators for every under-staffed exam in memory.
+    
+    Returns (plan, shortfalls): plan is a list of
+    (exam_id, date, session, faculty_id, duties) tuples and shortfalls maps
+    exam_id to the number of invigilators that could not be found.
+    """
+    remaining = {f['faculty_id']: f['remaining_duties'] for f in faculty}
+    busy = {slot: set(ids) for slot, ids in busy_slots.items()}
+    
+    plan = []
+    shortfalls = {}
+    for exam in exams:
+        needed = exam['invigilators_required'] - exam['assigned']
+        duty_requirement = get_duty_requirement(exam['exam_type'])
+        taken = busy.setdefault((exam['date'], exam['session']), set())
         
-        deleted_count = c.rowcount
-        if deleted_count > 0:
-            print(f"Removed {deleted_count} duplicate faculty entries")
+        candidates = [faculty_id for faculty_id, left in remaining.items()
+                      if left >= duty_requirement and faculty_id not in taken]
+        # Most remaining duties first so the load spreads across the season
+        candidates.sort(key=lambda faculty_id: remaining[faculty_id], reverse=True)
         
+        for faculty_id in candidates[:needed]:
+            plan.append((exam['exam_id'], exam['date'], exam['session'], faculty_id, duty_requirement))
+            remaining[faculty_id] -= duty_requirement
+            taken.add(faculty_id)
+        
+        if len(candidates) < needed:
+            shortfalls[exam['exam_id']] = needed - len(candidates)
+    
+    return plan, shortfalls
+
+def plan_balanced_allocation(exams, faculty, busy_slots):
+    """Min-cost flow variant of plan_invigilator_allocation (see duty_solver.py).
+    
+    The greedy plan is used instead whenever it staffs more seats, so the
+    balanced mode never leaves more exams short.
+    """
+    balanced = solve_balanced_allocation(
+        [(exam['exam_id'], exam['date'], exam['session'],
+          exam['invigilators_required'] - exam['assigned'],
+          get_duty_requirement(exam['exam_type'])) for exam in exams],
+        [(f['faculty_id'], f['total_duties'], f['remaining_duties']) for f in faculty],
+        busy_slots
+    )
+    greedy = plan_invigilator_allocation(exams, faculty, busy_slots)
+    return greedy if len(greedy[0]) > len(balanced[0]) else balanced
+
+ALLOCATION_PLANNERS = {
+    'greedy': plan_invigilator_allocation,
+    'balanced': plan_balanced_allocation
+}
+
+def apply_invigilator_allocation(conn, plan):
+    """Write a planned allocation; the caller owns the transaction"""
+    if not plan:
+        return
+    
+    conn.executemany("""
+        INSERT INTO duty_allocations (exam_id, date, session, faculty_id)
+        VALUES (?, ?, ?, ?)
+    """, [(exam_id, date, session, faculty_id) for exam_id, date, session, faculty_id, _ in plan])
+    
+    conn.executemany("""
+        INSERT INTO faculty_duties (faculty_id, exam_id, duties_assigned)
+        VALUES (?, ?, ?)
+        ON CONFLICT (faculty_id, exam_id) DO UPDATE SET duties_assigned = excluded.duties_assigned
+    """, [(faculty_id, exam_id, duties) for exam_id, _, _, faculty_id, duties in plan])
+    
+    duties_used = {}
+    for _, _, _, faculty_id, duties in plan:
+        duties_used[faculty_id] = duties_used.get(faculty_id, 0) + duties
+    conn.executemany("""
+        UPDATE faculty 
+        SET remaining_duties = remaining_duties - ? 
+        WHERE faculty_id = ?
+    """, [(duties, faculty_id) for faculty_id, duties in duties_used.items()])
+
+def assign_faculty_batch(conn, exam, faculty_ids):
+    """Validate and assign a set of faculty to one exam with a fixed number of statements.
+    
+    Returns a list of {'faculty_id', 'name', 'status', 'message'} dicts, one per
+    requested faculty id. Nothing is written unless every faculty member passes.
+    """
+    duty_requirement = get_duty_requirement(exam['exam_type'])
+    placeholders = ",".join("?" * len(faculty_ids))
+    
+    rows = conn.execute(f"""
+        SELECT f.faculty_id, f.name, f.remaining_duties, f.is_available,
+               EXISTS (
+                   SELECT 1 FROM duty_allocations da
+                   WHERE da.faculty_id = f.faculty_id AND da.exam_id = ?
+               ) as already_assigned,
+               EXISTS (
+                   SELECT 1 FROM duty_allocations da
+                   JOIN exams e ON da.exam_id = e.exam_id
+                   WHERE da.faculty_id = f.faculty_id AND e.date = ? AND e.session = ? AND da.exam_id != ?
+               ) as busy_elsewhere,
+               EXISTS (
+                   SELECT 1 FROM faculty_leave l
+                   WHERE l.faculty_id = f.faculty_id AND l.end_date >= ? AND l.start_date <= ?
+               ) as on_leave
+        FROM faculty f
+        WHERE f.faculty_id IN ({placeholders})
+    """, (exam['exam_id'], exam['date'], exam['session'], exam['exam_id'],
+          exam['date'], exam['date'], *faculty_ids)).fetchall()
+    by_id = {row['faculty_id']: row for row in rows}
+    
+    results = []
+    plan = []
+    for faculty_id in dict.fromkeys(faculty_ids):
+        row = by_id.get(faculty_id)
+        if not row:
+            results.append({'faculty_id': faculty_id, 'name': f"#{faculty_id}", 'status': 'error',
+                            'message': "Faculty member not found"})
+        elif row['already_assigned']:
+            results.append({'faculty_id': faculty_id, 'name': row['name'], 'status': 'skipped',
+                            'message': "Already assigned to this exam"})
+        elif row['busy_elsewhere']:
+            results.append({'faculty_id': faculty_id, 'name': row['name'], 'status': 'error',
+                            'message': f"Already has a duty on {exam['date']} ({exam['session']})"})
+        elif not row['is_available']:
+            results.append({'faculty_id': faculty_id, 'name': row['name'], 'status': 'error',
+                            'message': "Marked as unavailable"})
+        elif row['on_leave']:
+            results.append({'faculty_id': faculty_id, 'name': row['name'], 'status': 'error',
+                            'message': f"On leave on {exam['date']}"})
+        elif row['remaining_duties'] < duty_requirement:
+            results.append({'faculty_id': faculty_id, 'name': row['name'], 'status': 'error',
+                            'message': "Not enough remaining duties"})
+        else:
+            results.append({'faculty_id': faculty_id, 'name': row['name'], 'status': 'assigned',
+                            'message': f"{duty_requirement} duty/duties assigned"})
+            plan.append((exam['exam_id'], exam['date'], exam['session'], faculty_id, duty_requirement))
+    
+    if not any(result['status'] == 'error' for result in results):
+        apply_invigilator_allocation(conn, plan)
+    
+    return results
+
+def add_leave_to_busy_slots(conn, busy_slots, slots):
+    """Count faculty on leave as busy in each (date, session) of slots"""
+    if not slots:
+        return
+    dates = sorted(date for date, _ in slots)
+    leave = conn.execute("""
+        SELECT faculty_id, start_date, end_date FROM faculty_leave
+        WHERE end_date >= ? AND start_date <= ?
+    """, (dates[0], dates[-1])).fetchall()
+    for slot in slots:
+        away = {row['faculty_id'] for row in leave if row['start_date'] <= slot[0] <= row['end_date']}
+        if away:
+            busy_slots[slot] = busy_slots.get(slot, set()) | away
+
+def plan_substitutions(duties, faculty, busy_slots):
+    """Pick a substitute for each duty being handed over, in memory.
+    
+    Each (date, session) gets one candidate pool, the faculty free in that slot
+    ranked by remaining duties, built the first time the slot comes up.
+    Returns (duty, faculty_id) pairs; faculty_id is None where nobody free
+    has enough remaining duties.
+    """
+    remaining = {f['faculty_id']: f['remaining_duties'] for f in faculty}
+    ranked = sorted(remaining, key=lambda faculty_id: remaining[faculty_id], reverse=True)
+    pools = {}
+    picks = []
+    for duty in duties:
+        slot = (duty['date'], duty['session'])
+        if slot not in pools:
+            taken = busy_slots.get(slot, set())
+            pools[slot] = [faculty_id for faculty_id in ranked if faculty_id not in taken]
+        pool = pools[slot]
+        # Earlier picks may have used up duties, so take the most remaining as it stands now
+        substitute = max((faculty_id for faculty_id in pool if remaining[faculty_id] >= duty['duties']),
+                         key=remaining.get, default=None)
+        if substitute is not None:
+            pool.remove(substitute)
+            remaining[substitute] -= duty['duties']
+        picks.append((duty, substitute))
+    return picks
+
+def substitute_duties(conn, faculty_id, start_date, end_date=None):
+    """Hand faculty_id's duties between the dates to substitutes; the caller owns the transaction.
+    
+    Returns (changes, released, assigned): changes is the diff, one dict per
+    duty with its exam, slot and substitute (None when nobody was free, and the
+    duty is then dropped); released and assigned are (faculty_id, date, session)
+    entries for unmark_busy_slots() and mark_busy_slots() once committed.
+    """
+    where = "da.faculty_id = ? AND e.date >= ?"
+    params = [faculty_id, start_date]
+    if end_date:
+        where += " AND e.date <= ?"
+        params.append(end_date)
+    
+    duties = conn.execute(f"""
+        SELECT da.allocation_id, da.exam_id, e.date, e.session, e.course_code,
+               {duty_requirement_sql('e.exam_type')} as duties
+        FROM duty_allocations da
+        JOIN exams e ON da.exam_id = e.exam_id
+        WHERE {where}
+        ORDER BY e.date, e.session, e.exam_id
+    """, params).fetchall()
+    if not duties:
+        return [], [], []
+    
+    released = release_duties(conn, where, params)
+    conn.executemany("DELETE FROM faculty_duties WHERE faculty_id = ? AND exam_id = ?",
+                     [(faculty_id, duty['exam_id']) for duty in duties])
+    conn.executemany("DELETE FROM duty_allocations WHERE allocation_id = ?",
+                     [(duty['allocation_id'],) for duty in duties])
+    
+    faculty = conn.execute("""
+        SELECT faculty_id, name, remaining_duties
+        FROM faculty
+        WHERE is_available = TRUE AND faculty_id != ?
+    """, (faculty_id,)).fetchall()
+    slots = {(duty['date'], duty['session']) for duty in duties}
+    busy_slots = read_busy_slots(conn, min(date for date, _ in slots), max(date for date, _ in slots))
+    add_leave_to_busy_slots(conn, busy_slots, slots)
+    picks = plan_substitutions(duties, faculty, busy_slots)
+    
+    plan = [(duty['exam_id'], duty['date'], duty['session'], substitute, duty['duties'])
+            for duty, substitute in picks if substitute is not None]
+    apply_invigilator_allocation(conn, plan)
+    
+    names = {f['faculty_id']: f['name'] for f in faculty}
+    changes = [{'exam_id': duty['exam_id'], 'course_code': duty['course_code'],
+                'date': duty['date'], 'session': duty['session'], 'duties': duty['duties'],
+                'removed_faculty_id': faculty_id,
+                'substitute_faculty_id': substitute,
+                'substitute_name': names.get(substitute)}
+               for duty, substitute in picks]
+    assigned = [(substitute, date, session) for _, date, session, substitute, _ in plan]
+    return changes, released, assigned
+
+def auto_allocate_invigilators(start_date=None, end_date=None, mode='greedy', progress=None):
+    """Fill every under-staffed exam in the date range in a single transaction"""
+    planner = ALLOCATION_PLANNERS.get(mode, plan_invigilator_allocation)
+    
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        exams, faculty, busy_slots = load_allocation_snapshot(conn, start_date, end_date)
+        if progress:
+            progress(0.2, f"Planning duties for {len(exams)} exam(s)")
+        plan, shortfalls = planner(exams, faculty, busy_slots)
+        if progress:
+            progress(0.8, f"Saving {len(plan)} assignment(s)")
+        apply_invigilator_allocation(conn, plan)
         conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    mark_busy_slots((faculty_id, date, session) for _, date, session, faculty_id, _ in plan)
+    
+    unfilled_slots = {}
+    for exam in exams:
+        if exam['exam_id'] in shortfalls:
+            slot = (exam['date'], exam['session'])
+            unfilled_slots[slot] = unfilled_slots.get(slot, 0) + shortfalls[exam['exam_id']]
+    
+    return {
+        'exams_considered': len(exams),
+        'assignments': len(plan),
+        'shortfalls': shortfalls,
+        'unfilled_slots': unfilled_slots
+    }
+
+def auto_allocate_halls(start_date=None, end_date=None, session_filter=None, progress=None):
+    """Jointly pack halls for every exam of each (date, session) slot in range, in one transaction"""
+    filters = ""
+    params = []
+    if start_date:
+        filters += " AND e.date >= ?"
+        params.append(start_date)
+    if end_date:
+        filters += " AND e.date <= ?"
+        params.append(end_date)
+    if session_filter:
+        filters += " AND e.session = ?"
+        params.append(session_filter)
+    
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
         
-    except Exception as e:
-        print(f"Error removing duplicates: {e}")
+        exams = conn.execute(f"""
+            SELECT e.exam_id, e.date, e.session, e.students_count,
+                   COALESCE(SUM(h.capacity), 0) as assigned_capacity
+            FROM exams e
+            LEFT JOIN exam_hall_allocations eha ON e.exam_id = eha.exam_id
+            LEFT JOIN halls h ON eha.hall_id = h.hall_id
+            WHERE 1=1 {filters}
+            GROUP BY e.exam_id
+            ORDER BY e.date, e.session
+        """, params).fetchall()
+        
+        halls = conn.execute("""
+            SELECT hall_id, hall_name, capacity FROM halls
+            WHERE is_available = TRUE
+        """).fetchall()
+        
+        booked = {}
+        for row in conn.execute(f"""
+            SELECT eha.hall_id, e.date, e.session
+            FROM exam_hall_allocations eha
+            JOIN exams e ON eha.exam_id = e.exam_id
+            WHERE 1=1 {filters}
+        """, params):
+            booked.setdefault((row['date'], row['session']), set()).add(row['hall_id'])
+        
+        slots = {}
+        for exam in exams:
+            seats_needed = exam['students_count'] - exam['assigned_capacity']
+            if seats_needed > 0:
+                slots.setdefault((exam['date'], exam['session']), []).append((exam['exam_id'], seats_needed))
+        
+        rows = []
+        shortfalls = {}
+        for slot_num, (slot, slot_exams) in enumerate(slots.items()):
+            if progress:
+                progress(0.9 * slot_num / len(slots), f"Packing halls for {slot[0]} {slot[1]}")
+            free_halls = [hall for hall in halls if hall['hall_id'] not in booked.get(slot, ())]
+            allocation, slot_shortfalls = pack_session(slot_exams, free_halls)
+            for exam_id, chosen in allocation.items():
+                rows.extend((exam_id, hall['hall_id']) for hall in chosen)
+            shortfalls.update(slot_shortfalls)
+        
+        conn.executemany("""
+            INSERT OR IGNORE INTO exam_hall_allocations (exam_id, hall_id)
+            VALUES (?, ?)
+        """, rows)
+        conn.commit()
+    except Exception:
         conn.rollback()
+        raise
     finally:
         conn.close()
+    
+    return {
+        'slots': len(slots),
+        'exams': sum(len(slot_exams) for slot_exams in slots.values()),
+        'halls_assigned': len(rows),
+        'shortfalls': shortfalls
+    }
+
+# ---------- RESPONSE CACHE ----------
+# Rendered pages are cached under the generation of every table they read.
+# Write routes bump the generations of the tables they touch, so stale
+# entries are never looked up again and simply age out of the LRU.
+# Those in-memory generations only see this process's writes; triggers also
+# bump each table's row in cache_generations (see migrations.CACHED_TABLES)
+# inside the writing transaction, which covers other workers, jobs and
+# scripts such as init_db.py and debug.py writing the same file.
+_table_versions = {}
+_table_versions_lock = threading.Lock()
+
+def bump_table_versions(*tables):
+    """Invalidate cached pages that read any of tables; no tables means all of them"""
+    with _table_versions_lock:
+        for table in tables or list(_table_versions) + ['*']:
+            _table_versions[table] = _table_versions.get(table, 0) + 1
+
+def get_table_versions(tables, conn=None):
+    """This process's generations of tables plus the ones every process shares"""
+    conn = conn or get_db_connection()
+    placeholders = ",".join("?" * len(tables))
+    shared = dict(conn.execute(f"""
+        SELECT table_name, generation FROM cache_generations WHERE table_name IN ({placeholders})
+    """, tables).fetchall())
+    with _table_versions_lock:
+        local = tuple(_table_versions.get(table, 0) for table in ('*',) + tables)
+    return local + tuple(shared.get(table, 0) for table in tables)
+
+class ResponseCache:
+    """LRU of rendered page bodies, bounded by their total size in bytes"""
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'bypassed': 0, 'stored': 0, 'evicted': 0}
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry
+    
+    def put(self, key, body, mimetype, etag):
+        if len(body) > self.max_bytes // 4:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key)[0])
+            self.entries[key] = (body, mimetype, etag)
+            self.size += len(body)
+            self.stats['stored'] += 1
+            while self.size > self.max_bytes:
+                evicted_body = self.entries.popitem(last=False)[1][0]
+                self.size -= len(evicted_body)
+                self.stats['evicted'] += 1
+    
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+    
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.entries), bytes=self.size, max_bytes=self.max_bytes)
+
+response_cache = ResponseCache(app.config['RESPONSE_CACHE_MAX_BYTES'])
+
+@message_flashed.connect_via(app)
+def _page_flashed(sender, message, category, **extra):
+    # A page that shows a one-off message must not be replayed from the cache
+    g.page_flashed = True
+
+def _send_cached(body, mimetype, etag):
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+def cached_page(*tables):
+    """Serve a GET page from the response cache while none of tables has changed"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if response_cache.max_bytes <= 0 or '_flashes' in session:
+                response_cache.count('bypassed')
+                return f(*args, **kwargs)
+            
+            import_report = session.get('import_report') or {}
+            # The date is part of the key because pages compare against date('now')
+            key = (request.endpoint, tuple(sorted(request.args.items(multi=True))),
+                   session.get('user_id'), session.get('username'), import_report.get('token'),
+                   datetime.now().date(), get_table_versions(tables))
+            entry = response_cache.get(key)
+            if entry is None:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed or g.get('page_flashed'):
+                    return response
+                body = response.get_data()
+                etag = hashlib.sha1(body).hexdigest()
+                response_cache.put(key, body, response.mimetype, etag)
+                entry = (body, response.mimetype, etag)
+            
+            response = _send_cached(*entry)
+            if response.status_code == 304:
+                response_cache.count('not_modified')
+            return response
+        return decorated_function
+    return decorator
+
+def invalidates(*tables):
+    """Bump the cache generations of tables once the write route has run"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                return f(*args, **kwargs)
+            finally:
+                bump_table_versions(*tables)
+                g.tables_invalidated = True
+        return decorated_function
+    return decorator
+
+@app.after_request
+def invalidate_undeclared_writes(response):
+    # Any route that changed rows without declaring its tables clears everything
+    conn = g.get('db')
+    if conn is not None and conn.total_changes != g.get('db_changes') and not g.get('tables_invalidated'):
+        bump_table_versions()
+    return response
+
+# Row counts for paged views, reused until a generation of their tables moves
+# or after TABLE_COUNT_TTL seconds for tables only written by triggers and jobs
+TABLE_COUNT_TTL = 60
+TABLE_COUNT_ENTRIES = 256
+
+_table_counts = {}
+_table_counts_lock = threading.Lock()
+
+def cached_count(conn, key, tables, sql, params=()):
+    """(result of a COUNT query, seconds since it ran), running it again only when stale"""
+    versions = get_table_versions(tables, conn)
+    now = time.monotonic()
+    with _table_counts_lock:
+        entry = _table_counts.get(key)
+    if entry is None or entry[1] != versions or now - entry[2] > TABLE_COUNT_TTL:
+        entry = (conn.execute(sql, params).fetchone()[0], versions, now)
+        with _table_counts_lock:
+            if len(_table_counts) >= TABLE_COUNT_ENTRIES:
+                _table_counts.clear()
+            _table_counts[key] = entry
+    return entry[0], now - entry[2]
+
+# ---------- REQUEST METRICS ----------
+# Every request records its latency, SQL statements and template render time
+# (see metrics.py). Totals are served as Prometheus text at /metrics, each
+# response carries a Server-Timing header, and with METRICS_DEBUG_FOOTER set
+# HTML pages end with a one-line summary.
+request_metrics = RequestMetrics("invigilation")
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.render_seconds = 0.0
+
+@before_render_template.connect_via(app)
+def _render_started(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+@template_rendered.connect_via(app)
+def _render_finished(sender, template, context, **extra):
+    started = g.pop('render_started', None)
+    if started is not None:
+        g.render_seconds = g.get('render_seconds', 0.0) + time.perf_counter() - started
+
+def debug_footer(summary, stats):
+    slowest = ""
+    if stats is not None and stats.slowest_sql:
+        slowest = f" &middot; slowest {stats.slowest_seconds * 1000:.1f} ms: <code>{escape(statement_label(stats.slowest_sql))}</code>"
+    return (f'<footer class="container text-muted small my-3">{summary["queries"]} queries in {summary["sql_ms"]} ms'
+            f'{slowest} &middot; render {summary["render_ms"]} ms &middot; total {summary["total_ms"]} ms</footer>')
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    conn = g.get('db')
+    stats = conn.query_stats if conn is not None else None
+    endpoint = request.url_rule.endpoint if request.url_rule else "unmatched"
+    request_metrics.observe(endpoint, request.method, response.status_code, elapsed, stats, g.render_seconds)
+
+    g.request_metrics = summary = {
+        'queries': stats.count if stats else 0,
+        'sql_ms': round(stats.seconds * 1000, 2) if stats else 0,
+        'render_ms': round(g.render_seconds * 1000, 2),
+        'total_ms': round(elapsed * 1000, 2),
+    }
+    response.headers['Server-Timing'] = (f'sql;dur={summary["sql_ms"]};desc="{summary["queries"]} queries", '
+                                         f'render;dur={summary["render_ms"]}, total;dur={summary["total_ms"]}')
+
+    # Streamed responses are still being produced, so only whole pages get the footer
+    if (app.config['METRICS_DEBUG_FOOTER'] and response.status_code == 200
+            and response.mimetype == 'text/html' and not response.is_streamed):
+        body = response.get_data(as_text=True)
+        response.set_data(body.replace("</body>", debug_footer(summary, stats) + "\n</body>", 1))
+    return response
+
+# ---------- BACKGROUND JOBS ----------
+# Imports, allocations, resets and exports can also run on the job runner
+# (see job_runner.py) instead of in the request. Jobs use their own
+# connections, so they bump the cache generations themselves once committed.
+job_runner = JobRunner(open_db_connection, max_workers=app.config['JOB_WORKERS'],
+                       per_user=app.config['JOBS_PER_USER'], max_active=app.config['JOB_QUEUE_LIMIT'])
+# Safe with other workers running: only jobs of exited processes are failed
+job_runner.recover()
+
+JOB_TITLES = {
+    'import_faculty': "Faculty import",
+    'import_exams': "Timetable import",
+    'auto_allocate_invigilators': "Invigilator allocation",
+    'auto_allocate_halls': "Hall allocation",
+    'reset_duties': "Semester duty reset",
+    'rollover_semester': "Semester rollover",
+    'export_schedule': "Schedule export",
+    'backup_database': "Database backup",
+}
+
+def job_result(messages, download=None):
+    """Result stored for a finished job: flash-style messages and an optional file to download"""
+    return {'messages': messages, 'download': download}
+
+@job_runner.job('import_faculty')
+def import_faculty_job(job, path):
+    try:
+        with open(path, 'rb') as stream:
+            imported_count, duplicate_count, report = import_faculty_csv(stream, job.progress, os.path.getsize(path))
+    finally:
+        os.remove(path)
+    bump_table_versions('faculty')
+    return job_result(faculty_import_messages(imported_count, duplicate_count, report.count), report.download())
+
+@job_runner.job('import_exams')
+def import_exams_job(job, path, filename, auto_halls=False):
+    try:
+        with open(path, 'rb') as stream:
+            job.progress(0, "Validating timetable")
+            valid, report = import_exam_timetable(stream, filename, job.progress)
+    finally:
+        os.remove(path)
+    bump_table_versions('exams')
+    messages = exam_import_messages(valid, report.count)
+
+    # The exams are committed by now, so the hall step no longer reports progress (or cancels)
+    if valid and auto_halls:
+        dates = [row[1] for row in valid]
+        messages += hall_allocation_messages(auto_allocate_halls(min(dates), max(dates)))
+        bump_table_versions('exam_hall_allocations')
+    return job_result(messages, report.download())
+
+@job_runner.job('auto_allocate_invigilators')
+def auto_allocate_invigilators_job(job, start_date=None, end_date=None, mode='greedy'):
+    job.progress(0, "Loading exams and faculty")
+    result = auto_allocate_invigilators(start_date, end_date, mode, job.progress)
+    bump_table_versions('duty_allocations', 'faculty_duties', 'faculty')
+    return job_result(invigilator_allocation_messages(result))
+
+@job_runner.job('auto_allocate_halls')
+def auto_allocate_halls_job(job, start_date=None, end_date=None, session_filter=None):
+    result = auto_allocate_halls(start_date, end_date, session_filter, job.progress)
+    bump_table_versions('exam_hall_allocations')
+    return job_result(hall_allocation_messages(result))
+
+@job_runner.job('reset_duties')
+def reset_duties_job(job):
+    reset_semester_duties()
+    bump_table_versions('faculty')
+    return job_result([("success", "Semester duties reset successfully!")])
+
+@job_runner.job('rollover_semester')
+def rollover_semester_job(job, label, cutoff_date):
+    result = rollover_semester(label, cutoff_date, job.progress)
+    bump_table_versions('exams', 'duty_allocations', 'faculty_duties', 'exam_hall_allocations', 'faculty', 'semesters')
+    return job_result(rollover_messages(label, result))
+
+@job_runner.job('export_schedule', writes=False)
+def export_schedule_job(job, filters):
+    where, params = build_schedule_filters(filters)
+    token = uuid.uuid4().hex
+    path = import_report_path('schedule', token)
+    os.makedirs(IMPORT_REPORT_DIR, exist_ok=True)
+
+    conn = get_db_connection()
+    try:
+        total = conn.execute(f"""
+            SELECT COUNT(*) FROM duty_allocations da
+            JOIN faculty f ON da.faculty_id = f.faculty_id
+            JOIN exams e ON da.exam_id = e.exam_id
+            WHERE 1=1 {where}
+        """, params).fetchone()[0]
+        with open(path, "w", newline="", encoding="utf-8") as output:
+            for chunk_num, chunk in enumerate(iter_schedule_csv(conn, where, params), start=1):
+                output.write(chunk)
+                written = min(chunk_num * EXPORT_CHUNK_ROWS, total)
+                job.progress(written / total if total else 1, f"{written} of {total} rows written")
+    except Exception:
+        os.remove(path)
+        raise
+    finally:
+        conn.close()
+    return job_result([("success", f"Schedule export ready: {total} duties.")],
+                      {'kind': 'schedule', 'token': token, 'name': "invigilation_schedule.csv"})
+
+@job_runner.job('backup_database', writes=False)
+def backup_database_job(job):
+    path = create_snapshot(DB_NAME, app.config['BACKUP_DIR'], app.config['BACKUP_KEEP'], job.progress)
+    return job_result([("success", f"Database backed up and verified as {os.path.basename(path)}.")])
+
+def start_job(kind, params, return_to):
+    """Submit kind for the current user from a form route.
+
+    Browsers land on the jobs page; clients that accept JSON get 202 and the job.
+    Refused submissions go back to return_to with the reason.
+    """
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    try:
+        job_id = job_runner.submit(kind, params, session.get('user_id'))
+    except JobLimitExceeded as e:
+        if params.get('path'):
+            os.remove(params['path'])
+        if wants_json:
+            return jsonify({'error': str(e)}), 429
+        flash(str(e), "error")
+        return redirect(url_for(return_to))
+
+    if wants_json:
+        return jsonify(job_runner.get(job_id)), 202, {'Location': url_for('job_status', job_id=job_id)}
+    flash(f"{JOB_TITLES[kind]} started in the background.", "info")
+    return redirect(url_for('jobs'))
+
+# With BACKUP_INTERVAL_HOURS set, a daemon thread submits a backup job once
+# the newest snapshot is older than that. Looking at the snapshot files and
+# the jobs table rather than in-process state keeps several app processes
+# from each taking their own copy.
+BACKUP_CHECK_SECONDS = 60
+
+def backup_due():
+    snapshots = list_snapshots(DB_NAME, app.config['BACKUP_DIR'])
+    if snapshots and datetime.now() - snapshots[0]['created_at'] < timedelta(hours=app.config['BACKUP_INTERVAL_HOURS']):
+        return False
+    conn = open_db_connection()
+    try:
+        running = conn.execute(f"SELECT 1 FROM jobs WHERE kind = 'backup_database' AND status IN {ACTIVE_STATUSES}").fetchone()
+    finally:
+        conn.close()
+    return running is None
+
+def run_backup_schedule():
+    while True:
+        time.sleep(BACKUP_CHECK_SECONDS)
+        try:
+            if backup_due():
+                job_runner.submit('backup_database', {})
+        except JobLimitExceeded:
+            pass
+        except Exception:
+            app.logger.exception("Could not start the scheduled backup")
+
+if app.config['BACKUP_INTERVAL_HOURS'] > 0:
+    threading.Thread(target=run_backup_schedule, name="backup-schedule", daemon=True).start()
 
 # ---------- AUTHENTICATION ROUTES ----------
 @app.route("/login", methods=['GET', 'POST'])
@@ -384,6 +1660,7 @@ def logout():
 # ---------- MAIN ROUTES ----------
 @app.route("/")
 @login_required
+@cached_page('faculty', 'halls', 'exams', 'duty_allocations')
 def index():
     conn = get_db_connection()
     
@@ -417,21 +1694,25 @@ def index():
 
 @app.route("/faculty")
 @login_required
+@cached_page('faculty', 'faculty_leave')
 def faculty():
-    remove_duplicate_faculty()
-    update_faculty_designations()
-    
     conn = get_db_connection()
     faculty = conn.execute("""
         SELECT *, (total_duties - remaining_duties) as duties_completed 
         FROM faculty 
         ORDER BY department, designation, name
     """).fetchall()
+    leave = {}
+    for row in conn.execute("""
+        SELECT * FROM faculty_leave WHERE end_date >= ? ORDER BY start_date
+    """, (datetime.now().date().isoformat(),)):
+        leave.setdefault(row['faculty_id'], []).append(row)
     conn.close()
-    return render_template("faculty.html", faculty=faculty)
+    return render_template("faculty.html", faculty=faculty, leave=leave)
 
 @app.route("/add_faculty", methods=["POST"])
 @login_required
+@invalidates('faculty')
 def add_faculty():
     try:
         name = sanitize_input(request.form["name"])
@@ -455,12 +1736,16 @@ def add_faculty():
         flash("Faculty member added successfully!", "success")
         return redirect(url_for("faculty"))
         
+    except sqlite3.IntegrityError:
+        flash("Faculty member already exists!", "error")
+        return redirect(url_for("faculty"))
     except Exception as e:
         flash(f"Error adding faculty: {str(e)}", "error")
         return redirect(url_for("faculty"))
 
 @app.route("/toggle_faculty/<int:faculty_id>")
 @login_required
+@invalidates('faculty', 'duty_allocations', 'faculty_duties')
 def toggle_faculty(faculty_id):
     try:
         conn = get_db_connection()
@@ -471,21 +1756,113 @@ def toggle_faculty(faculty_id):
             return redirect(url_for("faculty"))
             
         new_status = not faculty['is_available']
+        today = datetime.now().date().isoformat()
+        started = time.perf_counter()
         
-        conn.execute("UPDATE faculty SET is_available = ? WHERE faculty_id = ?", (new_status, faculty_id))
-        conn.commit()
-        conn.close()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE faculty SET is_available = ? WHERE faculty_id = ?", (new_status, faculty_id))
+            # Upcoming duties of someone made unavailable go to substitutes in the same transaction
+            changes, released, assigned = ([], [], []) if new_status else substitute_duties(conn, faculty_id, today)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        unmark_busy_slots(released)
+        mark_busy_slots(assigned)
         
         status = "available" if new_status else "unavailable"
         flash(f"Faculty member marked as {status}!", "success")
+        if not new_status:
+            flash_messages(substitution_messages(substitution_result(faculty, today, None, changes, started)))
         return redirect(url_for("faculty"))
         
     except Exception as e:
         flash(f"Error updating faculty status: {str(e)}", "error")
         return redirect(url_for("faculty"))
 
+@app.route("/faculty/<int:faculty_id>/leave", methods=["POST"])
+@login_required
+@invalidates('faculty', 'faculty_leave', 'duty_allocations', 'faculty_duties')
+def record_leave(faculty_id):
+    """Record leave and hand the duties inside it to substitutes; answers with the diff as JSON when asked"""
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    data = request.get_json(silent=True) or request.form
+    
+    def failed(message, status=400):
+        if wants_json:
+            return jsonify({'error': message}), status
+        flash(message, "error")
+        return redirect(url_for("faculty"))
+    
+    start_date = data.get('start_date', '')
+    end_date = data.get('end_date') or start_date
+    reason = sanitize_input(data.get('reason', ''))
+    for value in (start_date, end_date):
+        is_valid, result = validate_date(value)
+        if not is_valid:
+            return failed(result)
+    if end_date < start_date:
+        return failed("Leave cannot end before it starts")
+    
+    try:
+        conn = get_db_connection()
+        faculty = conn.execute("SELECT * FROM faculty WHERE faculty_id = ?", (faculty_id,)).fetchone()
+        if not faculty:
+            conn.close()
+            return failed("Faculty member not found!", 404)
+        
+        started = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                INSERT INTO faculty_leave (faculty_id, start_date, end_date, reason, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (faculty_id, start_date, end_date, reason or None, datetime.now().isoformat(timespec='seconds')))
+            changes, released, assigned = substitute_duties(conn, faculty_id, start_date, end_date)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        unmark_busy_slots(released)
+        mark_busy_slots(assigned)
+        result = substitution_result(faculty, start_date, end_date, changes, started)
+    except Exception as e:
+        return failed(f"Error recording leave: {str(e)}", 500)
+    
+    if wants_json:
+        return jsonify(result)
+    flash(f"Leave recorded for {faculty['name']} from {start_date} to {end_date}.", "success")
+    flash_messages(substitution_messages(result))
+    return redirect(url_for("faculty"))
+
+@app.route("/faculty/leave/<int:leave_id>/cancel", methods=["POST"])
+@login_required
+@invalidates('faculty_leave')
+def cancel_leave(leave_id):
+    try:
+        conn = get_db_connection()
+        deleted = conn.execute("DELETE FROM faculty_leave WHERE leave_id = ?", (leave_id,)).rowcount
+        conn.commit()
+        conn.close()
+        
+        if deleted:
+            flash("Leave cancelled. Duties already handed to substitutes stay with them.", "success")
+        else:
+            flash("Leave record not found!", "error")
+    except Exception as e:
+        flash(f"Error cancelling leave: {str(e)}", "error")
+    return redirect(url_for("faculty"))
+
 @app.route("/reset_duties/<int:faculty_id>")
 @login_required
+@invalidates('faculty')
 def reset_faculty_duties(faculty_id):
     try:
         conn = get_db_connection()
@@ -507,16 +1884,46 @@ def reset_faculty_duties(faculty_id):
 
 @app.route("/reset_all_duties")
 @login_required
+@invalidates('faculty')
 def reset_all_duties():
     try:
+        if request.args.get("background"):
+            return start_job('reset_duties', {}, "faculty")
         reset_semester_duties()
+        flash("Semester duties reset successfully!", "success")
         return redirect(url_for("faculty"))
     except Exception as e:
         flash(f"Error resetting duties: {str(e)}", "error")
         return redirect(url_for("faculty"))
 
+@app.route("/rollover_semester", methods=["POST"])
+@login_required
+@invalidates('exams', 'duty_allocations', 'faculty_duties', 'exam_hall_allocations', 'faculty', 'semesters')
+def rollover_semester_route():
+    label = sanitize_input(request.form.get("label"))
+    cutoff_date = request.form.get("cutoff_date") or datetime.now().strftime('%Y-%m-%d')
+    if not label:
+        flash("Give the semester being closed a name.", "error")
+        return redirect(url_for("reports"))
+    try:
+        datetime.strptime(cutoff_date, '%Y-%m-%d')
+    except ValueError:
+        flash("Invalid cutoff date.", "error")
+        return redirect(url_for("reports"))
+    
+    if request.form.get("background"):
+        return start_job('rollover_semester', {'label': label, 'cutoff_date': cutoff_date}, "reports")
+    try:
+        flash_messages(rollover_messages(label, rollover_semester(label, cutoff_date)))
+    except sqlite3.IntegrityError:
+        flash(f"A semester called '{label}' has already been closed.", "error")
+    except Exception as e:
+        flash(f"Error closing semester: {str(e)}", "error")
+    return redirect(url_for("reports"))
+
 @app.route("/halls")
 @login_required
+@cached_page('halls', 'exams', 'exam_hall_allocations')
 def halls():
     conn = get_db_connection()
     halls = conn.execute("""
@@ -533,6 +1940,7 @@ def halls():
 
 @app.route("/add_hall", methods=["POST"])
 @login_required
+@invalidates('halls')
 def add_hall():
     try:
         hall_name = sanitize_input(request.form["hall_name"])
@@ -567,6 +1975,7 @@ def add_hall():
 
 @app.route("/toggle_hall/<int:hall_id>")
 @login_required
+@invalidates('halls')
 def toggle_hall(hall_id):
     try:
         conn = get_db_connection()
@@ -592,18 +2001,12 @@ def toggle_hall(hall_id):
 
 @app.route("/exams")
 @login_required
+@cached_page('exams', 'halls', 'duty_allocations', 'exam_hall_allocations')
 def exams():
     conn = get_db_connection()
-    exams = conn.execute("""
-        SELECT e.*, 
-               COUNT(DISTINCT da.faculty_id) as assigned_invigilators,
-               COUNT(DISTINCT eha.hall_id) as assigned_halls,
-               SUM(h.capacity) as total_hall_capacity
+    exams = conn.execute(f"""
+        SELECT e.*, {exam_rollup_columns('assigned_invigilators', 'assigned_halls', 'total_hall_capacity')}
         FROM exams e 
-        LEFT JOIN duty_allocations da ON e.exam_id = da.exam_id 
-        LEFT JOIN exam_hall_allocations eha ON e.exam_id = eha.exam_id
-        LEFT JOIN halls h ON eha.hall_id = h.hall_id
-        GROUP BY e.exam_id 
         ORDER BY e.date, e.session
     """).fetchall()
     conn.close()
@@ -611,6 +2014,7 @@ def exams():
 
 @app.route("/add_exam", methods=["POST"])
 @login_required
+@invalidates('exams')
 def add_exam():
     try:
         exam_type = sanitize_input(request.form["exam_type"])
@@ -657,6 +2061,37 @@ def add_exam():
         flash(f"Error adding exam: {str(e)}", "error")
         return redirect(url_for("exams"))
 
+@app.route("/import_exams", methods=["POST"])
+@login_required
+@invalidates('exams', 'exam_hall_allocations')
+def import_exams():
+    try:
+        file = request.files.get('file')
+        if not file or file.filename == '':
+            flash("No file selected", "error")
+            return redirect(url_for("exams"))
+        
+        if not file.filename.lower().endswith(('.csv', '.json')):
+            flash("Please upload a CSV or JSON timetable", "error")
+            return redirect(url_for("exams"))
+        
+        if request.form.get("background"):
+            params = {'path': stage_upload(file), 'filename': file.filename, 'auto_halls': bool(request.form.get("auto_halls"))}
+            return start_job('import_exams', params, "exams")
+
+        valid, report = import_exam_timetable(file.stream, file.filename)
+        report.remember()
+        flash_messages(exam_import_messages(valid, report.count))
+
+        if valid and request.form.get("auto_halls"):
+            dates = [row[1] for row in valid]
+            flash_messages(hall_allocation_messages(auto_allocate_halls(min(dates), max(dates))))
+
+    except Exception as e:
+        flash(f"Error importing timetable: {str(e)}", "error")
+    
+    return redirect(url_for("exams"))
+
 @app.route("/assign_invigilators/<int:exam_id>")
 @login_required
 def assign_invigilators(exam_id):
@@ -679,17 +2114,21 @@ def assign_invigilators(exam_id):
             flash("Exam not found!", "error")
             return redirect(url_for("exams"))
         
-        available_faculty = conn.execute("""
+        # Faculty on duty elsewhere in this slot come from the busy slot index
+        busy = busy_faculty_counts(exam['date'], exam['session'])
+        own_duties = {row['faculty_id'] for row in conn.execute(
+            "SELECT faculty_id FROM duty_allocations WHERE exam_id = ?", (exam_id,))}
+        
+        available_faculty = [f for f in conn.execute("""
             SELECT f.* FROM faculty f 
             WHERE f.is_available = TRUE 
             AND f.remaining_duties > 0
-            AND f.faculty_id NOT IN (
-                SELECT da.faculty_id FROM duty_allocations da 
-                JOIN exams e ON da.exam_id = e.exam_id 
-                WHERE e.date = ? AND e.session = ? AND e.exam_id != ?
+            AND NOT EXISTS (
+                SELECT 1 FROM faculty_leave l
+                WHERE l.faculty_id = f.faculty_id AND l.end_date >= ? AND l.start_date <= ?
             )
             ORDER BY f.designation, f.remaining_duties DESC
-        """, (exam['date'], exam['session'], exam_id)).fetchall()
+        """, (exam['date'], exam['date'])) if busy.get(f['faculty_id'], 0) - (f['faculty_id'] in own_duties) <= 0]
         
         conn.close()
         
@@ -703,6 +2142,7 @@ def assign_invigilators(exam_id):
 
 @app.route("/make_assignment", methods=["POST"])
 @login_required
+@invalidates('duty_allocations', 'faculty_duties', 'faculty')
 def make_assignment():
     try:
         exam_id = int(request.form["exam_id"])
@@ -717,77 +2157,72 @@ def make_assignment():
         exam = conn.execute("SELECT * FROM exams WHERE exam_id = ?", (exam_id,)).fetchone()
         
         if not exam:
+            conn.close()
             flash("Exam not found!", "error")
             return redirect(url_for("exams"))
         
         if len(faculty_ids) < exam['invigilators_required']:
+            conn.close()
             flash(f"Not enough faculty selected. Required: {exam['invigilators_required']}", "error")
             return redirect(url_for("assign_invigilators", exam_id=exam_id))
         
-        # Validate faculty availability
-        is_available, availability_message = validate_exam_scheduling(
-            exam['date'], exam['session'], faculty_ids
-        )
-        
-        if not is_available:
-            flash(availability_message, "error")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            results = assign_faculty_batch(conn, exam, faculty_ids)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        errors = [result for result in results if result['status'] == 'error']
+        if not errors:
+            mark_busy_slots((result['faculty_id'], exam['date'], exam['session'])
+                            for result in results if result['status'] == 'assigned')
+        if errors:
+            flash("No invigilators were assigned: " + "; ".join(f"{result['name']}: {result['message']}" for result in errors), "error")
             return redirect(url_for("assign_invigilators", exam_id=exam_id))
         
-        duty_requirement = get_duty_requirement(exam['exam_type'])
+        assigned = [result['name'] for result in results if result['status'] == 'assigned']
+        skipped = [result['name'] for result in results if result['status'] == 'skipped']
+        flash(f"Invigilators assigned successfully! {', '.join(assigned) or 'No new faculty'}", "success")
+        if skipped:
+            flash(f"Already assigned to this exam: {', '.join(skipped)}", "info")
+        return redirect(url_for("schedule"))
         
-        for faculty_id in faculty_ids:
-            # Check if faculty has enough remaining duties
-            faculty = conn.execute("SELECT * FROM faculty WHERE faculty_id = ?", (faculty_id,)).fetchone()
-            if faculty['remaining_duties'] < duty_requirement:
-                flash(f"{faculty['name']} doesn't have enough remaining duties!", "error")
-                return redirect(url_for("assign_invigilators", exam_id=exam_id))
-            
-            # Check if faculty is already assigned to this exam
-            existing_assignment = conn.execute("""
-                SELECT * FROM duty_allocations 
-                WHERE exam_id = ? AND faculty_id = ?
-            """, (exam_id, faculty_id)).fetchone()
-            
-            if not existing_assignment:
-                conn.execute("""
-                    INSERT INTO duty_allocations (exam_id, date, session, faculty_id)
-                    VALUES (?, ?, ?, ?)
-                """, (exam_id, exam['date'], exam['session'], faculty_id))
-            
-            # Update faculty duties
-            conn.execute("""
-                UPDATE faculty 
-                SET remaining_duties = remaining_duties - ? 
-                WHERE faculty_id = ? AND remaining_duties >= ?
-            """, (duty_requirement, faculty_id, duty_requirement))
-            
-            # Update or insert faculty duties record
-            existing_duty = conn.execute("""
-                SELECT * FROM faculty_duties 
-                WHERE faculty_id = ? AND exam_id = ?
-            """, (faculty_id, exam_id)).fetchone()
-            
-            if existing_duty:
-                conn.execute("""
-                    UPDATE faculty_duties 
-                    SET duties_assigned = ? 
-                    WHERE faculty_id = ? AND exam_id = ?
-                """, (duty_requirement, faculty_id, exam_id))
-            else:
-                conn.execute("""
-                    INSERT INTO faculty_duties (faculty_id, exam_id, duties_assigned)
-                    VALUES (?, ?, ?)
-                """, (faculty_id, exam_id, duty_requirement))
+    except Exception as e:
+        flash(f"Error assigning invigilators: {str(e)}", "error")
+        return redirect(url_for("assign_invigilators", exam_id=exam_id))
+
+@app.route("/auto_assign_invigilators", methods=["POST"])
+@login_required
+@invalidates('duty_allocations', 'faculty_duties', 'faculty')
+def auto_assign_invigilators():
+    try:
+        start_date = sanitize_input(request.form.get("start_date", "")) or datetime.now().strftime('%Y-%m-%d')
+        end_date = sanitize_input(request.form.get("end_date", "")) or None
         
-        conn.commit()
-        conn.close()
+        if end_date and end_date < start_date:
+            flash("End date cannot be before start date!", "error")
+            return redirect(url_for("exams"))
         
-        flash("Invigilators assigned successfully!", "success")
+        mode = request.form.get("mode", "greedy")
+        if mode not in ALLOCATION_PLANNERS:
+            mode = "greedy"
+        
+        if request.form.get("background"):
+            return start_job('auto_allocate_invigilators', {'start_date': start_date, 'end_date': end_date, 'mode': mode}, "exams")
+
+        result = auto_allocate_invigilators(start_date, end_date, mode)
+        flash_messages(invigilator_allocation_messages(result))
+        if not result['exams_considered']:
+            return redirect(url_for("exams"))
         return redirect(url_for("schedule"))
         
     except Exception as e:
-        flash(f"Error assigning invigilators: {str(e)}", "error")
-        return redirect(url_for("assign_invigilators", exam_id=exam_id))
+        flash(f"Error auto-assigning invigilators: {str(e)}", "error")
+        return redirect(url_for("exams"))
 
 @app.route("/assign_halls/<int:exam_id>")
 @login_required
@@ -849,6 +2284,7 @@ def assign_halls(exam_id):
 
 @app.route("/make_hall_assignment", methods=["POST"])
 @login_required
+@invalidates('exam_hall_allocations')
 def make_hall_assignment():
     try:
         exam_id = int(request.form["exam_id"])
@@ -909,6 +2345,7 @@ def make_hall_assignment():
 
 @app.route("/auto_assign_halls/<int:exam_id>")
 @login_required
+@invalidates('exam_hall_allocations')
 def auto_assign_halls(exam_id):
     try:
         conn = get_db_connection()
@@ -937,50 +2374,20 @@ def auto_assign_halls(exam_id):
             flash("No available halls for auto-assignment!", "warning")
             return redirect(url_for("assign_halls", exam_id=exam_id))
         
-        # Auto-assign halls based on capacity using smarter algorithm
-        assigned_halls = []
-        remaining_students = exam['students_count']
-        assigned_count = 0
-        total_capacity = 0
-        
-        # First pass: Try to find halls that can accommodate all students
-        for hall in available_halls:
-            if hall['capacity'] >= remaining_students:
-                # Found a single hall that can accommodate all students
-                try:
-                    conn.execute("""
-                        INSERT OR IGNORE INTO exam_hall_allocations (exam_id, hall_id)
-                        VALUES (?, ?)
-                    """, (exam_id, hall['hall_id']))
-                    assigned_halls.append(hall)
-                    assigned_count += 1
-                    total_capacity += hall['capacity']
-                    remaining_students = 0
-                    break
-                except sqlite3.IntegrityError:
-                    continue
-        
-        # Second pass: If no single hall can accommodate all, use multiple halls
-        if remaining_students > 0:
-            for hall in available_halls:
-                if remaining_students <= 0:
-                    break
-                
-                # Skip if hall is already assigned in first pass
-                if any(h['hall_id'] == hall['hall_id'] for h in assigned_halls):
-                    continue
-                
-                try:
-                    conn.execute("""
-                        INSERT OR IGNORE INTO exam_hall_allocations (exam_id, hall_id)
-                        VALUES (?, ?)
-                    """, (exam_id, hall['hall_id']))
-                    assigned_halls.append(hall)
-                    assigned_count += 1
-                    total_capacity += hall['capacity']
-                    remaining_students -= hall['capacity']
-                except sqlite3.IntegrityError:
-                    continue
+        # Halls already given to this exam count towards the requirement
+        assigned_ids = {row['hall_id'] for row in conn.execute(
+            "SELECT hall_id FROM exam_hall_allocations WHERE exam_id = ?", (exam_id,))}
+        already_assigned = [hall for hall in available_halls if hall['hall_id'] in assigned_ids]
+        candidate_halls = [hall for hall in available_halls if hall['hall_id'] not in assigned_ids]
+        students_to_seat = exam['students_count'] - sum(hall['capacity'] for hall in already_assigned)
+        
+        new_halls, _ = calculate_required_halls(students_to_seat, candidate_halls)
+        conn.executemany("""
+            INSERT OR IGNORE INTO exam_hall_allocations (exam_id, hall_id)
+            VALUES (?, ?)
+        """, [(exam_id, hall['hall_id']) for hall in new_halls])
+        assigned_count = len(new_halls)
+        assigned_halls = already_assigned + new_halls
         
         conn.commit()
         conn.close()
@@ -993,6 +2400,8 @@ def auto_assign_halls(exam_id):
                 flash(f"Auto-assigned {assigned_count} hall(s) successfully! Total capacity: {actual_total_capacity} students (✅ Capacity Satisfied)", "success")
             else:
                 flash(f"Auto-assigned {assigned_count} hall(s)! Total capacity: {actual_total_capacity} students. Still need capacity for {exam['students_count'] - actual_total_capacity} more students (⚠️ Insufficient Capacity)", "warning")
+        elif already_assigned and actual_total_capacity >= exam['students_count']:
+            flash(f"Assigned halls already seat all {exam['students_count']} students.", "info")
         else:
             flash("No halls were auto-assigned. All available halls may already be assigned or have conflicts.", "warning")
         
@@ -1002,8 +2411,39 @@ def auto_assign_halls(exam_id):
         flash(f"Error auto-assigning halls: {str(e)}", "error")
         return redirect(url_for("assign_halls", exam_id=exam_id))
 
+@app.route("/auto_assign_halls_session")
+@login_required
+@invalidates('exam_hall_allocations')
+def auto_assign_halls_session():
+    """Pack halls for every exam of one slot (date + session) or a whole date range"""
+    try:
+        date = sanitize_input(request.args.get("date", ""))
+        session_filter = sanitize_input(request.args.get("session", ""))
+        start_date = sanitize_input(request.args.get("start_date", "")) or date or datetime.now().strftime('%Y-%m-%d')
+        end_date = sanitize_input(request.args.get("end_date", "")) or date or None
+        
+        if session_filter and session_filter not in ('Forenoon', 'Afternoon'):
+            flash("Invalid session!", "error")
+            return redirect(url_for("exams"))
+        
+        if request.args.get("background"):
+            return start_job('auto_allocate_halls', {'start_date': start_date, 'end_date': end_date,
+                                                     'session_filter': session_filter or None}, "exams")
+
+        result = auto_allocate_halls(start_date, end_date, session_filter or None)
+        flash_messages(hall_allocation_messages(result))
+
+    except Exception as e:
+        flash(f"Error auto-assigning halls: {str(e)}", "error")
+    
+    next_exam = request.args.get("exam_id", type=int)
+    if next_exam:
+        return redirect(url_for("assign_halls", exam_id=next_exam))
+    return redirect(url_for("exams"))
+
 @app.route("/remove_hall_assignment/<int:exam_id>/<int:hall_id>")
 @login_required
+@invalidates('exam_hall_allocations')
 def remove_hall_assignment(exam_id, hall_id):
     try:
         conn = get_db_connection()
@@ -1030,83 +2470,231 @@ def remove_hall_assignment(exam_id, hall_id):
     except Exception as e:
         flash(f"Error removing hall assignment: {str(e)}", "error")
         return redirect(url_for("assign_halls", exam_id=exam_id))
-@app.route("/schedule")
-@login_required
-def schedule():
-    # Get sorting and filtering parameters
-    sort_by = request.args.get('sort_by', 'e.date')
-    sort_order = request.args.get('sort_order', 'asc')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    exam_type = request.args.get('exam_type')
-    session_filter = request.args.get('session')
 
-    # Build the base query
-    base_query = """
+# Sort orders for the schedule: the table whose index walk yields the order
+# and the columns that index is sorted on. Every order ends with the driving
+# row's id and allocation_id, so the keyset is unique and no page is sorted.
+SCHEDULE_SORT_KEYS = {
+    'date': ('exams', ['e.date', 'e.session']),
+    'session': ('exams', ['e.session', 'e.date']),
+    'exam_type': ('exams', ['e.exam_type', 'e.date']),
+    'course_code': ('exams', ['e.course_code']),
+    'faculty_name': ('faculty', ['f.name', 'f.designation', 'f.department']),
+    'department': ('faculty', ['f.department', 'f.name']),
+    'designation': ('faculty', ['f.designation', 'f.name'])
+}
+
+# Sort keys that may hold NULL; every other key is a NOT NULL column
+SCHEDULE_NULLABLE_KEYS = {'e.course_code'}
+
+def schedule_sort_keys(sort_by):
+    """(driving table, sort key expressions) for a schedule sort"""
+    driver, columns = SCHEDULE_SORT_KEYS.get(sort_by, SCHEDULE_SORT_KEYS['date'])
+    return driver, columns + ['e.exam_id' if driver == 'exams' else 'f.faculty_id', 'da.allocation_id']
+
+def keyset_condition(keys, values, comparison, nullable=()):
+    """`(keys) comparison (values)` in SQLite's sort order, where NULL sorts first in any nullable key"""
+    terms = []
+    params = []
+    for index, (key, value) in enumerate(zip(keys, values)):
+        if value is None and comparison == '<':
+            # Nothing sorts before NULL
+            continue
+        parts = []
+        term_params = []
+        for previous_key, previous_value in zip(keys[:index], values[:index]):
+            if previous_value is None:
+                parts.append(f"{previous_key} IS NULL")
+            else:
+                parts.append(f"{previous_key} = ?")
+                term_params.append(previous_value)
+        if value is None:
+            parts.append(f"{key} IS NOT NULL")
+        elif comparison == '>':
+            parts.append(f"{key} > ?")
+            term_params.append(value)
+        elif key in nullable:
+            parts.append(f"({key} < ? OR {key} IS NULL)")
+            term_params.append(value)
+        else:
+            parts.append(f"{key} < ?")
+            term_params.append(value)
+        terms.append("(" + " AND ".join(parts) + ")")
+        params.extend(term_params)
+    condition = "(" + " OR ".join(terms) + ")" if terms else "0"
+    if values and values[0] is not None:
+        # A plain bound on the leading key lets SQLite seek on its index
+        # (a descending walk still has to reach the NULLs after the bound)
+        if comparison == '>':
+            bound = f"{keys[0]} >= ?"
+        elif keys[0] in nullable:
+            bound = f"({keys[0]} <= ? OR {keys[0]} IS NULL)"
+        else:
+            bound = f"{keys[0]} <= ?"
+        condition = f"{bound} AND {condition}"
+        params.insert(0, values[0])
+    return condition, params
+
+def schedule_page_sql(sort_by, direction, filters="", keyset=""):
+    """One page of schedule rows, joined in the order the sort's index is walked"""
+    driver, keys = schedule_sort_keys(sort_by)
+    if driver == 'exams':
+        joins = """FROM exams e
+        CROSS JOIN duty_allocations da ON da.exam_id = e.exam_id
+        JOIN faculty f ON da.faculty_id = f.faculty_id"""
+    else:
+        joins = """FROM faculty f
+        CROSS JOIN duty_allocations da ON da.faculty_id = f.faculty_id
+        JOIN exams e ON da.exam_id = e.exam_id"""
+    key_columns = ", ".join(f"{key} as sort_key_{index}" for index, key in enumerate(keys))
+    order_by = ", ".join(f"{key} {direction}" for key in keys)
+    return f"""
         SELECT da.allocation_id, e.exam_id, e.date, e.session, e.exam_type, e.course_code, e.course_name, e.students_count,
                f.faculty_id, f.name as faculty_name, f.designation, f.department,
                fd.duties_assigned,
-               GROUP_CONCAT(DISTINCT h.hall_name) as hall_names,
-               SUM(h.capacity) as total_hall_capacity
-        FROM duty_allocations da
-        JOIN faculty f ON da.faculty_id = f.faculty_id
-        JOIN exams e ON da.exam_id = e.exam_id
+               {key_columns}
+        {joins}
         LEFT JOIN faculty_duties fd ON f.faculty_id = fd.faculty_id AND e.exam_id = fd.exam_id
-        LEFT JOIN exam_hall_allocations eha ON e.exam_id = eha.exam_id
-        LEFT JOIN halls h ON eha.hall_id = h.hall_id
-        WHERE 1=1
+        WHERE 1=1 {filters} {keyset}
+        ORDER BY {order_by}
+        LIMIT ?
     """
-    
+
+def schedule_count_sql(filters=""):
+    return f"""
+        SELECT COUNT(*) FROM duty_allocations da
+        JOIN exams e ON da.exam_id = e.exam_id
+        WHERE 1=1 {filters}
+    """
+
+def encode_schedule_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+def decode_schedule_cursor(cursor, length):
+    """Sort key values from a cursor, or None when it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+def build_schedule_filters(args):
+    """WHERE fragment and parameters for the schedule filters in request args"""
+    where = ""
     params = []
     
     # Add date range filter
-    if start_date:
-        base_query += " AND e.date >= ?"
-        params.append(start_date)
-    if end_date:
-        base_query += " AND e.date <= ?"
-        params.append(end_date)
+    if args.get('start_date'):
+        where += " AND e.date >= ?"
+        params.append(args['start_date'])
+    if args.get('end_date'):
+        where += " AND e.date <= ?"
+        params.append(args['end_date'])
     
     # Add exam type filter
-    if exam_type:
-        base_query += " AND e.exam_type = ?"
-        params.append(exam_type)
+    if args.get('exam_type'):
+        where += " AND e.exam_type = ?"
+        params.append(args['exam_type'])
     
     # Add session filter
-    if session_filter:
-        base_query += " AND e.session = ?"
-        params.append(session_filter)
+    if args.get('session'):
+        where += " AND e.session = ?"
+        params.append(args['session'])
     
-    # Add grouping
-    base_query += " GROUP BY da.allocation_id"
-    
-    # Add sorting with table prefixes to avoid ambiguity
-    sort_mapping = {
-        'date': 'e.date',
-        'session': 'e.session',
-        'exam_type': 'e.exam_type',
-        'faculty_name': 'f.name',
-        'department': 'f.department',
-        'designation': 'f.designation',
-        'course_code': 'e.course_code'
-    }
-    
-    # Get the actual column name with table prefix
-    actual_sort_column = sort_mapping.get(sort_by, 'e.date')
+    return where, params
+
+def get_exam_halls(conn, exam_ids):
+    """{exam_id: (hall_names, total_capacity)} computed once per exam"""
+    exam_ids = list(exam_ids)
+    if not exam_ids:
+        return {}
+    placeholders = ",".join("?" * len(exam_ids))
+    return {row['exam_id']: (row['hall_names'], row['total_hall_capacity']) for row in conn.execute(f"""
+        SELECT eha.exam_id, GROUP_CONCAT(h.hall_name) as hall_names, SUM(h.capacity) as total_hall_capacity
+        FROM exam_hall_allocations eha
+        JOIN halls h ON eha.hall_id = h.hall_id
+        WHERE eha.exam_id IN ({placeholders})
+        GROUP BY eha.exam_id
+    """, exam_ids)}
+
+@app.route("/schedule")
+@login_required
+@cached_page('exams', 'faculty', 'halls', 'duty_allocations', 'faculty_duties', 'exam_hall_allocations')
+def schedule():
+    # Get sorting, filtering and paging parameters
+    sort_by = request.args.get('sort_by', 'date')
+    sort_order = request.args.get('sort_order', 'asc')
+    page_size = min(max(request.args.get('page_size', 50, type=int), 10), 500)
+    after = request.args.get('after')
+    before = request.args.get('before')
     
     # Validate sort order
     if sort_order.upper() not in ['ASC', 'DESC']:
         sort_order = 'ASC'
+    ascending = sort_order.upper() == 'ASC'
     
-    base_query += f" ORDER BY {actual_sort_column} {sort_order.upper()}"
+    filters, params = build_schedule_filters(request.args)
     
     conn = get_db_connection()
-    schedule_data = conn.execute(base_query, params).fetchall()
+    
+    # Counting every matching duty is the dearest query here, so it is shared
+    # by all pages of the same filters until the tables change
+    total_count, _ = cached_count(conn, ('schedule', filters, tuple(params)), ('exams', 'duty_allocations'),
+                                  schedule_count_sql(filters), params)
+    
+    # Keyset pagination: the cursor holds the sort key values of the last
+    # (after) or first (before) row of the neighbouring page
+    _, keys = schedule_sort_keys(sort_by)
+    backwards = bool(before) and not after
+    values = decode_schedule_cursor(after or before, len(keys)) if (after or before) else None
+    keyset = ""
+    keyset_params = []
+    if values is not None:
+        condition, keyset_params = keyset_condition(keys, values, '>' if ascending != backwards else '<', SCHEDULE_NULLABLE_KEYS)
+        keyset = f" AND {condition}"
+    
+    direction = 'ASC' if ascending != backwards else 'DESC'
+    rows = conn.execute(schedule_page_sql(sort_by, direction, filters, keyset),
+                        [*params, *keyset_params, page_size + 1]).fetchall()
+    
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+    
+    exam_halls = get_exam_halls(conn, {row['exam_id'] for row in rows})
     conn.close()
     
-    return render_template("schedule.html", schedule=schedule_data)
+    schedule_data = []
+    for row in rows:
+        assignment = dict(row)
+        assignment['hall_names'], assignment['total_hall_capacity'] = exam_halls.get(row['exam_id'], (None, None))
+        schedule_data.append(assignment)
+    
+    def cursor_of(row):
+        return encode_schedule_cursor([row[f'sort_key_{index}'] for index in range(len(keys))])
+    
+    page_args = {key: value for key, value in request.args.items() if key not in ('after', 'before')}
+    next_cursor = prev_cursor = None
+    if schedule_data:
+        if has_more or backwards:
+            next_cursor = cursor_of(schedule_data[-1])
+        if after or (backwards and has_more):
+            prev_cursor = cursor_of(schedule_data[0])
+    
+    return render_template("schedule.html",
+                         schedule=schedule_data,
+                         total_count=total_count,
+                         page_size=page_size,
+                         page_args=page_args,
+                         next_cursor=next_cursor,
+                         prev_cursor=prev_cursor)
+
 @app.route("/upload_faculty", methods=["POST"])
 @login_required
+@invalidates('faculty')
 def upload_faculty():
     try:
         if 'file' not in request.files:
@@ -1122,54 +2710,131 @@ def upload_faculty():
             flash("Please upload a CSV file", "error")
             return redirect(url_for("faculty"))
         
-        # Read and validate CSV
-        stream = file.stream.read().decode("UTF8")
-        csv_data = csv.reader(stream.splitlines())
-        
-        conn = get_db_connection()
-        headers = next(csv_data, None)  # Skip header
-        
-        if not headers or len(headers) < 3:
-            flash("CSV file must have at least 3 columns: Name, Designation, Department", "error")
+        if request.form.get("background"):
+            return start_job('import_faculty', {'path': stage_upload(file)}, "faculty")
+
+        try:
+            imported_count, duplicate_count, report = import_faculty_csv(file.stream)
+        except ValueError as e:
+            flash(str(e), "error")
             return redirect(url_for("faculty"))
-        
-        success_count = 0
-        error_count = 0
-        
-        for row_num, row in enumerate(csv_data, start=2):
-            if len(row) >= 3:
-                name = sanitize_input(row[0])
-                designation = sanitize_input(row[1])
-                department = sanitize_input(row[2])
-                
-                if name and designation and department:
-                    try:
-                        total_duties = get_designation_duties(designation)
-                        conn.execute("""
-                            INSERT OR IGNORE INTO faculty (name, designation, department, total_duties, remaining_duties) 
-                            VALUES (?, ?, ?, ?, ?)
-                        """, (name, designation, department, total_duties, total_duties))
-                        success_count += 1
-                    except Exception as e:
-                        error_count += 1
-                        print(f"Error importing row {row_num}: {e}")
-                else:
-                    error_count += 1
-        
-        conn.commit()
-        conn.close()
-        
-        if success_count > 0:
-            flash(f"Faculty data uploaded successfully! {success_count} records imported.", "success")
-        if error_count > 0:
-            flash(f"{error_count} records failed to import. Please check the CSV format.", "warning")
-            
+
+        report.remember()
+        flash_messages(faculty_import_messages(imported_count, duplicate_count, report.count))
+
     except Exception as e:
         flash(f"Error uploading file: {str(e)}", "error")
     
     return redirect(url_for("faculty"))
+
+@app.route("/import_errors/<kind>/<token>")
+@login_required
+def download_import_errors(kind, token):
+    if kind not in ('faculty', 'exams') or not token.isalnum():
+        abort(404)
+    path = import_report_path(kind, token)
+    if not os.path.exists(path):
+        abort(404)
+    return send_file(path, mimetype="text/csv", as_attachment=True,
+                     download_name=f"{kind}_import_errors.csv")
+
+REPORT_SORT_COLUMNS = {
+    'name': 'f.name',
+    'department': 'f.department',
+    'designation': 'f.designation',
+    'duties_completed': 'duties_completed',
+    'utilization': '(f.total_duties - f.remaining_duties) * 100.0 / f.total_duties'
+}
+
+def archived_semester_report(conn, semester_id, date_from, date_to, department, exam_type, order_by):
+    """The /reports sections for a closed semester, read from the archive tables"""
+    date_filter = ""
+    date_params = []
+    if date_from:
+        date_filter += " AND e.date >= ?"
+        date_params.append(date_from)
+    if date_to:
+        date_filter += " AND e.date <= ?"
+        date_params.append(date_to)
+    
+    faculty_query = f"""
+        SELECT f.faculty_id, f.name, f.designation, f.department,
+               f.total_duties, f.remaining_duties,
+               (f.total_duties - f.remaining_duties) as duties_completed,
+               COALESCE(duties.exams_assigned, 0) as exams_assigned
+        FROM archived_faculty f
+        LEFT JOIN (
+            SELECT da.faculty_id, COUNT(DISTINCT da.exam_id) as exams_assigned
+            FROM archived_duty_allocations da
+            JOIN archived_exams e ON da.exam_id = e.exam_id
+            WHERE da.semester_id = ? {date_filter}
+            GROUP BY da.faculty_id
+        ) duties ON f.faculty_id = duties.faculty_id
+        WHERE f.semester_id = ?
+    """
+    faculty_params = [semester_id] + date_params + [semester_id]
+    if department:
+        faculty_query += " AND f.department = ?"
+        faculty_params.append(department)
+    faculty_query += f" ORDER BY {order_by}"
+    
+    exam_query = f"""
+        SELECT e.exam_id, e.exam_type, e.date, e.session, e.course_code,
+               e.course_name, e.students_count, e.invigilators_required,
+               (SELECT COUNT(DISTINCT da.faculty_id) FROM archived_duty_allocations da
+                WHERE da.exam_id = e.exam_id) as faculty_assigned,
+               (SELECT COUNT(*) FROM archived_exam_hall_allocations eha
+                WHERE eha.exam_id = e.exam_id) as halls_assigned,
+               (SELECT SUM(h.capacity) FROM archived_exam_hall_allocations eha
+                JOIN halls h ON eha.hall_id = h.hall_id
+                WHERE eha.exam_id = e.exam_id) as total_hall_capacity
+        FROM archived_exams e
+        WHERE e.semester_id = ? {date_filter}
+    """
+    exam_params = [semester_id] + date_params
+    if exam_type:
+        exam_query += " AND e.exam_type = ?"
+        exam_params.append(exam_type)
+    if department:
+        exam_query += """ AND EXISTS (SELECT 1 FROM archived_duty_allocations da2
+                          JOIN archived_faculty f ON f.semester_id = da2.semester_id AND f.faculty_id = da2.faculty_id
+                          WHERE da2.exam_id = e.exam_id AND f.department = ?)"""
+        exam_params.append(department)
+    exam_query += " ORDER BY e.date DESC, e.session"
+    
+    return {
+        'faculty_workload': conn.execute(faculty_query, faculty_params).fetchall(),
+        'exam_assignments': conn.execute(exam_query, exam_params).fetchall(),
+        'dept_stats': conn.execute("""
+            SELECT department, COUNT(*) as faculty_count,
+                   SUM(total_duties - remaining_duties) as completed_duties, SUM(total_duties) as total_duties,
+                   ROUND(AVG((total_duties - remaining_duties) * 100.0 / total_duties), 1) as avg_utilization
+            FROM archived_faculty
+            WHERE semester_id = ?
+            GROUP BY department
+            ORDER BY avg_utilization DESC
+        """, (semester_id,)).fetchall(),
+        'hall_stats': conn.execute("""
+            SELECT h.hall_name, h.capacity, COUNT(eha.exam_id) as total_exams, 0 as upcoming_exams
+            FROM halls h
+            LEFT JOIN archived_exam_hall_allocations eha ON h.hall_id = eha.hall_id AND eha.semester_id = ?
+            GROUP BY h.hall_id
+            ORDER BY h.capacity DESC
+        """, (semester_id,)).fetchall(),
+        'monthly_stats': conn.execute("""
+            SELECT strftime('%Y-%m', e.date) as month, COUNT(*) as exam_count,
+                   SUM((SELECT COUNT(*) FROM archived_duty_allocations da WHERE da.exam_id = e.exam_id)) as assignment_count,
+                   SUM(e.students_count) as total_students
+            FROM archived_exams e
+            WHERE e.semester_id = ?
+            GROUP BY month
+            ORDER BY month DESC
+        """, (semester_id,)).fetchall(),
+    }
+
 @app.route("/reports")
 @login_required
+@cached_page('exams', 'faculty', 'halls', 'duty_allocations', 'exam_hall_allocations', 'semesters')
 def reports():
     # Get filter parameters
     date_from = request.args.get('date_from', '')
@@ -1178,57 +2843,85 @@ def reports():
     exam_type = request.args.get('exam_type', '')
     sort_by = request.args.get('sort_by', 'name')
     sort_order = request.args.get('sort_order', 'asc')
+    semester_id = request.args.get('semester', type=int)
+    order_by = f"{REPORT_SORT_COLUMNS.get(sort_by, 'f.name')} {'DESC' if sort_order == 'desc' else 'ASC'}"
+    filters = {
+        'date_from': date_from,
+        'date_to': date_to,
+        'department': department,
+        'exam_type': exam_type,
+        'sort_by': sort_by,
+        'sort_order': sort_order,
+        'semester': semester_id
+    }
     
     conn = get_db_connection()
+    semesters = conn.execute("SELECT * FROM semesters ORDER BY cutoff_date DESC, semester_id DESC").fetchall()
+    
+    # Closed semesters are reported from the archive tables
+    semester = next((s for s in semesters if s['semester_id'] == semester_id), None)
+    if semester is not None:
+        sections = archived_semester_report(conn, semester_id, date_from, date_to, department, exam_type, order_by)
+        departments = conn.execute("""
+            SELECT DISTINCT department FROM archived_faculty WHERE semester_id = ? ORDER BY department
+        """, (semester_id,)).fetchall()
+        conn.close()
+        return render_template("reports.html", **sections, departments=departments,
+                               semesters=semesters, semester=semester, filters=filters)
     
     # Faculty Workload with filtering
-    faculty_query = """
-        SELECT f.faculty_id, f.name, f.designation, f.department,
-               f.total_duties, f.remaining_duties,
-               (f.total_duties - f.remaining_duties) as duties_completed,
-               COUNT(DISTINCT da.exam_id) as exams_assigned
-        FROM faculty f
-        LEFT JOIN duty_allocations da ON f.faculty_id = da.faculty_id
-        LEFT JOIN exams e ON da.exam_id = e.exam_id
-        WHERE 1=1
-    """
     faculty_params = []
-    
-    if date_from:
-        faculty_query += " AND (e.date >= ? OR e.date IS NULL)"
-        faculty_params.append(date_from)
-    if date_to:
-        faculty_query += " AND (e.date <= ? OR e.date IS NULL)"
-        faculty_params.append(date_to)
+    if date_from or date_to:
+        # Exams in the date range are counted per faculty first, so faculty
+        # with no duties in range still appear with zero
+        date_filter = ""
+        if date_from:
+            date_filter += " AND e.date >= ?"
+            faculty_params.append(date_from)
+        if date_to:
+            date_filter += " AND e.date <= ?"
+            faculty_params.append(date_to)
+        faculty_query = f"""
+            SELECT f.faculty_id, f.name, f.designation, f.department,
+                   f.total_duties, f.remaining_duties,
+                   (f.total_duties - f.remaining_duties) as duties_completed,
+                   COALESCE(duties.exams_assigned, 0) as exams_assigned
+            FROM faculty f
+            LEFT JOIN (
+                SELECT da.faculty_id, COUNT(DISTINCT da.exam_id) as exams_assigned
+                FROM duty_allocations da
+                JOIN exams e ON da.exam_id = e.exam_id
+                WHERE 1=1 {date_filter}
+                GROUP BY da.faculty_id
+            ) duties ON f.faculty_id = duties.faculty_id
+            WHERE 1=1
+        """
+    else:
+        # Unfiltered workload reads the per-faculty exam counts kept by triggers
+        faculty_query = """
+            SELECT f.faculty_id, f.name, f.designation, f.department,
+                   f.total_duties, f.remaining_duties,
+                   (f.total_duties - f.remaining_duties) as duties_completed,
+                   COALESCE(rfs.exams_assigned, 0) as exams_assigned
+            FROM faculty f
+            LEFT JOIN report_faculty_stats rfs ON f.faculty_id = rfs.faculty_id
+            WHERE 1=1
+        """
     if department:
         faculty_query += " AND f.department = ?"
         faculty_params.append(department)
     
-    faculty_query += " GROUP BY f.faculty_id"
-    
     # Add sorting
-    sort_columns = {
-        'name': 'f.name',
-        'department': 'f.department',
-        'designation': 'f.designation',
-        'duties_completed': 'duties_completed',
-        'utilization': '(f.total_duties - f.remaining_duties) * 100.0 / f.total_duties'
-    }
-    faculty_query += f" ORDER BY {sort_columns.get(sort_by, 'f.name')} {sort_order.upper()}"
+    faculty_query += f" ORDER BY {order_by}"
     
     faculty_workload = conn.execute(faculty_query, faculty_params).fetchall()
     
     # Exam Assignments with filtering
-    exam_query = """
+    exam_query = f"""
         SELECT e.exam_id, e.exam_type, e.date, e.session, e.course_code, 
                e.course_name, e.students_count, e.invigilators_required,
-               COUNT(DISTINCT da.faculty_id) as faculty_assigned,
-               COUNT(DISTINCT eha.hall_id) as halls_assigned,
-               SUM(h.capacity) as total_hall_capacity
+               {exam_rollup_columns('faculty_assigned', 'halls_assigned', 'total_hall_capacity')}
         FROM exams e
-        LEFT JOIN duty_allocations da ON e.exam_id = da.exam_id
-        LEFT JOIN exam_hall_allocations eha ON e.exam_id = eha.exam_id
-        LEFT JOIN halls h ON eha.hall_id = h.hall_id
         WHERE 1=1
     """
     exam_params = []
@@ -1247,43 +2940,35 @@ def reports():
         exam_query += " AND EXISTS (SELECT 1 FROM duty_allocations da2 JOIN faculty f ON da2.faculty_id = f.faculty_id WHERE da2.exam_id = e.exam_id AND f.department = ?)"
         exam_params.append(department)
     
-    exam_query += " GROUP BY e.exam_id ORDER BY e.date DESC, e.session"
+    exam_query += " ORDER BY e.date DESC, e.session"
     
     exam_assignments = conn.execute(exam_query, exam_params).fetchall()
     
-    # Department Statistics
+    # Department, hall and monthly statistics come from the summary tables
+    # in report_aggregates.py, so these read one row per group
     dept_stats = conn.execute("""
-        SELECT department, 
-               COUNT(*) as faculty_count,
-               SUM(total_duties - remaining_duties) as completed_duties,
-               SUM(total_duties) as total_duties,
-               ROUND(AVG((total_duties - remaining_duties) * 100.0 / total_duties), 1) as avg_utilization
-        FROM faculty 
-        GROUP BY department 
+        SELECT department, faculty_count, completed_duties, total_duties,
+               ROUND(utilization_sum / NULLIF(utilization_count, 0), 1) as avg_utilization
+        FROM report_department_stats
         ORDER BY avg_utilization DESC
     """).fetchall()
     
     # Hall Utilization Statistics
     hall_stats = conn.execute("""
         SELECT h.hall_name, h.capacity,
-               COUNT(DISTINCT eha.exam_id) as total_exams,
-               COUNT(DISTINCT CASE WHEN e.date >= date('now') THEN eha.exam_id END) as upcoming_exams
+               COALESCE(SUM(rhs.exam_count), 0) as total_exams,
+               COALESCE(SUM(CASE WHEN rhs.date >= date('now') THEN rhs.exam_count END), 0) as upcoming_exams
         FROM halls h
-        LEFT JOIN exam_hall_allocations eha ON h.hall_id = eha.hall_id
-        LEFT JOIN exams e ON eha.exam_id = e.exam_id
+        LEFT JOIN report_hall_stats rhs ON h.hall_id = rhs.hall_id
         GROUP BY h.hall_id
         ORDER BY h.capacity DESC
     """).fetchall()
     
     # Monthly Statistics
     monthly_stats = conn.execute("""
-        SELECT strftime('%Y-%m', date) as month,
-               COUNT(DISTINCT exam_id) as exam_count,
-               COUNT(*) as assignment_count,
-               SUM(students_count) as total_students
-        FROM exams 
-        WHERE date >= date('now', '-6 months')
-        GROUP BY month 
+        SELECT month, exam_count, assignment_count, total_students
+        FROM report_monthly_stats
+        WHERE month >= strftime('%Y-%m', date('now', '-6 months')) AND exam_count > 0
         ORDER BY month DESC
     """).fetchall()
     
@@ -1299,137 +2984,132 @@ def reports():
                          hall_stats=hall_stats,
                          monthly_stats=monthly_stats,
                          departments=departments,
-                         filters={
-                             'date_from': date_from,
-                             'date_to': date_to,
-                             'department': department,
-                             'exam_type': exam_type,
-                             'sort_by': sort_by,
-                             'sort_order': sort_order
-                         })
-@app.route("/export_schedule")
-@login_required
-def export_schedule():
-    conn = get_db_connection()
-    schedule_data = conn.execute("""
+                         semesters=semesters,
+                         semester=None,
+                         filters=filters)
+
+EXPORT_CHUNK_ROWS = 500
+
+def iter_schedule_csv(conn, filters, params):
+    """Yield the schedule export as CSV text, one chunk per EXPORT_CHUNK_ROWS rows"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Date', 'Session', 'Exam Type', 'Course Code', 'Course Name', 'Students Count',
+                     'Faculty', 'Designation', 'Department', 'Halls', 'Total Capacity', 'Duties Assigned'])
+
+    cursor = conn.execute(f"""
         SELECT e.date, e.session, e.exam_type, e.course_code, e.course_name, e.students_count,
                f.name as faculty_name, f.designation, f.department,
-               fd.duties_assigned,
-               GROUP_CONCAT(DISTINCT h.hall_name) as hall_names,
-               SUM(h.capacity) as total_hall_capacity
+               e.exam_id, fd.duties_assigned
         FROM duty_allocations da
         JOIN faculty f ON da.faculty_id = f.faculty_id
         JOIN exams e ON da.exam_id = e.exam_id
         LEFT JOIN faculty_duties fd ON f.faculty_id = fd.faculty_id AND e.exam_id = fd.exam_id
-        LEFT JOIN exam_hall_allocations eha ON e.exam_id = eha.exam_id
-        LEFT JOIN halls h ON eha.hall_id = h.hall_id
-        GROUP BY da.allocation_id
+        WHERE 1=1 {filters}
         ORDER BY e.date, e.session, f.department
-    """).fetchall()
-    
-    conn.close()
-    
-    def generate():
-        data = []
-        data.append(['Date', 'Session', 'Exam Type', 'Course Code', 'Course Name', 'Students Count',
-                    'Faculty', 'Designation', 'Department', 'Halls', 'Total Capacity', 'Duties Assigned'])
-        
-        for row in schedule_data:
-            data.append([
+    """, params)
+
+    while True:
+        rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+        if not rows:
+            break
+        # Hall names only for the exams on this chunk, not the whole table
+        exam_halls = get_exam_halls(conn, {row['exam_id'] for row in rows})
+        for row in rows:
+            hall_names, total_hall_capacity = exam_halls.get(row['exam_id'], (None, None))
+            writer.writerow([
                 row['date'], row['session'], row['exam_type'], row['course_code'],
-                row['course_name'], row['students_count'], row['faculty_name'], 
-                row['designation'], row['department'], row['hall_names'] or 'Not assigned',
-                row['total_hall_capacity'] or 0,
+                row['course_name'], row['students_count'], row['faculty_name'],
+                row['designation'], row['department'], hall_names or 'Not assigned',
+                total_hall_capacity or 0,
                 row['duties_assigned'] or 1
             ])
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerows(data)
+        yield output.getvalue()
         output.seek(0)
-        
+        output.truncate(0)
+
+    if output.tell():
         yield output.getvalue()
+    cursor.close()
+
+@app.route("/export_schedule")
+@login_required
+def export_schedule():
+    if request.args.get("background"):
+        return start_job('export_schedule', {'filters': request.args.to_dict()}, "schedule")
+
+    # Same filters as /schedule; rows are streamed straight from the cursor
+    filters, params = build_schedule_filters(request.args)
+    use_gzip = request.accept_encodings['gzip'] > 0 and request.args.get('gzip') != '0'
+    
+    def generate():
+        chunks = iter_schedule_csv(get_db_connection(), filters, params)
+        if not use_gzip:
+            yield from chunks
+            return
+
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk.encode('utf-8'))
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+    
+    headers = {"Content-Disposition": "attachment;filename=invigilation_schedule.csv", "Vary": "Accept-Encoding"}
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
     
     return Response(
-        generate(),
+        stream_with_context(generate()),
         mimetype="text/csv",
-        headers={"Content-Disposition": "attachment;filename=invigilation_schedule.csv"}
+        headers=headers
     )
+
 @app.route("/delete_exam/<int:exam_id>")
 @login_required
+@invalidates('exams', 'duty_allocations', 'faculty_duties', 'exam_hall_allocations', 'faculty')
 def delete_exam(exam_id):
     try:
         conn = get_db_connection()
         
         # Get exam details before deleting
-        exam = conn.execute("""
-            SELECT e.*, 
-                   COUNT(DISTINCT da.faculty_id) as faculty_count,
-                   COUNT(DISTINCT eha.hall_id) as hall_count
+        exam = conn.execute(f"""
+            SELECT e.*, {exam_rollup_columns('faculty_count', 'hall_count', 'hall_capacity')}
             FROM exams e
-            LEFT JOIN duty_allocations da ON e.exam_id = da.exam_id
-            LEFT JOIN exam_hall_allocations eha ON e.exam_id = eha.exam_id
             WHERE e.exam_id = ?
-            GROUP BY e.exam_id
         """, (exam_id,)).fetchone()
         
         if not exam:
             flash("Exam not found!", "error")
             return redirect(url_for("schedule"))
         
-        # Get all faculty assignments for this exam to restore duties
-        faculty_assignments = conn.execute("""
-            SELECT da.faculty_id, f.name, fd.duties_assigned, e.exam_type
-            FROM duty_allocations da
-            JOIN faculty f ON da.faculty_id = f.faculty_id
-            JOIN exams e ON da.exam_id = e.exam_id
-            LEFT JOIN faculty_duties fd ON f.faculty_id = fd.faculty_id AND e.exam_id = fd.exam_id
-            WHERE da.exam_id = ?
-        """, (exam_id,)).fetchall()
-        
-        # Restore duties for all assigned faculty
-        for assignment in faculty_assignments:
-            duty_requirement = get_duty_requirement(assignment['exam_type'])
-            duties_to_restore = assignment['duties_assigned'] or duty_requirement
-            
-            conn.execute("""
-                UPDATE faculty 
-                SET remaining_duties = remaining_duties + ? 
-                WHERE faculty_id = ?
-            """, (duties_to_restore, assignment['faculty_id']))
-        
-        # Delete all related records in correct order (to maintain referential integrity)
-        
-        # 1. Delete faculty duties records
-        conn.execute("DELETE FROM faculty_duties WHERE exam_id = ?", (exam_id,))
-        
-        # 2. Delete duty allocations
-        conn.execute("DELETE FROM duty_allocations WHERE exam_id = ?", (exam_id,))
-        
-        # 3. Delete hall allocations
-        conn.execute("DELETE FROM exam_hall_allocations WHERE exam_id = ?", (exam_id,))
-        
-        # 4. Finally delete the exam itself
+        # Give the invigilators their duties back; the foreign keys cascade the allocations away
+        conn.execute("BEGIN IMMEDIATE")
+        released = release_duties(conn, "da.exam_id = ?", (exam_id,))
         conn.execute("DELETE FROM exams WHERE exam_id = ?", (exam_id,))
-        
         conn.commit()
         conn.close()
         
+        unmark_busy_slots(released)
+        
         flash(f"Exam deleted successfully! Removed {exam['faculty_count']} faculty assignments and {exam['hall_count']} hall allocations.", "success")
         return redirect(url_for("schedule"))
         
     except Exception as e:
         flash(f"Error deleting exam: {str(e)}", "error")
         return redirect(url_for("schedule"))
+
 @app.route("/delete_assignment/<int:allocation_id>")
 @login_required
+@invalidates('duty_allocations', 'faculty_duties', 'faculty')
 def delete_assignment(allocation_id):
     try:
         conn = get_db_connection()
         
         # Get assignment details before deleting
-        assignment = conn.execute("""
-            SELECT da.*, e.exam_type, f.name as faculty_name, fd.duties_assigned
+        assignment = conn.execute(f"""
+            SELECT da.*, f.name as faculty_name,
+                   COALESCE(fd.duties_assigned, {duty_requirement_sql('e.exam_type')}) as duties_to_restore
             FROM duty_allocations da
             JOIN exams e ON da.exam_id = e.exam_id
             JOIN faculty f ON da.faculty_id = f.faculty_id
@@ -1441,109 +3121,568 @@ def delete_assignment(allocation_id):
             flash("Assignment not found!", "error")
             return redirect(url_for("schedule"))
         
-        # Get duty requirement for this exam type
-        duty_requirement = get_duty_requirement(assignment['exam_type'])
-        duties_to_restore = assignment['duties_assigned'] or duty_requirement
-        
-        # Delete from duty_allocations
-        conn.execute("DELETE FROM duty_allocations WHERE allocation_id = ?", (allocation_id,))
-        
-        # Delete from faculty_duties
+        conn.execute("BEGIN IMMEDIATE")
+        released = release_duties(conn, "da.allocation_id = ?", (allocation_id,))
         conn.execute("""
             DELETE FROM faculty_duties 
             WHERE faculty_id = ? AND exam_id = ?
         """, (assignment['faculty_id'], assignment['exam_id']))
-        
-        # Restore faculty duties
-        conn.execute("""
-            UPDATE faculty 
-            SET remaining_duties = remaining_duties + ? 
-            WHERE faculty_id = ?
-        """, (duties_to_restore, assignment['faculty_id']))
-        
+        conn.execute("DELETE FROM duty_allocations WHERE allocation_id = ?", (allocation_id,))
         conn.commit()
         conn.close()
         
-        flash(f"Assignment removed successfully! {duties_to_restore} duty/duties restored to {assignment['faculty_name']}.", "success")
+        unmark_busy_slots(released)
+        
+        flash(f"Assignment removed successfully! {assignment['duties_to_restore']} duty/duties restored to {assignment['faculty_name']}.", "success")
         return redirect(url_for("schedule"))
         
     except Exception as e:
         flash(f"Error deleting assignment: {str(e)}", "error")
         return redirect(url_for("schedule"))
+
+@app.route("/bulk_remove_exams", methods=["POST"])
+@login_required
+@invalidates('exams', 'duty_allocations', 'faculty_duties', 'exam_hall_allocations', 'faculty')
+def bulk_remove_exams():
+    """Delete, or only unassign, every exam in a date range and/or of one exam type, in one transaction"""
+    start_date = request.form.get("start_date") or None
+    end_date = request.form.get("end_date") or None
+    exam_type = request.form.get("exam_type") or None
+    action = request.form.get("action", "unassign")
+    
+    if not (start_date or end_date or exam_type):
+        flash("Choose a date range or an exam type to remove.", "error")
+        return redirect(url_for("exams"))
+    if action not in ('delete', 'unassign'):
+        flash("Unknown bulk action.", "error")
+        return redirect(url_for("exams"))
+    
+    filters = ""
+    params = []
+    if start_date:
+        filters += " AND date >= ?"
+        params.append(start_date)
+    if end_date:
+        filters += " AND date <= ?"
+        params.append(end_date)
+    if exam_type:
+        filters += " AND exam_type = ?"
+        params.append(exam_type)
+    selected = f"SELECT exam_id FROM exams WHERE 1=1 {filters}"
+    
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        exam_count = conn.execute(f"SELECT COUNT(*) FROM ({selected})", params).fetchone()[0]
+        released = release_duties(conn, f"da.exam_id IN ({selected})", params)
+        if action == 'delete':
+            hall_count = conn.execute(f"SELECT COUNT(*) FROM exam_hall_allocations WHERE exam_id IN ({selected})", params).fetchone()[0]
+            conn.execute(f"DELETE FROM exams WHERE exam_id IN ({selected})", params)
+        else:
+            conn.execute(f"DELETE FROM faculty_duties WHERE exam_id IN ({selected})", params)
+            conn.execute(f"DELETE FROM duty_allocations WHERE exam_id IN ({selected})", params)
+            hall_count = conn.execute(f"DELETE FROM exam_hall_allocations WHERE exam_id IN ({selected})", params).rowcount
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        flash(f"Error removing exams: {str(e)}", "error")
+        return redirect(url_for("exams"))
+    finally:
+        conn.close()
+    
+    unmark_busy_slots(released)
+    
+    if action == 'delete':
+        flash(f"Deleted {exam_count} exam(s) with {len(released)} invigilator assignments and {hall_count} hall allocations.", "success")
+    else:
+        flash(f"Cleared {len(released)} invigilator assignments and {hall_count} hall allocations from {exam_count} exam(s); duties restored.", "success")
+    return redirect(url_for("exams"))
+
+@app.route("/jobs")
+@login_required
+def jobs():
+    recent_jobs = job_runner.recent(limit=50)
+    conn = get_db_connection()
+    usernames = {row['user_id']: row['username'] for row in conn.execute("SELECT user_id, username FROM users")}
+    conn.close()
+    return render_template("jobs.html", jobs=recent_jobs, titles=JOB_TITLES, usernames=usernames,
+                           stats=job_runner.stats(),
+                           refresh=any(job['status'] in ACTIVE_STATUSES for job in recent_jobs))
+
+@app.route("/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'error': "Unknown job"}), 404
+    return jsonify(job)
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+@login_required
+def cancel_job(job_id):
+    cancelled = job_runner.cancel(job_id)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'cancelled': cancelled}), 202 if cancelled else 409
+    if cancelled:
+        flash("Cancellation requested. Any changes the job made will be rolled back.", "info")
+    else:
+        flash("That job has already finished.", "error")
+    return redirect(url_for('jobs'))
+
+@app.route("/jobs/<job_id>/download")
+@login_required
+def download_job_file(job_id):
+    job = job_runner.get(job_id)
+    download = job and job['result'] and job['result'].get('download')
+    if not download:
+        abort(404)
+    path = import_report_path(download['kind'], download['token'])
+    if not os.path.exists(path):
+        abort(404)
+    return send_file(path, mimetype="text/csv", as_attachment=True, download_name=download['name'])
+
+@app.route("/backups", methods=["GET", "POST"])
+@login_required
+def backups():
+    if request.method == "POST":
+        return start_job('backup_database', {}, "backups")
+    backup_jobs = [job for job in job_runner.recent(limit=50) if job['kind'] == 'backup_database'][:10]
+    return render_template("backups.html", snapshots=list_snapshots(DB_NAME, app.config['BACKUP_DIR']),
+                           jobs=backup_jobs, backup_dir=app.config['BACKUP_DIR'],
+                           keep=app.config['BACKUP_KEEP'], interval=app.config['BACKUP_INTERVAL_HOURS'],
+                           refresh=any(job['status'] in ACTIVE_STATUSES for job in backup_jobs))
+
+@app.route("/check_busy_slots")
+@login_required
+def check_busy_slots():
+    try:
+        mismatches = check_busy_slot_index(repair=True)
+        if mismatches:
+            details = "; ".join(f"{date} {session} faculty #{faculty_id}: db={expected}, index={indexed}"
+                                for date, session, faculty_id, expected, indexed in mismatches[:10])
+            flash(f"Busy slot index was out of sync in {len(mismatches)} place(s) and has been rebuilt. {details}", "warning")
+        else:
+            flash("Busy slot index matches the database.", "success")
+    except Exception as e:
+        flash(f"Error checking busy slot index: {str(e)}", "error")
+    return redirect(url_for("index"))
+
+@app.route("/check_report_aggregates")
+@login_required
+def check_report_aggregates_route():
+    try:
+        conn = get_db_connection()
+        drift = check_report_aggregates(conn)
+        if drift:
+            conn.execute("BEGIN IMMEDIATE")
+            rebuild_report_aggregates(conn)
+            conn.commit()
+            details = "; ".join(f"{table} {key}: expected={expected}, stored={stored}"
+                                for table, key, expected, stored in drift[:10])
+            flash(f"Report aggregates had drifted in {len(drift)} group(s) and have been rebuilt. {details}", "warning")
+        else:
+            flash("Report aggregates match the database.", "success")
+        conn.close()
+    except Exception as e:
+        flash(f"Error checking report aggregates: {str(e)}", "error")
+    return redirect(url_for("reports"))
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus scrape endpoint; needs METRICS_TOKEN as a bearer token or a logged-in session"""
+    token = app.config['METRICS_TOKEN']
+    scraper = bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}")
+    if not scraper and 'user_id' not in session:
+        return Response("Unauthorized\n", status=401, mimetype="text/plain")
+
+    pool = get_pool_stats()
+    cache = response_cache.snapshot()
+    text = "\n".join([
+        request_metrics.render(),
+        format_metric("invigilation_db_pool_connections", "gauge", "Pooled SQLite connections by state.",
+                      [({'state': 'in_use'}, pool['in_use']), ({'state': 'idle'}, pool['idle'])]),
+        format_metric("invigilation_db_pool_events_total", "counter", "Connections opened, reused, released and discarded by the pool.",
+                      [({'event': event}, pool[event]) for event in ('opened', 'reused', 'released', 'discarded')]),
+        format_metric("invigilation_response_cache_events_total", "counter", "Response cache lookups and stores.",
+                      [({'event': event}, cache[event]) for event in ('hits', 'misses', 'not_modified', 'bypassed', 'stored', 'evicted')]),
+        format_metric("invigilation_response_cache_bytes", "gauge", "Bytes held by the response cache.", [({}, cache['bytes'])]),
+        format_metric("invigilation_jobs_active", "gauge", "Background jobs queued or running.", [({}, job_runner.stats()['active'])]),
+    ])
+    return Response(text + "\n", mimetype="text/plain; version=0.0.4")
+
+@app.route("/db_stats")
+@login_required
+def db_stats():
+    return jsonify(get_pool_stats())
+
+@app.route("/cache_stats")
+@login_required
+def cache_stats():
+    with _table_versions_lock:
+        versions = dict(_table_versions)
+    return jsonify(dict(response_cache.snapshot(), table_versions=versions))
+
+# ---------- DATABASE BROWSER ----------
+# Debug view of every table. Rows are streamed a page at a time with keyset
+# pagination on rowid, so no table is ever read in full, and row counts come
+# from cached_count() (see RESPONSE CACHE).
+BROWSER_PAGE_SIZE = 50
+BROWSER_MAX_PAGE_SIZE = 500
+BROWSER_CELL_WIDTH = 40
+
+def cached_row_count(conn, table):
+    """(row count, seconds since it was counted) for table, counting again only when stale"""
+    return cached_count(conn, ('table', table), (table,), f'SELECT COUNT(*) FROM "{table}"')
+
+def browser_cell(value):
+    if value is None:
+        return '<span class="text-muted">NULL</span>'
+    if isinstance(value, bytes):
+        return f'<span class="text-muted">&lt;{len(value)} bytes&gt;</span>'
+    text = str(value)
+    if len(text) > BROWSER_CELL_WIDTH:
+        return f'<span title="{escape(text)}">{escape(text[:BROWSER_CELL_WIDTH - 3])}...</span>'
+    return str(escape(text))
+
+def iter_table_page(conn, table, after, limit):
+    """HTML for one page of table after rowid `after`, a batch of rows per chunk"""
+    columns = [col['name'] for col in conn.execute(f'PRAGMA table_info("{table}")')]
+    count, age = cached_row_count(conn, table)
+    link = url_for('database_simple', table=table)
+    yield (f'<h2><a href="{link}">{escape(table)}</a></h2>'
+           f'<p class="text-muted">{count} rows (counted {int(age)}s ago) &middot; columns: {escape(", ".join(columns))}</p>'
+           '<table class="table table-sm table-bordered"><thead><tr>'
+           + "".join(f"<th>{escape(col)}</th>" for col in columns) + "</tr></thead><tbody>")
+
+    cursor = conn.execute(f'SELECT rowid AS "__rowid", * FROM "{table}" WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                          (after, limit + 1))
+    shown = 0
+    last = None
+    while shown < limit:
+        rows = cursor.fetchmany(min(100, limit - shown))
+        if not rows:
+            break
+        shown += len(rows)
+        last = rows[-1]['__rowid']
+        yield "".join("<tr>" + "".join(f"<td>{browser_cell(row[col])}</td>" for col in columns) + "</tr>"
+                      for row in rows)
+    more = cursor.fetchone() is not None
+    cursor.close()
+
+    if not shown:
+        yield f'<tr><td colspan="{len(columns)}" class="text-muted">No rows</td></tr>'
+    yield "</tbody></table><p>"
+    if after:
+        yield f'<a href="{link}&limit={limit}">First page</a> '
+    if more:
+        yield f'<a href="{link}&after={last}&limit={limit}">Next {limit} rows</a>'
+    yield "</p>"
+
 @app.route("/database-simple")
 @login_required
 def database_simple():
-    """Simple text-based database display for debugging"""
+    """Streamed debug view of the database: every table's first page, or ?table= paged with ?after=<rowid>"""
     conn = get_db_connection()
-    
-    # Get all table names
-    tables = conn.execute("""
-        SELECT name FROM sqlite_master 
-        WHERE type='table' 
+    tables = [row['name'] for row in conn.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND sql NOT LIKE '%WITHOUT ROWID%'
         ORDER BY name
-    """).fetchall()
+    """)]
+    selected = request.args.get('table')
+    if selected is not None and selected not in tables:
+        abort(404)
+    after = max(request.args.get('after', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', BROWSER_PAGE_SIZE, type=int), 1), BROWSER_MAX_PAGE_SIZE)
+
+    index = " &middot; ".join(f'<a href="{url_for("database_simple", table=name)}">{escape(name)}</a>' for name in tables)
+
+    def generate():
+        yield f"""<!DOCTYPE html>
+<html><head><title>Database View</title>
+<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet"></head>
+<body>
+<nav style="background: #343a40; padding: 10px; margin-bottom: 20px;">
+    <a href="/" style="color: white; text-decoration: none; margin-right: 15px;">Dashboard</a>
+    <a href="/database-simple" style="color: white; text-decoration: none; margin-right: 15px;">Database View</a>
+    <a href="/logout" style="color: white; text-decoration: none;">Logout</a>
+</nav>
+<div class="container-fluid small">
+<h1>Database Tables - Invigilation System</h1>
+<p>{index}</p>
+"""
+        for table in [selected] if selected else tables:
+            yield f'<section id="{escape(table)}">'
+            try:
+                yield from iter_table_page(conn, table, after if selected else 0, limit)
+            except sqlite3.Error as e:
+                yield f'<p class="text-danger">Error reading table: {escape(str(e))}</p>'
+            yield "</section><hr>"
+        yield "</div></body></html>"
+
+    return Response(stream_with_context(generate()), mimetype="text/html")
+
+
+# ---------- JSON API ----------
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+# since= is inclusive and starts this far back, so rows written by a
+# transaction that was still open when the previous sync ran are not missed
+API_SYNC_OVERLAP = '-30 seconds'
+API_SINCE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d+)?)?Z?)?$')
+
+API_RESOURCES = {
+    'exams': {
+        'table': 'exams',
+        'from': "exams e",
+        'key': 'e.exam_id',
+        'updated_at': 'e.updated_at',
+        'columns': {
+            'exam_id': 'e.exam_id',
+            'exam_type': 'e.exam_type',
+            'date': 'e.date',
+            'session': 'e.session',
+            'course_code': 'e.course_code',
+            'course_name': 'e.course_name',
+            'students_count': 'e.students_count',
+            'invigilators_required': 'e.invigilators_required',
+            'assigned_invigilators': EXAM_ROLLUPS['invigilators'],
+            'assigned_halls': EXAM_ROLLUPS['halls'],
+            'total_hall_capacity': EXAM_ROLLUPS['capacity'],
+            'updated_at': 'e.updated_at',
+        },
+        'filters': {
+            'start_date': 'e.date >= ?',
+            'end_date': 'e.date <= ?',
+            'session': 'e.session = ?',
+            'exam_type': 'e.exam_type = ?',
+        },
+    },
+    'allocations': {
+        'table': 'duty_allocations',
+        'from': """duty_allocations da
+                   JOIN exams e ON da.exam_id = e.exam_id
+                   JOIN faculty f ON da.faculty_id = f.faculty_id""",
+        'key': 'da.allocation_id',
+        'updated_at': 'da.updated_at',
+        'columns': {
+            'allocation_id': 'da.allocation_id',
+            'exam_id': 'da.exam_id',
+            'date': 'da.date',
+            'session': 'da.session',
+            'exam_type': 'e.exam_type',
+            'course_code': 'e.course_code',
+            'faculty_id': 'da.faculty_id',
+            'faculty_name': 'f.name',
+            'designation': 'f.designation',
+            'department': 'f.department',
+            'updated_at': 'da.updated_at',
+        },
+        'filters': {
+            'start_date': 'da.date >= ?',
+            'end_date': 'da.date <= ?',
+            'session': 'da.session = ?',
+            'exam_id': 'da.exam_id = ?',
+            'faculty_id': 'da.faculty_id = ?',
+            'department': 'f.department = ?',
+        },
+    },
+    'hall_allocations': {
+        'table': 'exam_hall_allocations',
+        'from': """exam_hall_allocations eha
+                   JOIN exams e ON eha.exam_id = e.exam_id
+                   JOIN halls h ON eha.hall_id = h.hall_id""",
+        'key': 'eha.allocation_id',
+        'updated_at': 'eha.updated_at',
+        'columns': {
+            'allocation_id': 'eha.allocation_id',
+            'exam_id': 'eha.exam_id',
+            'date': 'e.date',
+            'session': 'e.session',
+            'hall_id': 'eha.hall_id',
+            'hall_name': 'h.hall_name',
+            'capacity': 'h.capacity',
+            'updated_at': 'eha.updated_at',
+        },
+        'filters': {
+            'start_date': 'e.date >= ?',
+            'end_date': 'e.date <= ?',
+            'session': 'e.session = ?',
+            'exam_id': 'eha.exam_id = ?',
+            'hall_id': 'eha.hall_id = ?',
+        },
+    },
+    'halls': {
+        'table': 'halls',
+        'from': "halls h",
+        'key': 'h.hall_id',
+        'updated_at': 'h.updated_at',
+        'columns': {
+            'hall_id': 'h.hall_id',
+            'hall_name': 'h.hall_name',
+            'capacity': 'h.capacity',
+            'is_available': 'h.is_available',
+            'updated_at': 'h.updated_at',
+        },
+        'filters': {
+            'is_available': 'h.is_available = ?',
+        },
+    },
+    'faculty': {
+        'table': 'faculty',
+        'from': """faculty f
+                   LEFT JOIN report_faculty_stats rfs ON f.faculty_id = rfs.faculty_id""",
+        'key': 'f.faculty_id',
+        'updated_at': 'f.updated_at',
+        'columns': {
+            'faculty_id': 'f.faculty_id',
+            'name': 'f.name',
+            'designation': 'f.designation',
+            'department': 'f.department',
+            'is_available': 'f.is_available',
+            'total_duties': 'f.total_duties',
+            'remaining_duties': 'f.remaining_duties',
+            'duties_completed': '(f.total_duties - f.remaining_duties)',
+            'exams_assigned': 'COALESCE(rfs.exams_assigned, 0)',
+            'updated_at': 'f.updated_at',
+        },
+        'filters': {
+            'department': 'f.department = ?',
+            'designation': 'f.designation = ?',
+            'is_available': 'f.is_available = ?',
+        },
+    },
+}
+
+def api_error(message, status=400):
+    return jsonify({'error': message}), status
+
+def api_login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return api_error("Authentication required", 401)
+        return f(*args, **kwargs)
+    return decorated_function
+
+def encode_api_cursor(key, deleted_key, sync_from):
+    return base64.urlsafe_b64encode(f"{key}|{deleted_key}|{sync_from}".encode()).decode().rstrip("=")
+
+def decode_api_cursor(cursor):
+    """(last key, last tombstone, sync_from) from a cursor; raises ValueError when it is malformed"""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    key, deleted_key, sync_from = raw.split("|", 2)
+    return int(key), int(deleted_key), sync_from
+
+@app.route("/api/v1")
+@api_login_required
+def api_index():
+    return jsonify({
+        'version': 1,
+        'resources': {name: {'fields': list(spec['columns']), 'filters': list(spec['filters'])}
+                      for name, spec in API_RESOURCES.items()},
+        'parameters': ['fields', 'limit', 'cursor', 'since'],
+    })
+
+@app.route("/api/v1/<resource>")
+@api_login_required
+def api_list(resource):
+    """Keyset-paginated rows of one resource.
+    
+    fields= picks columns, cursor= continues from next_cursor, and since=
+    (normally the next_since of a previous sync) returns only rows changed
+    since then together with the ids deleted since then. Deleted ids are
+    paged alongside the rows, up to limit of each per page.
+    """
+    spec = API_RESOURCES.get(resource)
+    if spec is None:
+        return api_error(f"Unknown resource '{resource}'", 404)
     
-    # Start building the output
-    output = "<pre style='font-family: monospace; font-size: 14px; background: #f8f9fa; padding: 20px;'>"
-    output += "DATABASE TABLES - INVIGILATION SYSTEM\n"
-    output += "=======================================\n\n"
+    limit = min(max(request.args.get('limit', API_PAGE_SIZE, type=int), 1), API_MAX_PAGE_SIZE)
+    fields = [name for name in request.args.get('fields', '').split(',') if name] or list(spec['columns'])
+    unknown = [name for name in fields if name not in spec['columns']]
+    if unknown:
+        return api_error(f"Unknown field(s): {', '.join(unknown)}")
     
-    for table in tables:
-        table_name = table['name']
-        output += f"TABLE: {table_name}\n"
-        output += "-" * (len(table_name) + 7) + "\n"
-        
+    since = request.args.get('since', '')
+    if since and not API_SINCE_PATTERN.match(since):
+        return api_error("since must be an ISO timestamp such as a previous next_since")
+    
+    conn = get_db_connection()
+    after_key = None
+    after_deleted = 0
+    cursor = request.args.get('cursor')
+    if cursor:
         try:
-            # Get column information
-            columns = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
-            column_names = [col['name'] for col in columns]
-            output += f"Columns: {', '.join(column_names)}\n"
-            
-            # Get the data
-            data = conn.execute(f"SELECT * FROM {table_name}").fetchall()
-            output += f"Total rows: {len(data)}\n\n"
-            
-            # Display the data
-            if data:
-                # Show column headers
-                output += "| " + " | ".join(f"{col:15}" for col in column_names) + " |\n"
-                output += "|" + "|".join(["-" * 17] * len(column_names)) + "|\n"
-                
-                # Show each row
-                for row in data:
-                    row_values = []
-                    for col in column_names:
-                        value = row[col]
-                        if value is None:
-                            display_value = "NULL"
-                        else:
-                            display_value = str(value)
-                        # Truncate long values for display
-                        if len(display_value) > 15:
-                            display_value = display_value[:12] + "..."
-                        row_values.append(f"{display_value:15}")
-                    output += "| " + " | ".join(row_values) + " |\n"
-            else:
-                output += "No data in this table\n"
-            
-        except sqlite3.Error as e:
-            output += f"ERROR reading table: {str(e)}\n"
-        
-        output += "\n" + "="*50 + "\n\n"
+            after_key, after_deleted, sync_from = decode_api_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return api_error("Invalid cursor")
+    else:
+        # Taken before reading so anything written during the sync is fetched again next time
+        sync_from = conn.execute(f"SELECT strftime('%Y-%m-%dT%H:%M:%fZ', 'now', '{API_SYNC_OVERLAP}')").fetchone()[0]
     
+    where = ""
+    params = []
+    for name, condition in spec['filters'].items():
+        if request.args.get(name):
+            where += f" AND {condition}"
+            params.append(request.args[name])
+    if since:
+        where += f" AND {spec['updated_at']} >= ?"
+        params.append(since)
+    if after_key is not None:
+        where += f" AND {spec['key']} > ?"
+        params.append(after_key)
+    
+    columns = ", ".join(f"{spec['columns'][name]} as {name}" for name in fields)
+    rows = conn.execute(f"""
+        SELECT {spec['key']} as _key, {columns}
+        FROM {spec['from']}
+        WHERE 1=1 {where}
+        ORDER BY {spec['key']}
+        LIMIT ?
+    """, (*params, limit + 1)).fetchall()
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    # Tombstones follow their own position in the cursor, in insertion order
+    tombstones = []
+    if since:
+        tombstones = conn.execute("""
+            SELECT rowid, row_id FROM deleted_rows
+            WHERE table_name = ? AND deleted_at >= ? AND rowid > ?
+            ORDER BY rowid
+            LIMIT ?
+        """, (spec['table'], since, after_deleted, limit + 1)).fetchall()
+        has_more = has_more or len(tombstones) > limit
+        tombstones = tombstones[:limit]
+    
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_api_cursor(rows[-1]['_key'] if rows else after_key or 0,
+                                        tombstones[-1]['rowid'] if tombstones else after_deleted, sync_from)
+    payload = {
+        'data': [{name: row[name] for name in fields} for row in rows],
+        'next_cursor': next_cursor,
+        'next_since': sync_from,
+    }
+    if since:
+        payload['deleted'] = [row['row_id'] for row in tombstones]
+    
+    latest_change = conn.execute(f"""
+        SELECT MAX(COALESCE((SELECT MAX(updated_at) FROM {spec['table']}), ''),
+                   COALESCE((SELECT MAX(deleted_at) FROM deleted_rows WHERE table_name = ?), ''))
+    """, (spec['table'],)).fetchone()[0]
     conn.close()
-    output += "</pre>"
-    
-    # Add a navigation header
-    nav_header = """
-    <nav style="background: #343a40; padding: 10px; margin-bottom: 20px;">
-        <a href="/" style="color: white; text-decoration: none; margin-right: 15px;">Dashboard</a>
-        <a href="/database-simple" style="color: white; text-decoration: none; margin-right: 15px;">Database View</a>
-        <a href="/logout" style="color: white; text-decoration: none;">Logout</a>
-    </nav>
-    """
     
-    return nav_header + output
+    # next_since moves with the clock, so the ETag covers only the rows themselves.
+    # There is no Last-Modified: HTTP dates stop at whole seconds, and a write
+    # later in the same second would be answered with a wrong 304.
+    response = jsonify(payload)
+    fingerprint = json.dumps([payload['data'], payload.get('deleted'), has_more, latest_change], sort_keys=True, default=str)
+    response.set_etag(hashlib.sha1(fingerprint.encode()).hexdigest())
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,522 @@
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from flask import g, request_finished
+
+from hall_packing import pack_halls, greedy_pack_halls
+from migrations import migrate
+
+# Hall inventories modelled on real campuses: many classrooms, a few labs,
+# seminar halls and one or two auditoriums.
+HALL_PROFILES = {
+    'small college': [(30, 6), (40, 4), (60, 6), (80, 2), (120, 1), (200, 1)],
+    'engineering campus': [(40, 12), (60, 20), (72, 8), (80, 10), (120, 4), (150, 2), (240, 1)],
+    'university': [(30, 20), (45, 25), (60, 40), (90, 15), (120, 10), (180, 4), (300, 2)],
+}
+
+def build_halls(profile):
+    halls = []
+    for capacity, count in HALL_PROFILES[profile]:
+        for _ in range(count):
+            halls.append({'hall_id': len(halls) + 1, 'capacity': capacity})
+    return halls
+
+def bench_hall_packing(samples=500, seed=42):
+    """Compare the subset-sum hall packer with the old largest-first greedy"""
+    rng = random.Random(seed)
+    print("HALL PACKING: subset-sum vs greedy")
+    print(f"{'profile':20} {'halls':>6} {'greedy halls':>13} {'dp halls':>9} {'greedy empty':>13} {'dp empty':>9} {'dp ms/exam':>11}")
+    
+    for profile in HALL_PROFILES:
+        halls = build_halls(profile)
+        # Students per exam: mostly single sections, some merged papers
+        counts = [min(1000, int(rng.lognormvariate(4.6, 0.6))) for _ in range(samples)]
+        
+        greedy_halls = greedy_empty = dp_halls = dp_empty = 0
+        started = time.perf_counter()
+        for students in counts:
+            chosen = pack_halls(students, halls)
+            dp_halls += len(chosen)
+            dp_empty += max(0, sum(hall['capacity'] for hall in chosen) - students)
+        elapsed = time.perf_counter() - started
+        
+        for students in counts:
+            chosen = greedy_pack_halls(students, halls)
+            greedy_halls += len(chosen)
+            greedy_empty += max(0, sum(hall['capacity'] for hall in chosen) - students)
+        
+        print(f"{profile:20} {len(halls):6} {greedy_halls / samples:13.2f} {dp_halls / samples:9.2f} "
+              f"{greedy_empty / samples:13.1f} {dp_empty / samples:9.1f} {elapsed * 1000 / samples:11.3f}")
+
+DESIGNATIONS = [('Professor', 10), ('Associate Professor', 12), ('Assistant Professor', 15), ('Lecturer', 20)]
+# Share of each designation in a typical roster
+DESIGNATION_WEIGHTS = [0.15, 0.2, 0.4, 0.25]
+EXAM_TYPES = ['Mid Term', 'Missed Evaluation', 'End Sem', 'Supplementary Exam']
+# Two exam seasons: mid terms first, end semester papers six weeks later
+EXAM_SEASONS = [(0, 0.35, ['Mid Term'] * 9 + ['Missed Evaluation']),
+                (42, 0.65, ['End Sem'] * 9 + ['Supplementary Exam'])]
+
+def build_synthetic_db(path, exams=5000, faculty=800, profile='university', staffed=0.8, seed=42, start_date=None):
+    """Fill a fresh database at path with a seeded timetable, hall bookings and invigilator duties.
+
+    Department sizes and individual workloads are long-tailed, exams cluster
+    into two seasons with peak days, and about the first `staffed` share of
+    the timetable already has halls and invigilators, like a semester in
+    progress. The first season starts two weeks before start_date (today).
+    """
+    rng = random.Random(seed)
+    first_day = (datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else date.today()) - timedelta(days=14)
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.execute("INSERT OR IGNORE INTO users (username, password, role) VALUES ('admin', 'admin123', 'admin')")
+
+    departments = [f"Department {i}" for i in range(max(1, faculty // 40))]
+    department_weights = [1 / (rank + 1) for rank in range(len(departments))]
+    roster = []
+    for i in range(faculty):
+        designation, duties = rng.choices(DESIGNATIONS, DESIGNATION_WEIGHTS)[0]
+        roster.append((f"Faculty {i}", designation, rng.choices(departments, department_weights)[0],
+                       duties, duties, rng.random() > 0.05))
+    conn.executemany("""
+        INSERT INTO faculty (name, designation, department, total_duties, remaining_duties, is_available)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, roster)
+    conn.executemany("INSERT INTO halls (hall_name, capacity, is_available) VALUES (?, ?, ?)",
+                     [(f"Hall {hall['hall_id']}", hall['capacity'], rng.random() > 0.03) for hall in build_halls(profile)])
+
+    season_days = max(3, exams // 120)
+    exam_rows = []
+    for i in range(exams):
+        offset, _, types = rng.choices(EXAM_SEASONS, [weight for _, weight, _ in EXAM_SEASONS])[0]
+        day = first_day + timedelta(days=offset + int(rng.triangular(0, season_days, season_days * 0.3)))
+        students = min(1000, int(rng.lognormvariate(4.6, 0.6)))
+        exam_rows.append((rng.choice(types), day.isoformat(), 'Forenoon' if rng.random() < 0.6 else 'Afternoon',
+                          2 + students // 60, f"C{i:05d}", f"Course {i}", students))
+    exam_rows.sort(key=lambda row: (row[1], row[2]))
+    conn.executemany("""
+        INSERT INTO exams (exam_type, date, session, invigilators_required, course_code, course_name, students_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, exam_rows)
+
+    # A few faculty take far more duties than the rest
+    available = [row for row in conn.execute("SELECT faculty_id, total_duties FROM faculty WHERE is_available = TRUE")]
+    faculty_ids = [faculty_id for faculty_id, _ in available]
+    propensity = [rng.lognormvariate(0, 0.8) for _ in available]
+    remaining = dict(available)
+    halls = conn.execute("SELECT hall_id, capacity FROM halls WHERE is_available = TRUE").fetchall()
+
+    scheduled = conn.execute("""
+        SELECT exam_id, date, session, invigilators_required, students_count FROM exams ORDER BY exam_id
+    """).fetchall()
+    duties = []
+    bookings = []
+    busy = {}
+    booked = {}
+    for exam_id, day, session, required, students in scheduled[:int(len(scheduled) * staffed)]:
+        slot_busy = busy.setdefault((day, session), set())
+        chosen = []
+        for faculty_id in rng.choices(faculty_ids, propensity, k=required * 4) if faculty_ids else []:
+            if len(chosen) == required:
+                break
+            if faculty_id not in slot_busy and remaining[faculty_id] > 0:
+                slot_busy.add(faculty_id)
+                remaining[faculty_id] -= 1
+                chosen.append(faculty_id)
+        duties.extend((exam_id, day, session, faculty_id) for faculty_id in chosen)
+
+        slot_booked = booked.setdefault((day, session), set())
+        seats = 0
+        for hall_id, capacity in rng.sample(halls, len(halls)):
+            if seats >= students:
+                break
+            if hall_id not in slot_booked:
+                slot_booked.add(hall_id)
+                bookings.append((exam_id, hall_id))
+                seats += capacity
+
+    conn.executemany("INSERT INTO duty_allocations (exam_id, date, session, faculty_id) VALUES (?, ?, ?, ?)", duties)
+    conn.executemany("INSERT INTO faculty_duties (faculty_id, exam_id) VALUES (?, ?)",
+                     [(faculty_id, exam_id) for exam_id, _, _, faculty_id in duties])
+    conn.executemany("INSERT INTO exam_hall_allocations (exam_id, hall_id) VALUES (?, ?)", bookings)
+    conn.executemany("UPDATE faculty SET remaining_duties = ? WHERE faculty_id = ?",
+                     [(left, faculty_id) for faculty_id, left in remaining.items()])
+    conn.commit()
+    return conn
+
+# The /exams query before per-exam rollups: both child tables joined at once
+FANOUT_EXAMS_QUERY = """
+    SELECT e.*,
+           COUNT(DISTINCT da.faculty_id) as assigned_invigilators,
+           COUNT(DISTINCT eha.hall_id) as assigned_halls,
+           SUM(h.capacity) as total_hall_capacity
+    FROM exams e
+    LEFT JOIN duty_allocations da ON e.exam_id = da.exam_id
+    LEFT JOIN exam_hall_allocations eha ON e.exam_id = eha.exam_id
+    LEFT JOIN halls h ON eha.hall_id = h.hall_id
+    GROUP BY e.exam_id
+    ORDER BY e.date, e.session
+"""
+
+def _best_time(conn, query, repeats):
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows = conn.execute(query).fetchall()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return rows, best
+
+def bench_exam_rollups(exams=5000, repeats=5, seed=42):
+    """Compare the fan-out /exams query with the per-exam rollup subqueries"""
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        conn = build_synthetic_db(db_path, exams=exams, seed=seed)
+        # Importing app migrates DB_NAME and recovers its jobs, so point it at the scratch file
+        os.environ['DB_NAME'] = db_path
+        from app import exam_rollup_columns
+        
+        rollup_query = f"""
+            SELECT e.*, {exam_rollup_columns('assigned_invigilators', 'assigned_halls', 'total_hall_capacity')}
+            FROM exams e
+            ORDER BY e.date, e.session
+        """
+        
+        fanout_rows = conn.execute("""
+            SELECT COUNT(*) FROM exams e
+            LEFT JOIN duty_allocations da ON e.exam_id = da.exam_id
+            LEFT JOIN exam_hall_allocations eha ON e.exam_id = eha.exam_id
+        """).fetchone()[0]
+        rollup_rows = conn.execute("""
+            SELECT (SELECT COUNT(*) FROM exams) + (SELECT COUNT(*) FROM duty_allocations)
+                   + (SELECT COUNT(*) FROM exam_hall_allocations)
+        """).fetchone()[0]
+        
+        old, old_time = _best_time(conn, FANOUT_EXAMS_QUERY, repeats)
+        new, new_time = _best_time(conn, rollup_query, repeats)
+        conn.close()
+    
+    inflated = sum(1 for before, after in zip(old, new) if before[-1] != after[-1])
+    print(f"EXAM ROLLUPS: {exams} exams, best of {repeats}")
+    print(f"{'query':10} {'rows visited':>13} {'ms':>9}")
+    print(f"{'fan-out':10} {fanout_rows:13} {old_time * 1000:9.1f}")
+    print(f"{'rollups':10} {rollup_rows:13} {new_time * 1000:9.1f}")
+    print(f"Hall capacity inflated by the fan-out for {inflated} of {len(new)} exams")
+
+
+# ---------- ROUTE BENCHMARKS ----------
+# (name, method, path, form data). {placeholders} are filled per request from
+# route_fixtures(), so write routes never act on the same row twice; fields
+# given as functions are called with the request's fixture.
+def _faculty_csv(fixture):
+    n = fixture['n']
+    rows = "".join(f"Bench Upload {n}-{i},Assistant Professor,Department {i % 5}\n" for i in range(500))
+    return io.BytesIO(("Name,Designation,Department\n" + rows).encode()), "faculty.csv"
+
+def _timetable_csv(fixture):
+    n = fixture['n']
+    day = (date.today() + timedelta(days=200 + n)).isoformat()
+    rows = "".join(f"End Sem,{day},{('Forenoon', 'Afternoon')[i % 2]},{40 + i % 150},BU{n}X{i},Bench Paper\n" for i in range(200))
+    return io.BytesIO(("exam_type,date,session,students_count,course_code,course_name\n" + rows).encode()), "timetable.csv"
+
+ROUTE_CASES = [
+    ('login_page', 'GET', '/login', None),
+    ('dashboard', 'GET', '/', None),
+    ('faculty', 'GET', '/faculty', None),
+    ('halls', 'GET', '/halls', None),
+    ('exams', 'GET', '/exams', None),
+    ('schedule', 'GET', '/schedule', None),
+    ('schedule_week', 'GET', '/schedule?start_date={season_start}&end_date={season_week}&sort_by=faculty_name', None),
+    ('reports', 'GET', '/reports', None),
+    ('reports_week', 'GET', '/reports?date_from={season_start}&date_to={season_week}', None),
+    ('export_schedule', 'GET', '/export_schedule', None),
+    ('assign_invigilators', 'GET', '/assign_invigilators/{exam}', None),
+    ('assign_halls', 'GET', '/assign_halls/{exam}', None),
+    ('jobs', 'GET', '/jobs', None),
+    ('database_simple', 'GET', '/database-simple', None),
+    ('db_stats', 'GET', '/db_stats', None),
+    ('cache_stats', 'GET', '/cache_stats', None),
+    ('check_busy_slots', 'GET', '/check_busy_slots', None),
+    ('check_report_aggregates', 'GET', '/check_report_aggregates', None),
+    ('api_index', 'GET', '/api/v1', None),
+    ('api_exams', 'GET', '/api/v1/exams?limit=1000', None),
+    ('api_allocations', 'GET', '/api/v1/allocations?limit=1000', None),
+    ('api_hall_allocations', 'GET', '/api/v1/hall_allocations?limit=1000', None),
+    ('api_faculty', 'GET', '/api/v1/faculty?limit=1000', None),
+    ('api_halls', 'GET', '/api/v1/halls', None),
+    ('add_faculty', 'POST', '/add_faculty', {'name': 'Bench Faculty {n}', 'designation': 'Lecturer', 'department': 'Benchmarks'}),
+    ('add_hall', 'POST', '/add_hall', {'hall_name': 'Bench Hall {n}', 'capacity': '60'}),
+    ('add_exam', 'POST', '/add_exam', {'exam_type': 'End Sem', 'date': '{future_date}', 'session': 'Forenoon',
+                                       'students_count': '90', 'course_code': 'BENCH{n}', 'course_name': 'Benchmark'}),
+    ('toggle_faculty', 'GET', '/toggle_faculty/{faculty}', None),
+    ('toggle_hall', 'GET', '/toggle_hall/{hall}', None),
+    ('reset_duties', 'GET', '/reset_duties/{faculty}', None),
+    ('make_assignment', 'POST', '/make_assignment', {'exam_id': '{open_exam}', 'faculty_ids': lambda fixture: fixture['free_faculty']}),
+    ('make_hall_assignment', 'POST', '/make_hall_assignment', {'exam_id': '{open_exam}', 'hall_ids': '{free_hall}'}),
+    ('auto_assign_halls', 'GET', '/auto_assign_halls/{open_exam}', None),
+    ('remove_hall_assignment', 'GET', '/remove_hall_assignment/{booked_exam}/{booked_hall}', None),
+    ('delete_assignment', 'GET', '/delete_assignment/{allocation}', None),
+    ('delete_exam', 'GET', '/delete_exam/{victim_exam}', None),
+    ('auto_assign_invigilators', 'POST', '/auto_assign_invigilators',
+     {'start_date': '{season_start}', 'end_date': '{season_week}', 'mode': 'greedy'}),
+    ('auto_assign_halls_session', 'GET', '/auto_assign_halls_session?start_date={season_start}&end_date={season_week}', None),
+    ('upload_faculty', 'POST', '/upload_faculty', {'file': _faculty_csv}),
+    ('import_exams', 'POST', '/import_exams', {'file': _timetable_csv}),
+    ('reset_all_duties', 'GET', '/reset_all_duties', None),
+]
+
+def route_fixtures(conn, count):
+    """Placeholder values for request n in 0..count-1, drawn from disjoint rows so writes don't collide"""
+    staffed = [row[0] for row in conn.execute("""
+        SELECT exam_id FROM exams WHERE exam_id IN (SELECT exam_id FROM duty_allocations) ORDER BY exam_id
+    """)]
+    third = max(1, len(staffed) // 3)
+    allocations = [row[0] for row in conn.execute(f"""
+        SELECT MIN(allocation_id) FROM duty_allocations
+        WHERE exam_id IN ({",".join(map(str, staffed[third:2 * third])) or "NULL"})
+        GROUP BY exam_id
+    """)]
+    bookings = conn.execute(f"""
+        SELECT exam_id, MIN(hall_id) FROM exam_hall_allocations
+        WHERE exam_id IN ({",".join(map(str, staffed[third:2 * third])) or "NULL"})
+        GROUP BY exam_id
+    """).fetchall()
+    faculty = [row[0] for row in conn.execute("SELECT faculty_id FROM faculty ORDER BY faculty_id")]
+    halls = [row[0] for row in conn.execute("SELECT hall_id FROM halls ORDER BY hall_id")]
+
+    # One not-yet-staffed exam per slot, with enough free invigilators and the
+    # smallest free hall that seats it
+    open_slots = []
+    for exam_id, day, session, required, students in conn.execute("""
+        SELECT exam_id, date, session, invigilators_required, students_count FROM exams
+        WHERE exam_id IN (
+            SELECT MIN(exam_id) FROM exams
+            WHERE exam_id NOT IN (SELECT exam_id FROM duty_allocations)
+              AND exam_id NOT IN (SELECT exam_id FROM exam_hall_allocations)
+            GROUP BY date, session)
+        ORDER BY date, session
+    """).fetchall():
+        free_faculty = [row[0] for row in conn.execute("""
+            SELECT faculty_id FROM faculty
+            WHERE is_available = TRUE AND remaining_duties > 0
+              AND faculty_id NOT IN (SELECT faculty_id FROM duty_allocations WHERE date = ? AND session = ?)
+            ORDER BY remaining_duties DESC LIMIT ?
+        """, (day, session, required))]
+        free_hall = conn.execute("""
+            SELECT hall_id FROM halls
+            WHERE is_available = TRUE AND hall_id NOT IN (
+                SELECT eha.hall_id FROM exam_hall_allocations eha
+                JOIN exams e ON eha.exam_id = e.exam_id
+                WHERE e.date = ? AND e.session = ?)
+            ORDER BY capacity < ?, capacity LIMIT 1
+        """, (day, session, students)).fetchone()
+        if len(free_faculty) == required and free_hall:
+            open_slots.append((exam_id, free_faculty, free_hall[0]))
+    season = conn.execute("SELECT MIN(date) FROM exams").fetchone()[0]
+
+    def pick(values, n):
+        return values[n % len(values)] if values else 0
+
+    fixtures = []
+    for n in range(count):
+        open_exam, free_faculty, free_hall = pick(open_slots, n) or (0, [], 0)
+        booked_exam, booked_hall = pick(bookings, n) or (0, 0)
+        fixtures.append({
+            'n': n,
+            'exam': pick(staffed[:third], n),
+            'victim_exam': pick(staffed[2 * third:][::-1], n),
+            'allocation': pick(allocations, n),
+            'booked_exam': booked_exam,
+            'booked_hall': booked_hall,
+            'faculty': pick(faculty, n),
+            'hall': pick(halls, n),
+            'open_exam': open_exam,
+            'free_faculty': free_faculty,
+            'free_hall': free_hall,
+            'season_start': season,
+            'season_week': (datetime.strptime(season, '%Y-%m-%d').date() + timedelta(days=6)).isoformat(),
+            'future_date': (date.today() + timedelta(days=120)).isoformat(),
+        })
+    return fixtures
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def _load_app(db_path, cache):
+    """Import app.py against db_path; returns the module and a list collecting each request's metrics"""
+    os.environ['DB_NAME'] = db_path
+    import app as appmod
+    appmod.DB_NAME = db_path
+    while appmod._pool:
+        appmod._pool.pop().dispose()
+    appmod.load_busy_slots()
+    if not cache:
+        appmod.response_cache.max_bytes = 0
+    appmod.app.config['TESTING'] = True
+
+    finished = []
+    def collect(sender, response, **extra):
+        finished.append(g.get('request_metrics'))
+    request_finished.connect(collect, appmod.app, weak=False)
+    return appmod, finished
+
+def _request(client, method, path, data, fixture):
+    path = path.format(**fixture)
+    form = None
+    if data is not None:
+        form = {key: value(fixture) if callable(value) else value.format(**fixture) for key, value in data.items()}
+    response = client.open(path, method=method, data=form)
+    body = response.get_data()
+    return path, response.status_code, len(body)
+
+def _drop_flashes(client):
+    # Redirects are not followed, so their flash messages would pile up in the session cookie
+    with client.session_transaction() as session:
+        session.pop('_flashes', None)
+
+def bench_routes(exams=5000, faculty=800, profile='university', repeats=20, cache=False, seed=42, output=None, compare=None):
+    """Drive every route through the Flask test client and record latency, SQL and memory per route.
+
+    Each route gets one untimed request under tracemalloc for its peak memory,
+    then `repeats` timed requests for p50/p95 latency. SQL statements and SQL time
+    per request (medians) come from the app's own request metrics.
+    The response cache is disabled unless cache is set, so every request does its real work.
+    """
+    directory = tempfile.mkdtemp(prefix="invigilation_bench_")
+    db_path = os.path.join(directory, "bench.db")
+    started = time.perf_counter()
+    conn = build_synthetic_db(db_path, exams=exams, faculty=faculty, profile=profile, seed=seed)
+    sizes = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+             for table in ('faculty', 'halls', 'exams', 'duty_allocations', 'exam_hall_allocations')}
+    fixtures = route_fixtures(conn, repeats + 1)
+    conn.close()
+    print(f"Synthetic database built in {time.perf_counter() - started:.1f}s: " +
+          ", ".join(f"{count} {table}" for table, count in sizes.items()))
+
+    appmod, finished = _load_app(db_path, cache)
+    client = appmod.app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+    results = {}
+    for name, method, path, data in ROUTE_CASES:
+        tracemalloc.start()
+        url, status, size = _request(client, method, path, data, fixtures[0])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        _drop_flashes(client)
+
+        timings = []
+        finished.clear()
+        for fixture in fixtures[1:]:
+            request_started = time.perf_counter()
+            _request(client, method, path, data, fixture)
+            timings.append((time.perf_counter() - request_started) * 1000)
+            _drop_flashes(client)
+
+        results[name] = {
+            'method': method,
+            'path': url,
+            'status': status,
+            'p50_ms': round(percentile(timings, 0.5), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'max_ms': round(max(timings), 3),
+            'sql_statements': percentile([metrics['queries'] for metrics in finished], 0.5),
+            'sql_ms': round(percentile([metrics['sql_ms'] for metrics in finished], 0.5), 3),
+            'peak_kib': round(peak / 1024, 1),
+            'response_kib': round(size / 1024, 1),
+        }
+
+    covered = {appmod.app.url_map.bind('').match(path.split('?')[0].format(**fixtures[0]), method=method)[0]
+               for _, method, path, _ in ROUTE_CASES}
+    skipped = sorted(rule.endpoint for rule in appmod.app.url_map.iter_rules() if rule.endpoint not in covered)
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'seed': seed,
+            'profile': profile,
+            'rows': sizes,
+            'repeats': repeats,
+            'response_cache': cache,
+            'sqlite_profile': appmod.app.config['SQLITE_PRAGMA_PROFILE'],
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'not_benchmarked': skipped,
+        },
+        'routes': results,
+    }
+    output = output or f"bench_routes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    shutil.rmtree(directory, ignore_errors=True)
+
+    baseline = None
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)['routes']
+    print_route_results(results, baseline)
+    print(f"Not benchmarked: {', '.join(skipped)}")
+    print(f"Results written to {output}")
+    return report
+
+def print_route_results(results, baseline=None):
+    """Table of route results, with the change from a baseline run when one is given"""
+    print(f"{'route':26} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'sql':>5} {'sql ms':>8} {'peak KiB':>9} {'resp KiB':>9}"
+          + (f" {'p50 vs base':>12} {'sql vs base':>12}" if baseline else ""))
+    for name, result in results.items():
+        line = (f"{name:26} {result['status']:6} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} "
+                f"{result['sql_statements']:5} {result['sql_ms']:8.2f} {result['peak_kib']:9.1f} {result['response_kib']:9.1f}")
+        before = (baseline or {}).get(name)
+        if before:
+            change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+            line += f" {change:+11.1f}% {result['sql_statements'] - before['sql_statements']:+12}"
+        print(line)
+
+def _options(args):
+    """--name=value arguments as a dict"""
+    return dict(arg[2:].split("=", 1) if "=" in arg else (arg[2:], True) for arg in args if arg.startswith("--"))
+
+if __name__ == "__main__":
+    # python benchmarks.py [packing | rollups | routes | generate PATH]
+    #     [--exams=N] [--faculty=N] [--profile=NAME] [--seed=N]
+    #     routes only: [--repeats=N] [--cache] [--out=FILE] [--compare=FILE]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = _options(sys.argv[1:])
+    command = args[0] if args else None
+    sizes = {
+        'exams': int(options.get('exams', 5000)),
+        'faculty': int(options.get('faculty', 800)),
+        'profile': options.get('profile', 'university'),
+        'seed': int(options.get('seed', 42)),
+    }
+
+    if command == 'generate':
+        path = args[1] if len(args) > 1 else "seating_synthetic.db"
+        if os.path.exists(path):
+            sys.exit(f"{path} already exists; pick a new file")
+        conn = build_synthetic_db(path, **sizes)
+        for table in ('faculty', 'halls', 'exams', 'duty_allocations', 'exam_hall_allocations'):
+            print(f"{table}: {conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]}")
+        conn.close()
+    elif command == 'routes':
+        bench_routes(repeats=int(options.get('repeats', 20)), cache=bool(options.get('cache')),
+                     output=options.get('out'), compare=options.get('compare'), **sizes)
+    else:
+        if command in (None, 'packing'):
+            bench_hall_packing()
+        if command is None:
+            print()
+        if command in (None, 'rollups'):
+            bench_exam_rollups(exams=sizes['exams'], seed=sizes['seed'])
@@ -0,0 +1,123 @@
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+# Online snapshots of the live database.
+#
+# Snapshots are taken with SQLite's backup API a batch of pages at a time,
+# pausing between batches, so the app keeps reading and writing while a copy
+# is in progress. A write from another connection makes SQLite start the
+# copy over; after MAX_RESTARTS of those the rest is copied in a single step,
+# which in WAL mode only holds a read snapshot and does not block writers.
+# Each copy is written under a temporary name, checked with
+# PRAGMA integrity_check and only then renamed into place, so every
+# <db>_backup_YYYYMMDD_HHMMSS.db on disk is complete.
+
+PAGES_PER_STEP = 256
+STEP_PAUSE = 0.05
+MAX_RESTARTS = 3
+
+
+class BackupFailed(Exception):
+    pass
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def snapshot_prefix(db_path):
+    return os.path.splitext(os.path.basename(db_path))[0] + "_backup_"
+
+def list_snapshots(db_path, backup_dir):
+    """Snapshots of db_path in backup_dir, newest first, as dicts of name, path, size and created_at"""
+    pattern = re.compile(re.escape(snapshot_prefix(db_path)) + r"(\d{8}_\d{6})\.db$")
+    snapshots = []
+    for name in os.listdir(backup_dir) if os.path.isdir(backup_dir) else []:
+        match = pattern.match(name)
+        if match:
+            path = os.path.join(backup_dir, name)
+            snapshots.append({'name': name, 'path': path, 'size': os.path.getsize(path),
+                              'created_at': datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")})
+    return sorted(snapshots, key=lambda snapshot: snapshot['name'], reverse=True)
+
+def copy_database(source, dest, pages=PAGES_PER_STEP, pause=STEP_PAUSE, progress=None):
+    """Copy the source connection's database into dest; returns how often SQLite restarted the copy"""
+    restarts = 0
+    last_remaining = None
+
+    def step(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        last_remaining = remaining
+        if progress:
+            progress(1 - remaining / total if total else 1)
+        if remaining:
+            time.sleep(pause)
+
+    try:
+        source.backup(dest, pages=pages, progress=step)
+    except _TooManyRestarts:
+        source.backup(dest)
+    return restarts
+
+def verify_snapshot(path):
+    """Problems PRAGMA integrity_check finds in the database at path; empty when it is sound"""
+    conn = sqlite3.connect(path)
+    try:
+        problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    return [] if problems == ['ok'] else problems
+
+def prune_snapshots(db_path, backup_dir, keep):
+    """Delete all but the newest keep snapshots; returns the names removed"""
+    removed = []
+    for snapshot in list_snapshots(db_path, backup_dir)[keep:]:
+        os.remove(snapshot['path'])
+        removed.append(snapshot['name'])
+    return removed
+
+def create_snapshot(db_path, backup_dir, keep=None, progress=None, pages=PAGES_PER_STEP, pause=STEP_PAUSE):
+    """Back up db_path into backup_dir, verify the copy and keep only the newest keep snapshots.
+
+    progress(fraction, message) is called as the copy advances; an exception
+    raised from it abandons the snapshot. Returns the new snapshot's path.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    path = os.path.join(backup_dir, f"{snapshot_prefix(db_path)}{datetime.now():%Y%m%d_%H%M%S}.db")
+    partial = path + ".part"
+    report = progress or (lambda fraction, message=None: None)
+
+    try:
+        source = sqlite3.connect(db_path)
+        try:
+            dest = sqlite3.connect(partial)
+            try:
+                report(0, "Copying database pages")
+                copy_database(source, dest, pages, pause, lambda fraction: report(fraction * 0.9))
+                # The copy inherits WAL mode; a snapshot should be a single self-contained file
+                dest.execute("PRAGMA journal_mode = DELETE")
+            finally:
+                dest.close()
+        finally:
+            source.close()
+
+        report(0.9, "Checking snapshot integrity")
+        problems = verify_snapshot(partial)
+        if problems:
+            raise BackupFailed(f"Snapshot failed the integrity check: {'; '.join(problems[:5])}")
+        os.replace(partial, path)
+    except Exception:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+    if keep:
+        prune_snapshots(db_path, backup_dir, keep)
+    return path
@@ -1,6 +1,7 @@
 import os
 import sqlite3
 from datetime import datetime, timedelta
+from db_backup import create_snapshot
 
 DB_NAME = "seating.db"
 
@@ -240,15 +241,10 @@ def show_database_status():
 def backup_database():
     """Create a backup of the current database"""
     try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"seating_backup_{timestamp}.db"
-        
-        # Simple file copy for backup
+        # Online copy through SQLite, safe while the app is writing (see db_backup.py)
         if os.path.exists(DB_NAME):
-            with open(DB_NAME, 'rb') as original:
-                with open(backup_name, 'wb') as backup:
-                    backup.write(original.read())
-            print(f"✅ Database backed up as: {backup_name}")
+            backup_name = create_snapshot(DB_NAME, os.path.dirname(os.path.abspath(DB_NAME)))
+            print(f"✅ Database backed up and verified as: {os.path.basename(backup_name)}")
         else:
             print("❌ Database file not found for backup")
             
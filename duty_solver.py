@@ -0,0 +1,145 @@
+import heapq
+from collections import deque
+
+# Balanced invigilator allocation as a min-cost flow problem.
+#
+# Network: source -> faculty -> (date, session, duty) slot class -> sink.
+#   * source -> faculty carries the faculty member's remaining duty budget and a
+#     convex cost, so every extra duty is dearer for someone who has already
+#     used a larger share of their total_duties.
+#   * faculty -> slot class has capacity 1 and zero cost (one duty per
+#     faculty per date/session).
+#   * slot class -> sink carries the invigilators still required by the
+#     exams of that class.
+#
+# Because all the cost sits on the source arcs, the shortest augmenting path
+# always starts at the cheapest faculty member that can still reach a slot
+# with open demand, possibly by shifting other faculty between slots of the
+# same duty weight. Successive shortest paths therefore reduce to a heap of
+# faculty ordered by marginal cost plus an alternating-path search.
+#
+# Duties of different weights draw different amounts from the same budget, so
+# this is exact only within one weight; across weights it is a heuristic and
+# can staff fewer seats than a greedy pass. Callers compare the two.
+
+
+def _marginal_cost(used, total):
+    return (used + 1) / max(total, 1)
+
+
+def solve_balanced_allocation(exams, faculty, busy_slots):
+    """Assign invigilators across every exam at once, balancing used/total duties.
+
+    exams: iterable of (exam_id, date, session, needed, duties) tuples.
+    faculty: iterable of (faculty_id, total_duties, remaining_duties) tuples.
+    busy_slots: dict mapping (date, session) to faculty ids already on duty.
+
+    Returns (plan, shortfalls): plan is a list of
+    (exam_id, date, session, faculty_id, duties) tuples and shortfalls maps
+    exam_id to the number of invigilators that could not be placed.
+    """
+    demand = {}
+    class_exams = {}
+    for exam_id, date, session, needed, duties in exams:
+        if needed <= 0:
+            continue
+        cls = (date, session, duties)
+        demand[cls] = demand.get(cls, 0) + needed
+        class_exams.setdefault(cls, []).append((exam_id, needed))
+
+    classes = sorted(demand)
+    members = {cls: set() for cls in classes}
+    open_classes = set(classes)
+
+    total = {}
+    used = {}
+    remaining = {}
+    taken_slots = {}
+    for faculty_id, total_duties, remaining_duties in faculty:
+        total[faculty_id] = total_duties
+        used[faculty_id] = total_duties - remaining_duties
+        remaining[faculty_id] = remaining_duties
+        taken_slots[faculty_id] = set()
+    for slot, faculty_ids in busy_slots.items():
+        for faculty_id in faculty_ids:
+            if faculty_id in taken_slots:
+                taken_slots[faculty_id].add(slot)
+
+    def can_take(faculty_id, cls, from_cls):
+        if faculty_id in members[cls]:
+            return False
+        slot = cls[:2]
+        if slot in taken_slots[faculty_id] and (from_cls is None or from_cls[:2] != slot):
+            return False
+        if from_cls is None:
+            return remaining[faculty_id] >= cls[2]
+        # Intermediate moves keep the same duty weight so they stay cost-free
+        return from_cls[2] == cls[2]
+
+    def find_path(start):
+        """Alternating path from start to a slot class with open demand"""
+        parent = {}
+        visited = {start}
+        queue = deque([(start, None)])
+        while queue:
+            faculty_id, from_cls = queue.popleft()
+            for cls in classes:
+                if cls in open_classes and cls not in parent and can_take(faculty_id, cls, from_cls):
+                    parent[cls] = (faculty_id, from_cls)
+                    path = []
+                    while cls is not None:
+                        mover, from_cls = parent[cls]
+                        path.append((mover, from_cls, cls))
+                        cls = from_cls
+                    return path
+            for cls in classes:
+                if cls in open_classes or cls in parent or not can_take(faculty_id, cls, from_cls):
+                    continue
+                parent[cls] = (faculty_id, from_cls)
+                for other in members[cls]:
+                    if other not in visited:
+                        visited.add(other)
+                        queue.append((other, cls))
+        return None
+
+    heap = [(_marginal_cost(used[f], total[f]), -remaining[f], f) for f in total if remaining[f] > 0]
+    heapq.heapify(heap)
+
+    while heap and open_classes:
+        _, _, faculty_id = heapq.heappop(heap)
+        path = find_path(faculty_id)
+        if path is None:
+            # Only this start is dropped; faculty it reached as same-weight
+            # movers may still take a duty of another weight themselves
+            continue
+
+        for mover, from_cls, cls in path:
+            if from_cls is not None:
+                members[from_cls].discard(mover)
+                taken_slots[mover].discard(from_cls[:2])
+            members[cls].add(mover)
+            taken_slots[mover].add(cls[:2])
+
+        filled_cls = path[0][2]
+        if len(members[filled_cls]) >= demand[filled_cls]:
+            open_classes.discard(filled_cls)
+
+        duties = path[-1][2][2]
+        used[faculty_id] += duties
+        remaining[faculty_id] -= duties
+        if remaining[faculty_id] > 0:
+            heapq.heappush(heap, (_marginal_cost(used[faculty_id], total[faculty_id]), -remaining[faculty_id], faculty_id))
+
+    plan = []
+    shortfalls = {}
+    for cls in classes:
+        date, session, duties = cls
+        pool = sorted(members[cls], key=lambda f: (used[f] / max(total[f], 1), f))
+        for exam_id, needed in class_exams[cls]:
+            chosen, pool = pool[:needed], pool[needed:]
+            for faculty_id in chosen:
+                plan.append((exam_id, date, session, faculty_id, duties))
+            if len(chosen) < needed:
+                shortfalls[exam_id] = needed - len(chosen)
+
+    return plan, shortfalls
@@ -0,0 +1,162 @@
+# Hall selection as a 0/1 subset-sum problem.
+#
+# Hall capacities are small integers, so a dynamic programme over seat totals
+# finds the set of halls that seats everyone with the fewest rooms and, among
+# those, the fewest empty seats.
+#
+# Sharing a session's halls between several exams is a multiple-cover problem
+# and NP-hard in general. pack_session() packs exam by exam and falls back to
+# a bounded joint search over every hall when that leaves someone short.
+
+JOINT_SEARCH_NODES = 50000
+
+
+def pack_halls(students_count, halls, capacity=lambda hall: hall['capacity']):
+    """Pick the halls that seat students_count with the fewest halls, then fewest empty seats.
+
+    Returns the chosen halls in descending capacity order. When even every hall
+    together is too small, all halls are returned so the shortfall is as small
+    as possible.
+    """
+    halls = [hall for hall in halls if capacity(hall) > 0]
+    if students_count <= 0 or not halls:
+        return []
+
+    capacities = [capacity(hall) for hall in halls]
+    if sum(capacities) <= students_count:
+        return sorted(halls, key=capacity, reverse=True)
+
+    # A minimal cover never exceeds the target by a whole hall, so seat totals
+    # above students_count + largest hall can be ignored.
+    limit = students_count + max(capacities)
+    unreachable = len(halls) + 1
+    fewest = [unreachable] * (limit + 1)
+    fewest[0] = 0
+    took = []
+    for cap in capacities:
+        taken = bytearray(limit + 1)
+        for seats in range(limit, cap - 1, -1):
+            if fewest[seats - cap] + 1 < fewest[seats]:
+                fewest[seats] = fewest[seats - cap] + 1
+                taken[seats] = 1
+        took.append(taken)
+
+    best = min(range(students_count, limit + 1), key=lambda seats: (fewest[seats], seats))
+
+    chosen = []
+    seats = best
+    for index in range(len(halls) - 1, -1, -1):
+        if seats and took[index][seats]:
+            chosen.append(halls[index])
+            seats -= capacities[index]
+
+    return sorted(chosen, key=capacity, reverse=True)
+
+
+def greedy_pack_halls(students_count, halls, capacity=lambda hall: hall['capacity']):
+    """The previous largest-first greedy, kept as the benchmark baseline"""
+    chosen = []
+    remaining = students_count
+    for hall in sorted(halls, key=capacity, reverse=True):
+        if remaining <= 0:
+            break
+        chosen.append(hall)
+        remaining -= capacity(hall)
+    return chosen
+
+
+def cover_jointly(exams, halls, capacity=lambda hall: hall['capacity'], budget=JOINT_SEARCH_NODES):
+    """Seat every exam at once from halls, using the fewest halls.
+
+    Depth-first over the halls, largest first, giving each one to an exam that
+    is still short or to nobody. Returns {exam_id: halls}, or None when no full
+    cover turns up within budget search nodes.
+    """
+    halls = sorted(halls, key=capacity, reverse=True)
+    caps = [capacity(hall) for hall in halls]
+    left = [0] * (len(halls) + 1)
+    for index in range(len(halls) - 1, -1, -1):
+        left[index] = left[index + 1] + caps[index]
+    need = [seats for _, seats in exams]
+    owner = [None] * len(halls)
+    best = None
+    best_count = len(halls) + 1
+    nodes = 0
+
+    def search(index, used):
+        nonlocal best, best_count, nodes
+        nodes += 1
+        short = sum(seats for seats in need if seats > 0)
+        if not short:
+            if used < best_count:
+                best, best_count = owner[:index], used
+            return
+        if nodes > budget or index == len(halls) or left[index] < short or used + 1 >= best_count:
+            return
+        tried = set()
+        for exam in range(len(need)):
+            # Exams short by the same number of seats are interchangeable here
+            if need[exam] > 0 and need[exam] not in tried:
+                tried.add(need[exam])
+                need[exam] -= caps[index]
+                owner[index] = exam
+                search(index + 1, used + 1)
+                need[exam] += caps[index]
+        owner[index] = None
+        search(index + 1, used)
+
+    search(0, 0)
+    if best is None:
+        return None
+    allocation = {exam_id: [] for exam_id, _ in exams}
+    for index, exam in enumerate(best):
+        if exam is not None:
+            allocation[exams[exam][0]].append(halls[index])
+    return allocation
+
+
+def pack_session(exams, halls, capacity=lambda hall: hall['capacity']):
+    """Share one (date, session) slot's free halls between all of its exams.
+
+    exams: iterable of (exam_id, seats_needed) pairs.
+
+    A greedy heuristic first: exams are packed largest first so the big papers
+    are not left with only small rooms, and each one takes the fewest halls
+    with the fewest empty seats from what is still free. If that leaves someone
+    short while the slot as a whole has enough seats, the slot is repacked
+    smallest-first, and if both orders fall short cover_jointly() searches all
+    halls for all exams together. A cover the bounded search misses in a very
+    large slot is reported as a shortfall.
+
+    Returns (allocation, shortfalls): allocation maps exam_id to its halls and
+    shortfalls maps exam_id to the seats that could not be found.
+    """
+    exams = [(exam_id, seats) for exam_id, seats in exams if seats > 0]
+
+    def run(order):
+        free = list(halls)
+        allocation = {}
+        shortfalls = {}
+        for exam_id, seats in order:
+            chosen = pack_halls(seats, free, capacity)
+            chosen_ids = {id(hall) for hall in chosen}
+            free = [hall for hall in free if id(hall) not in chosen_ids]
+            allocation[exam_id] = chosen
+            missing = seats - sum(capacity(hall) for hall in chosen)
+            if missing > 0:
+                shortfalls[exam_id] = missing
+        return allocation, shortfalls
+
+    def score(result):
+        allocation, shortfalls = result
+        used = [hall for chosen in allocation.values() for hall in chosen]
+        return (sum(shortfalls.values()), len(used), sum(capacity(hall) for hall in used))
+
+    best = run(sorted(exams, key=lambda exam: exam[1], reverse=True))
+    if best[1] and sum(capacity(hall) for hall in halls) >= sum(seats for _, seats in exams):
+        best = min(best, run(sorted(exams, key=lambda exam: exam[1])), key=score)
+        if best[1]:
+            joint = cover_jointly(exams, halls, capacity)
+            if joint is not None:
+                best = (joint, {})
+    return best
@@ -1,6 +1,7 @@
 import sqlite3
 import os
 from datetime import datetime, timedelta
+from migrations import migrate
 
 DB_NAME = "seating.db"
 
@@ -13,79 +14,10 @@ def init_db():
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
     
-    # Check if users table exists
-    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
-    users_table_exists = c.fetchone() is not None
-    
-    # Faculty table - matches app.py
-    c.execute('''CREATE TABLE IF NOT EXISTS faculty (
-                    faculty_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    designation TEXT CHECK(designation IN ('Professor', 'Assistant Professor', 'Associate Professor', 'Lecturer')) NOT NULL,
-                    department TEXT NOT NULL,
-                    total_duties INTEGER DEFAULT 0,
-                    remaining_duties INTEGER DEFAULT 0,
-                    is_available BOOLEAN DEFAULT TRUE
-                )''')
-    
-    # Halls table - matches app.py
-    c.execute('''CREATE TABLE IF NOT EXISTS halls (
-                    hall_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    hall_name TEXT NOT NULL UNIQUE,
-                    capacity INTEGER NOT NULL,
-                    is_available BOOLEAN DEFAULT TRUE
-                )''')
-    
-    # Exams table - UPDATED to match app.py structure (removed rooms_required, added students_count)
-    c.execute('''CREATE TABLE IF NOT EXISTS exams (
-                    exam_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    exam_type TEXT CHECK(exam_type IN ('Mid Term', 'Missed Evaluation', 'End Sem', 'Supplementary Exam')) NOT NULL,
-                    date DATE NOT NULL,
-                    session TEXT CHECK(session IN ('Forenoon', 'Afternoon')) NOT NULL,
-                    invigilators_required INTEGER NOT NULL,
-                    course_code TEXT,
-                    course_name TEXT,
-                    students_count INTEGER NOT NULL DEFAULT 0
-                )''')
-    
-    # Faculty duties table - matches app.py
-    c.execute('''CREATE TABLE IF NOT EXISTS faculty_duties (
-                    duty_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    faculty_id INTEGER NOT NULL,
-                    exam_id INTEGER NOT NULL,
-                    duties_assigned INTEGER DEFAULT 1,
-                    FOREIGN KEY (faculty_id) REFERENCES faculty (faculty_id),
-                    FOREIGN KEY (exam_id) REFERENCES exams (exam_id)
-                )''')
-    
-    # Duty allocations table - matches app.py
-    c.execute('''CREATE TABLE IF NOT EXISTS duty_allocations (
-                    allocation_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    exam_id INTEGER NOT NULL,
-                    date DATE NOT NULL,
-                    session TEXT NOT NULL,
-                    faculty_id INTEGER NOT NULL,
-                    FOREIGN KEY (exam_id) REFERENCES exams (exam_id),
-                    FOREIGN KEY (faculty_id) REFERENCES faculty (faculty_id)
-                )''')
-    
-    # Exam hall allocations table - ADDED to match app.py
-    c.execute('''CREATE TABLE IF NOT EXISTS exam_hall_allocations (
-                    allocation_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    exam_id INTEGER NOT NULL,
-                    hall_id INTEGER NOT NULL,
-                    FOREIGN KEY (exam_id) REFERENCES exams (exam_id),
-                    FOREIGN KEY (hall_id) REFERENCES halls (hall_id),
-                    UNIQUE(exam_id, hall_id)
-                )''')
-    
-    # Users table - FIXED: Use CREATE TABLE IF NOT EXISTS
-    c.execute('''CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL,
-                    role TEXT DEFAULT 'admin'
-                )''')
+    # Create or upgrade the schema (see migrations.py)
+    applied = migrate(conn)
+    if applied:
+        print(f"Applied schema migrations: {', '.join(map(str, applied))}")
     
     # Always ensure admin user exists
     c.execute("SELECT COUNT(*) FROM users WHERE username = 'admin'")
@@ -158,25 +90,24 @@ def init_db():
     conn.close()
     print("Database initialization completed successfully!")
 
+DESIGNATION_DUTIES = {
+    'Professor': 10,
+    'Associate Professor': 12,
+    'Assistant Professor': 15,
+    'Lecturer': 20
+}
+
 def get_designation_duties(designation):
-    designation_duties = {
-        'Professor': 10,
-        'Associate Professor': 12,
-        'Assistant Professor': 15,
-        'Lecturer': 20
-    }
-    return designation_duties.get(designation, 10)
+    return DESIGNATION_DUTIES.get(designation, 10)
 
 def reset_all_duties():
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
     
-    faculty = c.execute("SELECT faculty_id, designation FROM faculty").fetchall()
-    
-    for faculty_id, designation in faculty:
-        total_duties = get_designation_duties(designation)
-        c.execute("UPDATE faculty SET total_duties = ?, remaining_duties = ? WHERE faculty_id = ?",
-                 (total_duties, total_duties, faculty_id))
+    # Every faculty member in one statement, duties looked up by designation
+    duties = "CASE designation " + " ".join(
+        f"WHEN '{designation}' THEN {count}" for designation, count in DESIGNATION_DUTIES.items()) + " ELSE 10 END"
+    c.execute(f"UPDATE faculty SET total_duties = {duties}, remaining_duties = {duties}")
     
     c.execute("DELETE FROM duty_allocations")
     c.execute("DELETE FROM faculty_duties")
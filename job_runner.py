@@ -0,0 +1,255 @@
+import contextlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# In-process background jobs.
+#
+# Jobs run on a small thread pool and are recorded in the jobs table, which
+# keeps their status, final progress and result across page loads and
+# restarts. Live progress is held in memory while a job runs: the job usually
+# holds SQLite's write lock for its whole transaction, so progress cannot be
+# written back until it finishes. For the same reason jobs that write take
+# turns on an in-process lock rather than failing on SQLITE_BUSY.
+#
+# Several worker processes can share one jobs table, so each job records its
+# owner as host|pid|token. recover() fails only the jobs whose owner is gone:
+# a dead pid on this host, or this pid under an earlier token. Jobs owned by
+# live processes or by other hosts are left alone.
+
+ACTIVE_STATUSES = ('queued', 'running')
+STATUS_WRITE_TIMEOUT_MS = 30000
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobLimitExceeded(Exception):
+    pass
+
+
+_NO_LOCK = contextlib.nullcontext()
+
+
+def _now():
+    return time.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _process_alive(pid):
+    if os.name != 'posix':
+        # Probing another pid needs a signal; assume it is still running
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Job:
+    """Handle passed to a job function for reporting progress and honouring cancellation"""
+    def __init__(self, runner, job_id):
+        self.runner = runner
+        self.job_id = job_id
+
+    def progress(self, fraction, message=None):
+        self.check_cancelled()
+        with self.runner.lock:
+            live = self.runner.live.setdefault(self.job_id, {})
+            live['progress'] = round(min(max(fraction, 0.0), 1.0), 3)
+            if message is not None:
+                live['message'] = message
+
+    def check_cancelled(self):
+        if self.job_id in self.runner.cancel_requested:
+            raise JobCancelled()
+
+
+class JobRunner:
+    """Thread pool plus the jobs table.
+
+    connect() must return a new sqlite3 connection with row_factory set.
+    Submissions beyond max_active jobs overall, or per_user jobs for one
+    user, are refused with JobLimitExceeded instead of being queued.
+    """
+    def __init__(self, connect, max_workers=2, per_user=2, max_active=10):
+        self.connect = connect
+        self.max_workers = max_workers
+        self.per_user = per_user
+        self.max_active = max_active
+        self.handlers = {}
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.live = {}
+        self.futures = {}
+        self.cancel_requested = set()
+        self._executor = None
+        self._owner = None
+
+    @property
+    def owner(self):
+        """host|pid|token of this process, made again after a fork"""
+        pid = os.getpid()
+        if self._owner is None or self._owner[0] != pid:
+            self._owner = (pid, f"{socket.gethostname()}|{pid}|{uuid.uuid4().hex[:12]}")
+        return self._owner[1]
+
+    def _owner_gone(self, owner):
+        if not owner:
+            return True
+        host, pid, token = owner.split("|")
+        if host != socket.gethostname():
+            return False
+        if int(pid) == os.getpid():
+            return owner != self.owner
+        return not _process_alive(int(pid))
+
+    def register(self, kind, func, writes=True):
+        """func(job, **params) runs the work and returns a JSON-serialisable result"""
+        self.handlers[kind] = (func, writes)
+
+    def job(self, kind, writes=True):
+        def decorator(func):
+            self.register(kind, func, writes)
+            return func
+        return decorator
+
+    def _execute(self, query, params=()):
+        conn = self.connect()
+        try:
+            conn.execute(f"PRAGMA busy_timeout = {STATUS_WRITE_TIMEOUT_MS}")
+            conn.execute(query, params)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def recover(self):
+        """Fail jobs left queued or running by a process that has since exited"""
+        conn = self.connect()
+        try:
+            owners = [row[0] for row in conn.execute(f"SELECT DISTINCT owner FROM jobs WHERE status IN {ACTIVE_STATUSES}")]
+        finally:
+            conn.close()
+        for owner in filter(self._owner_gone, owners):
+            self._execute(f"""
+                UPDATE jobs SET status = 'failed', error = 'Interrupted by a server restart', finished_at = ?
+                WHERE status IN {ACTIVE_STATUSES} AND owner IS ?
+            """, (_now(), owner))
+
+    def submit(self, kind, params, user_id=None):
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job type '{kind}'")
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            active = [future_user for future_user, _ in self.futures.values()]
+            if len(active) >= self.max_active:
+                raise JobLimitExceeded(f"The server is already running {len(active)} jobs. Try again shortly.")
+            if user_id is not None and active.count(user_id) >= self.per_user:
+                raise JobLimitExceeded(f"You already have {self.per_user} jobs running. Wait for one to finish or cancel it.")
+            # Hold the slot without the lock: the INSERT may wait on a running
+            # job's write transaction, and that job needs the lock to report progress
+            self.futures[job_id] = (user_id, None)
+
+        try:
+            self._execute("""
+                INSERT INTO jobs (job_id, kind, status, progress, params, submitted_by, created_at, owner)
+                VALUES (?, ?, 'queued', 0, ?, ?, ?, ?)
+            """, (job_id, kind, json.dumps(params), user_id, _now(), self.owner))
+        except Exception:
+            with self.lock:
+                self.futures.pop(job_id, None)
+            raise
+
+        with self.lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            future = self._executor.submit(self._run, job_id, kind, params)
+            self.futures[job_id] = (user_id, future)
+        return job_id
+
+    def _run(self, job_id, kind, params):
+        func, writes = self.handlers[kind]
+        try:
+            # Writers stay queued until the one ahead of them has committed
+            with self.write_lock if writes else _NO_LOCK:
+                if job_id in self.cancel_requested:
+                    raise JobCancelled()
+                self._execute("UPDATE jobs SET status = 'running', started_at = ? WHERE job_id = ?", (_now(), job_id))
+                result = func(Job(self, job_id), **params)
+            self._finish(job_id, 'succeeded', result=result)
+        except JobCancelled:
+            self._finish(job_id, 'cancelled')
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            self._finish(job_id, 'failed', error=str(e))
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self.lock:
+            live = self.live.pop(job_id, {})
+            self.futures.pop(job_id, None)
+            self.cancel_requested.discard(job_id)
+        progress = 1 if status == 'succeeded' else live.get('progress', 0)
+        try:
+            self._execute("""
+                UPDATE jobs SET status = ?, progress = ?, message = ?, result = ?, error = ?, finished_at = ?
+                WHERE job_id = ?
+            """, (status, progress, live.get('message'), json.dumps(result) if result is not None else None,
+                  error, _now(), job_id))
+        except Exception:
+            logger.exception("Could not record the end of job %s", job_id)
+
+    def cancel(self, job_id):
+        """Ask a job to stop; returns False when it is not queued or running"""
+        with self.lock:
+            entry = self.futures.get(job_id)
+            if entry is None:
+                return False
+            self.cancel_requested.add(job_id)
+        if entry[1] is not None and entry[1].cancel():
+            self._finish(job_id, 'cancelled')
+        return True
+
+    def _merge_live(self, row):
+        job = dict(row)
+        job['params'] = json.loads(job['params']) if job['params'] else {}
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        with self.lock:
+            job.update(self.live.get(job['job_id'], {}))
+            job['cancel_requested'] = job['job_id'] in self.cancel_requested
+        return job
+
+    def get(self, job_id):
+        conn = self.connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._merge_live(row) if row else None
+
+    def recent(self, user_id=None, limit=50):
+        conn = self.connect()
+        try:
+            if user_id is None:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC, rowid DESC LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = conn.execute("""
+                    SELECT * FROM jobs WHERE submitted_by = ? ORDER BY created_at DESC, rowid DESC LIMIT ?
+                """, (user_id, limit)).fetchall()
+        finally:
+            conn.close()
+        return [self._merge_live(row) for row in rows]
+
+    def stats(self):
+        with self.lock:
+            return {'active': len(self.futures), 'max_active': self.max_active,
+                    'per_user': self.per_user, 'workers': self.max_workers}
@@ -0,0 +1,181 @@
+import bisect
+import re
+import sqlite3
+import threading
+import time
+
+# Per-request SQL accounting and Prometheus-style request metrics.
+#
+# InstrumentedConnection times every statement run through execute(),
+# executemany() and the cursor fetch methods, which is where SQLite does its
+# work. Rows read by iterating a cursor directly are not timed; that time
+# shows up in the request total instead. Everything here is plain counters
+# and a perf_counter() pair per call, cheap enough to leave on in production.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 500)
+STATEMENT_LABEL_LENGTH = 120
+
+
+class QueryStats:
+    """Statement count, total time and slowest statement since the last reset()"""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_sql = None
+
+    def add_time(self, sql, seconds, statement_seconds):
+        self.seconds += seconds
+        if statement_seconds > self.slowest_seconds:
+            self.slowest_seconds = statement_seconds
+            self.slowest_sql = sql
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    _sql = None
+    _seconds = 0.0
+
+    def _begin(self, sql):
+        self._sql = sql
+        self._seconds = 0.0
+        self.connection.query_stats.count += 1
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._seconds += elapsed
+            self.connection.query_stats.add_time(self._sql, elapsed, self._seconds)
+
+    def execute(self, sql, *args):
+        self._begin(sql)
+        return self._timed(sqlite3.Cursor.execute, sql, *args)
+
+    def executemany(self, sql, *args):
+        self._begin(sql)
+        return self._timed(sqlite3.Cursor.executemany, sql, *args)
+
+    def fetchone(self):
+        return self._timed(sqlite3.Cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed(sqlite3.Cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed(sqlite3.Cursor.fetchall)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose statements are accounted in query_stats"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.query_stats = QueryStats()
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        return self.cursor().executemany(sql, *args)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def statement_label(sql):
+    """One-line, length-capped form of a statement for use as a label"""
+    return re.sub(r"\s+", " ", sql or "").strip()[:STATEMENT_LABEL_LENGTH]
+
+def format_metric(name, kind, help_text, samples):
+    """Prometheus text for one metric; samples are (labels dict, value) pairs"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{{{_labels(labels)}}} {value}" if labels else f"{name} {value}")
+    return "\n".join(lines)
+
+def format_histograms(name, help_text, histograms):
+    """Prometheus text for a family of histograms keyed by their label dicts"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in histograms:
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{{{_labels(dict(labels, le=bound))}}} {cumulative}")
+        lines.append(f"{name}_sum{{{_labels(labels)}}} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{{{_labels(labels)}}} {histogram.count}")
+    return "\n".join(lines)
+
+
+class RequestMetrics:
+    """Latency, SQL and render histograms per endpoint, plus response counts and the slowest statement time"""
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.latency = {}
+        self.sql_seconds = {}
+        self.queries = {}
+        self.render_seconds = {}
+        self.responses = {}
+        self.slowest = {}
+
+    def observe(self, endpoint, method, status, seconds, stats, render_seconds):
+        key = (endpoint, method)
+        with self.lock:
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.sql_seconds[key] = Histogram(LATENCY_BUCKETS)
+                self.queries[key] = Histogram(QUERY_BUCKETS)
+                self.render_seconds[key] = Histogram(LATENCY_BUCKETS)
+            self.latency[key].observe(seconds)
+            self.render_seconds[key].observe(render_seconds)
+            if stats is not None:
+                self.sql_seconds[key].observe(stats.seconds)
+                self.queries[key].observe(stats.count)
+                # Labelled by endpoint only: statement text would make every distinct query its own series
+                if stats.slowest_seconds > self.slowest.get(endpoint, 0.0):
+                    self.slowest[endpoint] = stats.slowest_seconds
+            self.responses[key + (status,)] = self.responses.get(key + (status,), 0) + 1
+
+    def render(self):
+        def by_route(histograms):
+            return [({'endpoint': endpoint, 'method': method}, histogram)
+                    for (endpoint, method), histogram in sorted(histograms.items())]
+
+        p = self.prefix
+        with self.lock:
+            return "\n".join([
+                format_histograms(f"{p}_request_duration_seconds", "Time to handle a request.", by_route(self.latency)),
+                format_histograms(f"{p}_request_sql_duration_seconds", "Time spent in SQLite per request.", by_route(self.sql_seconds)),
+                format_histograms(f"{p}_request_sql_queries", "SQL statements run per request.", by_route(self.queries)),
+                format_histograms(f"{p}_request_render_duration_seconds", "Time spent rendering templates per request.", by_route(self.render_seconds)),
+                format_metric(f"{p}_responses_total", "counter", "Responses by endpoint, method and status.", [
+                    ({'endpoint': endpoint, 'method': method, 'status': status}, count)
+                    for (endpoint, method, status), count in sorted(self.responses.items())]),
+                format_metric(f"{p}_slowest_sql_seconds", "gauge", "Slowest single statement seen per endpoint.", [
+                    ({'endpoint': endpoint}, f"{seconds:.6f}")
+                    for endpoint, seconds in sorted(self.slowest.items())]),
+            ])
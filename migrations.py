@@ -0,0 +1,484 @@
+import sqlite3
+import sys
+
+from report_aggregates import install_report_aggregates, rebuild_report_aggregates, replace_trigger
+
+DB_NAME = "seating.db"
+
+# Schema migrations keyed on PRAGMA user_version. Each entry upgrades the
+# database by one version; never edit a migration once it has shipped, add a
+# new one instead.
+
+def _create_base_schema(c):
+    """Version 1: the tables app.py and init_db.py used to create separately"""
+    c.execute('''CREATE TABLE IF NOT EXISTS faculty (
+                    faculty_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    designation TEXT CHECK(designation IN ('Professor', 'Associate Professor', 'Assistant Professor', 'Lecturer')) NOT NULL,
+                    department TEXT NOT NULL,
+                    total_duties INTEGER DEFAULT 0,
+                    remaining_duties INTEGER DEFAULT 0,
+                    is_available BOOLEAN DEFAULT TRUE
+                )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS halls (
+                    hall_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    hall_name TEXT NOT NULL UNIQUE,
+                    capacity INTEGER NOT NULL,
+                    is_available BOOLEAN DEFAULT TRUE
+                )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS exams (
+                    exam_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    exam_type TEXT CHECK(exam_type IN ('Mid Term', 'Missed Evaluation', 'End Sem', 'Supplementary Exam')) NOT NULL,
+                    date DATE NOT NULL,
+                    session TEXT CHECK(session IN ('Forenoon', 'Afternoon')) NOT NULL,
+                    invigilators_required INTEGER NOT NULL,
+                    course_code TEXT,
+                    course_name TEXT,
+                    students_count INTEGER NOT NULL DEFAULT 0
+                )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS faculty_duties (
+                    duty_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    faculty_id INTEGER NOT NULL,
+                    exam_id INTEGER NOT NULL,
+                    duties_assigned INTEGER DEFAULT 1,
+                    FOREIGN KEY (faculty_id) REFERENCES faculty (faculty_id),
+                    FOREIGN KEY (exam_id) REFERENCES exams (exam_id),
+                    UNIQUE(faculty_id, exam_id)
+                )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS duty_allocations (
+                    allocation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    exam_id INTEGER NOT NULL,
+                    date DATE NOT NULL,
+                    session TEXT NOT NULL,
+                    faculty_id INTEGER NOT NULL,
+                    FOREIGN KEY (exam_id) REFERENCES exams (exam_id),
+                    FOREIGN KEY (faculty_id) REFERENCES faculty (faculty_id),
+                    UNIQUE(exam_id, faculty_id, date, session)
+                )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS exam_hall_allocations (
+                    allocation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    exam_id INTEGER NOT NULL,
+                    hall_id INTEGER NOT NULL,
+                    FOREIGN KEY (exam_id) REFERENCES exams (exam_id),
+                    FOREIGN KEY (hall_id) REFERENCES halls (hall_id),
+                    UNIQUE(exam_id, hall_id)
+                )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS users (
+                    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE NOT NULL,
+                    password TEXT NOT NULL,
+                    role TEXT DEFAULT 'admin'
+                )''')
+
+def _add_unique_indexes(c):
+    """Version 2: UNIQUE keys that databases created by init_db.py never had"""
+    # Keep the oldest row of any duplicates so the unique index can be built
+    c.execute("""
+        DELETE FROM faculty_duties
+        WHERE duty_id NOT IN (
+            SELECT MIN(duty_id) FROM faculty_duties GROUP BY faculty_id, exam_id
+        )
+    """)
+    c.execute("""
+        DELETE FROM duty_allocations
+        WHERE allocation_id NOT IN (
+            SELECT MIN(allocation_id) FROM duty_allocations GROUP BY exam_id, faculty_id, date, session
+        )
+    """)
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_faculty_duties_faculty_exam ON faculty_duties (faculty_id, exam_id)")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_duty_allocations_exam_faculty ON duty_allocations (exam_id, faculty_id, date, session)")
+
+def _add_hot_path_indexes(c):
+    """Version 3: indexes behind the conflict, schedule and report joins"""
+    c.execute("CREATE INDEX IF NOT EXISTS idx_duty_allocations_exam ON duty_allocations (exam_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_duty_allocations_faculty ON duty_allocations (faculty_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_exams_date_session ON exams (date, session)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_exam_hall_allocations_hall ON exam_hall_allocations (hall_id)")
+
+def _dedupe_faculty(c):
+    """Version 4: one-time faculty cleanup that /faculty used to run on every visit"""
+    designation_mapping = {
+        'Level1': 'Professor',
+        'Level2': 'Associate Professor',
+        'Level3': 'Assistant Professor',
+        'Level4': 'Lecturer'
+    }
+    for old_designation, new_designation in designation_mapping.items():
+        c.execute("UPDATE faculty SET designation = ? WHERE designation = ?",
+                  (new_designation, old_designation))
+
+    # Point duties of duplicate faculty at the oldest record before removing them
+    c.execute("""
+        CREATE TEMP TABLE faculty_keep AS
+        SELECT f.faculty_id AS duplicate_id, keep.keep_id
+        FROM faculty f
+        JOIN (
+            SELECT name, designation, department, MIN(faculty_id) AS keep_id
+            FROM faculty
+            GROUP BY name, designation, department
+        ) keep ON f.name = keep.name AND f.designation = keep.designation AND f.department = keep.department
+        WHERE f.faculty_id != keep.keep_id
+    """)
+    for table in ('duty_allocations', 'faculty_duties'):
+        c.execute(f"""
+            UPDATE OR IGNORE {table}
+            SET faculty_id = (SELECT keep_id FROM faculty_keep WHERE duplicate_id = {table}.faculty_id)
+            WHERE faculty_id IN (SELECT duplicate_id FROM faculty_keep)
+        """)
+        c.execute(f"DELETE FROM {table} WHERE faculty_id IN (SELECT duplicate_id FROM faculty_keep)")
+    c.execute("DELETE FROM faculty WHERE faculty_id IN (SELECT duplicate_id FROM faculty_keep)")
+    c.execute("DROP TABLE faculty_keep")
+
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_faculty_identity ON faculty (name, designation, department)")
+
+def _add_report_aggregates(c):
+    """Version 5: trigger-maintained summary tables that /reports reads"""
+    install_report_aggregates(c)
+
+# Tables whose rows carry updated_at, with their primary keys
+TRACKED_TABLES = {
+    'faculty': 'faculty_id',
+    'halls': 'hall_id',
+    'exams': 'exam_id',
+    'duty_allocations': 'allocation_id',
+    'exam_hall_allocations': 'allocation_id',
+}
+NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+def _add_change_tracking(c):
+    """Version 6: updated_at on every row plus tombstones, for incremental API fetches"""
+    c.execute('''CREATE TABLE IF NOT EXISTS deleted_rows (
+                    table_name TEXT NOT NULL,
+                    row_id INTEGER NOT NULL,
+                    deleted_at TEXT NOT NULL
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_deleted_rows_table_time ON deleted_rows (table_name, deleted_at)")
+    
+    for table, key in TRACKED_TABLES.items():
+        c.execute(f"ALTER TABLE {table} ADD COLUMN updated_at TEXT")
+        c.execute(f"UPDATE {table} SET updated_at = {NOW}")
+        c.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_updated_at ON {table} (updated_at)")
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_touch_insert AFTER INSERT ON {table} BEGIN
+                UPDATE {table} SET updated_at = {NOW} WHERE {key} = NEW.{key};
+            END""")
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_touch_update AFTER UPDATE ON {table}
+            WHEN NEW.updated_at IS OLD.updated_at BEGIN
+                UPDATE {table} SET updated_at = {NOW} WHERE {key} = NEW.{key};
+            END""")
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_tombstone AFTER DELETE ON {table} BEGIN
+                INSERT INTO deleted_rows (table_name, row_id, deleted_at) VALUES ('{table}', OLD.{key}, {NOW});
+            END""")
+
+    # An exam's staffing and a faculty member's workload change with their allocations
+    for table, parents in (('duty_allocations', ('exams', 'faculty')), ('exam_hall_allocations', ('exams',))):
+        for event, row in (('INSERT', 'NEW'), ('DELETE', 'OLD')):
+            touches = "".join(f"""
+                UPDATE {parent} SET updated_at = {NOW} WHERE {TRACKED_TABLES[parent]} = {row}.{TRACKED_TABLES[parent]};"""
+                for parent in parents)
+            c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_touch_parents_{event.lower()} AFTER {event} ON {table} BEGIN{touches}
+            END""")
+
+def _add_jobs(c):
+    """Version 7: background jobs and their outcome"""
+    c.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT CHECK(status IN ('queued', 'running', 'succeeded', 'failed', 'cancelled')) NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    params TEXT,
+                    result TEXT,
+                    error TEXT,
+                    submitted_by INTEGER,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    FOREIGN KEY (submitted_by) REFERENCES users (user_id)
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user_created ON jobs (submitted_by, created_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+
+# Allocation tables rebuilt with ON DELETE CASCADE: columns copied, the
+# parent each foreign key column must exist in, and the new definition
+CASCADE_TABLES = {
+    'faculty_duties': (
+        "duty_id, faculty_id, exam_id, duties_assigned",
+        (('faculty_id', 'faculty'), ('exam_id', 'exams')),
+        '''duty_id INTEGER PRIMARY KEY AUTOINCREMENT,
+           faculty_id INTEGER NOT NULL,
+           exam_id INTEGER NOT NULL,
+           duties_assigned INTEGER DEFAULT 1,
+           FOREIGN KEY (faculty_id) REFERENCES faculty (faculty_id) ON DELETE CASCADE,
+           FOREIGN KEY (exam_id) REFERENCES exams (exam_id) ON DELETE CASCADE,
+           UNIQUE(faculty_id, exam_id)'''),
+    'duty_allocations': (
+        "allocation_id, exam_id, date, session, faculty_id, updated_at",
+        (('exam_id', 'exams'), ('faculty_id', 'faculty')),
+        '''allocation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+           exam_id INTEGER NOT NULL,
+           date DATE NOT NULL,
+           session TEXT NOT NULL,
+           faculty_id INTEGER NOT NULL,
+           updated_at TEXT,
+           FOREIGN KEY (exam_id) REFERENCES exams (exam_id) ON DELETE CASCADE,
+           FOREIGN KEY (faculty_id) REFERENCES faculty (faculty_id) ON DELETE CASCADE,
+           UNIQUE(exam_id, faculty_id, date, session)'''),
+    'exam_hall_allocations': (
+        "allocation_id, exam_id, hall_id, updated_at",
+        (('exam_id', 'exams'), ('hall_id', 'halls')),
+        '''allocation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+           exam_id INTEGER NOT NULL,
+           hall_id INTEGER NOT NULL,
+           updated_at TEXT,
+           FOREIGN KEY (exam_id) REFERENCES exams (exam_id) ON DELETE CASCADE,
+           FOREIGN KEY (hall_id) REFERENCES halls (hall_id) ON DELETE CASCADE,
+           UNIQUE(exam_id, hall_id)'''),
+}
+
+def _add_cascading_foreign_keys(c):
+    """Version 8: allocations are deleted with their exam, faculty member or hall"""
+    # SQLite cannot change a constraint in place, so each table is rebuilt.
+    # Every trigger is dropped first and recreated last, so none fire for the
+    # copied rows or refer to a table while it is being swapped. Rows whose
+    # parent is already gone could never satisfy the new constraint; they are
+    # dropped with a tombstone and the report tables are rebuilt afterwards.
+    tables = tuple(CASCADE_TABLES)
+    placeholders = ", ".join("?" * len(tables))
+    triggers = c.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' ORDER BY rowid").fetchall()
+    indexes = c.execute(f"""
+        SELECT sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+    """, tables).fetchall()
+    sequences = dict(c.execute(f"SELECT name, seq FROM sqlite_sequence WHERE name IN ({placeholders})", tables).fetchall())
+    for name, _ in triggers:
+        c.execute(f"DROP TRIGGER {name}")
+
+    for table, (columns, parents, definition) in CASCADE_TABLES.items():
+        valid = " AND ".join(f"{column} IN (SELECT {column} FROM {parent})" for column, parent in parents)
+        if table in TRACKED_TABLES:
+            key = TRACKED_TABLES[table]
+            c.execute(f"""
+                INSERT INTO deleted_rows (table_name, row_id, deleted_at)
+                SELECT '{table}', {key}, {NOW} FROM {table} WHERE NOT ({valid})
+            """)
+        c.execute(f"CREATE TABLE new_{table} ({definition})")
+        c.execute(f"INSERT INTO new_{table} ({columns}) SELECT {columns} FROM {table} WHERE {valid}")
+        c.execute(f"DROP TABLE {table}")
+        c.execute(f"ALTER TABLE new_{table} RENAME TO {table}")
+        # Keep AUTOINCREMENT from handing out ids of rows deleted before the rebuild
+        if table in sequences:
+            c.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+            c.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, sequences[table]))
+
+    for (sql,) in indexes:
+        c.execute(sql)
+    for _, sql in triggers:
+        c.execute(sql)
+    for name in ('trg_report_exam_delete_halls', 'trg_report_exam_delete'):
+        replace_trigger(c, name)
+    rebuild_report_aggregates(c)
+
+    for table in tables:
+        problems = c.execute(f"PRAGMA foreign_key_check({table})").fetchall()
+        if problems:
+            raise sqlite3.IntegrityError(f"{len(problems)} row(s) of {table} still violate their foreign keys")
+
+# Archive copies of the live tables, each row tagged with the semester it was closed in
+ARCHIVE_TABLES = {
+    'archived_exams': '''exam_id INTEGER PRIMARY KEY,
+                         exam_type TEXT NOT NULL,
+                         date DATE NOT NULL,
+                         session TEXT NOT NULL,
+                         invigilators_required INTEGER NOT NULL,
+                         course_code TEXT,
+                         course_name TEXT,
+                         students_count INTEGER NOT NULL DEFAULT 0,
+                         updated_at TEXT''',
+    'archived_duty_allocations': '''allocation_id INTEGER PRIMARY KEY,
+                                    exam_id INTEGER NOT NULL,
+                                    date DATE NOT NULL,
+                                    session TEXT NOT NULL,
+                                    faculty_id INTEGER NOT NULL,
+                                    updated_at TEXT''',
+    'archived_faculty_duties': '''duty_id INTEGER PRIMARY KEY,
+                                  faculty_id INTEGER NOT NULL,
+                                  exam_id INTEGER NOT NULL,
+                                  duties_assigned INTEGER DEFAULT 1''',
+    'archived_exam_hall_allocations': '''allocation_id INTEGER PRIMARY KEY,
+                                         exam_id INTEGER NOT NULL,
+                                         hall_id INTEGER NOT NULL,
+                                         updated_at TEXT''',
+}
+
+def _add_semester_archive(c):
+    """Version 9: closed semesters and the exams, allocations and workloads moved out of the live tables"""
+    c.execute('''CREATE TABLE IF NOT EXISTS semesters (
+                    semester_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    label TEXT NOT NULL UNIQUE,
+                    cutoff_date DATE NOT NULL,
+                    closed_at TEXT NOT NULL,
+                    exam_count INTEGER NOT NULL DEFAULT 0,
+                    assignment_count INTEGER NOT NULL DEFAULT 0
+                )''')
+    for table, columns in ARCHIVE_TABLES.items():
+        c.execute(f'''CREATE TABLE IF NOT EXISTS {table} (
+                    semester_id INTEGER NOT NULL REFERENCES semesters (semester_id),
+                    {columns}
+                )''')
+    # Workload of every faculty member as it stood when the semester closed
+    c.execute('''CREATE TABLE IF NOT EXISTS archived_faculty (
+                    semester_id INTEGER NOT NULL REFERENCES semesters (semester_id),
+                    faculty_id INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    designation TEXT NOT NULL,
+                    department TEXT NOT NULL,
+                    total_duties INTEGER,
+                    remaining_duties INTEGER,
+                    PRIMARY KEY (semester_id, faculty_id)
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_archived_exams_semester_date ON archived_exams (semester_id, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_archived_duty_allocations_exam ON archived_duty_allocations (exam_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_archived_duty_allocations_semester_faculty ON archived_duty_allocations (semester_id, faculty_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_archived_faculty_duties_exam ON archived_faculty_duties (exam_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_archived_exam_hall_allocations_exam ON archived_exam_hall_allocations (exam_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_archived_exam_hall_allocations_semester_hall ON archived_exam_hall_allocations (semester_id, hall_id)")
+
+def _add_faculty_leave(c):
+    """Version 10: date ranges a faculty member is away, whose duties go to substitutes"""
+    c.execute('''CREATE TABLE IF NOT EXISTS faculty_leave (
+                    leave_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    faculty_id INTEGER NOT NULL REFERENCES faculty (faculty_id) ON DELETE CASCADE,
+                    start_date DATE NOT NULL,
+                    end_date DATE NOT NULL,
+                    reason TEXT,
+                    created_at TEXT NOT NULL
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_faculty_leave_faculty ON faculty_leave (faculty_id, end_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_faculty_leave_end_date ON faculty_leave (end_date)")
+
+def _add_schedule_sort_indexes(c):
+    """Version 11: an index walk for every schedule sort order, so pages are never sorted"""
+    c.execute("CREATE INDEX IF NOT EXISTS idx_exams_session_date ON exams (session, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_exams_type_date ON exams (exam_type, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_exams_course_code ON exams (course_code)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_faculty_department_name ON faculty (department, name)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_faculty_designation_name ON faculty (designation, name)")
+
+def _add_job_owners(c):
+    """Version 12: the worker process running each job, so a restart only recovers its own dead jobs"""
+    c.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+
+# Tables the response cache keys pages on; every write to one bumps its row
+# in cache_generations, so all processes see it (see RESPONSE CACHE in app.py)
+CACHED_TABLES = ('faculty', 'halls', 'exams', 'duty_allocations', 'exam_hall_allocations',
+                 'faculty_duties', 'faculty_leave', 'semesters')
+
+def _add_cache_generations(c):
+    """Version 13: per-table write generations shared by every process using the file"""
+    c.execute('''CREATE TABLE IF NOT EXISTS cache_generations (
+                    table_name TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL DEFAULT 0
+                ) WITHOUT ROWID''')
+    for table in CACHED_TABLES:
+        c.execute("INSERT OR IGNORE INTO cache_generations (table_name) VALUES (?)", (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            c.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_generation_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE cache_generations SET generation = generation + 1 WHERE table_name = '{table}';
+                END""")
+
+MIGRATIONS = [
+    _create_base_schema,
+    _add_unique_indexes,
+    _add_hot_path_indexes,
+    _dedupe_faculty,
+    _add_report_aggregates,
+    _add_change_tracking,
+    _add_jobs,
+    _add_cascading_foreign_keys,
+    _add_semester_archive,
+    _add_faculty_leave,
+    _add_schedule_sort_indexes,
+    _add_job_owners,
+    _add_cache_generations,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """Bring the database up to SCHEMA_VERSION in place; returns the versions applied"""
+    applied = []
+    version = get_schema_version(conn)
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        c = conn.cursor()
+        try:
+            c.execute("BEGIN IMMEDIATE")
+            migration(c)
+            c.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(number)
+    return applied
+
+# Lookups every page depends on; none of them may fall back to a full table scan
+HOT_QUERIES = {
+    'allocations for exam': ("SELECT faculty_id FROM duty_allocations WHERE exam_id = ?", (1,)),
+    'allocations for faculty': ("SELECT exam_id FROM duty_allocations WHERE faculty_id = ?", (1,)),
+    'exams in slot': ("SELECT exam_id FROM exams WHERE date = ? AND session = ?", ('2025-01-01', 'Forenoon')),
+    'faculty busy in slot': ("""
+        SELECT da.faculty_id FROM exams e
+        JOIN duty_allocations da ON da.exam_id = e.exam_id
+        WHERE e.date = ? AND e.session = ?
+    """, ('2025-01-01', 'Forenoon')),
+    'halls booked in slot': ("""
+        SELECT eha.hall_id FROM exams e
+        JOIN exam_hall_allocations eha ON eha.exam_id = e.exam_id
+        WHERE e.date = ? AND e.session = ?
+    """, ('2025-01-01', 'Forenoon')),
+    'exams in hall': ("SELECT exam_id FROM exam_hall_allocations WHERE hall_id = ?", (1,)),
+    'halls for exam': ("SELECT hall_id FROM exam_hall_allocations WHERE exam_id = ?", (1,)),
+    'duty record': ("SELECT duties_assigned FROM faculty_duties WHERE faculty_id = ? AND exam_id = ?", (1, 1)),
+}
+
+def check_query_plans(conn):
+    """Return {query name: [plan steps]} for every hot query that scans a whole table"""
+    problems = {}
+    for name, (query, params) in HOT_QUERIES.items():
+        steps = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+        scans = [step for step in steps if step.startswith("SCAN")]
+        if scans:
+            problems[name] = steps
+    return problems
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else DB_NAME)
+
+    before = get_schema_version(conn)
+    applied = migrate(conn)
+    if applied:
+        print(f"Migrated schema from version {before} to {get_schema_version(conn)}")
+    else:
+        print(f"Schema already at version {before}")
+
+    problems = check_query_plans(conn)
+    for name, steps in problems.items():
+        print(f"Full table scan in '{name}': {'; '.join(steps)}")
+    conn.close()
+
+    if problems:
+        sys.exit(1)
+    print("All hot queries use indexes")
@@ -0,0 +1,215 @@
+import sqlite3
+import sys
+
+DB_NAME = "seating.db"
+
+# Summary tables behind /reports, kept current by triggers on the tables they
+# summarise so every write path (forms, imports, auto-allocation, migrations)
+# maintains them without knowing they exist. Each aggregate is also defined as
+# a plain GROUP BY over the source tables, used to rebuild it and to check it
+# for drift.
+
+AGGREGATES = {
+    'report_department_stats': {
+        'keys': ('department',),
+        'values': ('faculty_count', 'total_duties', 'completed_duties', 'utilization_sum', 'utilization_count'),
+        'schema': '''department TEXT PRIMARY KEY,
+                     faculty_count INTEGER NOT NULL DEFAULT 0,
+                     total_duties INTEGER NOT NULL DEFAULT 0,
+                     completed_duties INTEGER NOT NULL DEFAULT 0,
+                     utilization_sum REAL NOT NULL DEFAULT 0,
+                     utilization_count INTEGER NOT NULL DEFAULT 0''',
+        'rebuild': '''
+            SELECT department, COUNT(*), SUM(COALESCE(total_duties, 0)),
+                   SUM(COALESCE(total_duties - remaining_duties, 0)),
+                   SUM(COALESCE(utilization, 0)), COUNT(utilization)
+            FROM (SELECT department, total_duties, remaining_duties,
+                         (total_duties - remaining_duties) * 100.0 / total_duties AS utilization
+                  FROM faculty)
+            GROUP BY department
+        ''',
+    },
+    'report_faculty_stats': {
+        'keys': ('faculty_id',),
+        'values': ('exams_assigned',),
+        'schema': '''faculty_id INTEGER PRIMARY KEY,
+                     exams_assigned INTEGER NOT NULL DEFAULT 0''',
+        'rebuild': '''
+            SELECT faculty_id, COUNT(*) FROM duty_allocations GROUP BY faculty_id
+        ''',
+    },
+    'report_hall_stats': {
+        'keys': ('date', 'hall_id'),
+        'values': ('exam_count',),
+        'schema': '''date DATE NOT NULL,
+                     hall_id INTEGER NOT NULL,
+                     exam_count INTEGER NOT NULL DEFAULT 0,
+                     PRIMARY KEY (date, hall_id)''',
+        'rebuild': '''
+            SELECT e.date, eha.hall_id, COUNT(*)
+            FROM exam_hall_allocations eha
+            JOIN exams e ON eha.exam_id = e.exam_id
+            GROUP BY e.date, eha.hall_id
+        ''',
+    },
+    'report_monthly_stats': {
+        'keys': ('month',),
+        'values': ('exam_count', 'total_students', 'assignment_count'),
+        'schema': '''month TEXT PRIMARY KEY,
+                     exam_count INTEGER NOT NULL DEFAULT 0,
+                     total_students INTEGER NOT NULL DEFAULT 0,
+                     assignment_count INTEGER NOT NULL DEFAULT 0''',
+        'rebuild': '''
+            SELECT month, SUM(exams), SUM(students), SUM(assignments)
+            FROM (SELECT strftime('%Y-%m', date) AS month, 1 AS exams, students_count AS students, 0 AS assignments
+                  FROM exams
+                  UNION ALL
+                  SELECT strftime('%Y-%m', date), 0, 0, 1 FROM duty_allocations)
+            WHERE month IS NOT NULL
+            GROUP BY month
+        ''',
+    },
+}
+
+def _delta(table, select):
+    """Add the rows produced by select (keys then signed value deltas) into table"""
+    spec = AGGREGATES[table]
+    columns = spec['keys'] + spec['values']
+    keys_present = " AND ".join(f"{key} IS NOT NULL" for key in spec['keys'])
+    updates = ", ".join(f"{value} = {value} + excluded.{value}" for value in spec['values'])
+    return f"""
+        INSERT INTO {table} ({", ".join(columns)})
+        SELECT * FROM ({select}) WHERE {keys_present}
+        ON CONFLICT ({", ".join(spec['keys'])}) DO UPDATE SET {updates};"""
+
+def _prune(table, where):
+    """Drop groups that no longer summarise anything"""
+    empty = " AND ".join(f"{value} = 0" for value in AGGREGATES[table]['values'])
+    return f"\n        DELETE FROM {table} WHERE {where} AND {empty};"
+
+def _department(row, sign):
+    utilization = f"({row}.total_duties - {row}.remaining_duties) * 100.0 / {row}.total_duties"
+    return _delta('report_department_stats', f"""
+        SELECT {row}.department, {sign}, {sign} * COALESCE({row}.total_duties, 0),
+               {sign} * COALESCE({row}.total_duties - {row}.remaining_duties, 0),
+               {sign} * COALESCE({utilization}, 0), {sign} * ({utilization} IS NOT NULL)""")
+
+def _faculty(row, sign):
+    return _delta('report_faculty_stats', f"SELECT {row}.faculty_id, {sign}")
+
+def _assignment_month(row, sign):
+    return _delta('report_monthly_stats', f"SELECT strftime('%Y-%m', {row}.date) AS month, 0, 0, {sign}")
+
+def _exam_month(row, sign):
+    return _delta('report_monthly_stats', f"SELECT strftime('%Y-%m', {row}.date) AS month, {sign}, {sign} * {row}.students_count, 0")
+
+def _hall_booking(row, sign):
+    return _delta('report_hall_stats', f"""
+        SELECT date, {row}.hall_id, {sign} FROM exams WHERE exam_id = {row}.exam_id""")
+
+def _exam_halls(row, sign):
+    return _delta('report_hall_stats', f"""
+        SELECT {row}.date, hall_id, {sign} FROM exam_hall_allocations WHERE exam_id = {row}.exam_id""")
+
+_MONTH = "month = strftime('%Y-%m', {row}.date)"
+_HALL_DAY = "date = (SELECT date FROM exams WHERE exam_id = {row}.exam_id) AND hall_id = {row}.hall_id"
+
+TRIGGERS = {
+    'trg_report_faculty_insert': ("AFTER INSERT ON faculty",
+        _department('NEW', 1)),
+    'trg_report_faculty_delete': ("AFTER DELETE ON faculty",
+        _department('OLD', -1) + _prune('report_department_stats', "department = OLD.department")),
+    'trg_report_faculty_update': ("AFTER UPDATE OF department, total_duties, remaining_duties ON faculty",
+        _department('OLD', -1) + _department('NEW', 1) + _prune('report_department_stats', "department = OLD.department")),
+
+    'trg_report_duty_insert': ("AFTER INSERT ON duty_allocations",
+        _faculty('NEW', 1) + _assignment_month('NEW', 1)),
+    'trg_report_duty_delete': ("AFTER DELETE ON duty_allocations",
+        _faculty('OLD', -1) + _assignment_month('OLD', -1)
+        + _prune('report_faculty_stats', "faculty_id = OLD.faculty_id")
+        + _prune('report_monthly_stats', _MONTH.format(row='OLD'))),
+    'trg_report_duty_update': ("AFTER UPDATE OF faculty_id, date ON duty_allocations",
+        _faculty('OLD', -1) + _assignment_month('OLD', -1) + _faculty('NEW', 1) + _assignment_month('NEW', 1)
+        + _prune('report_faculty_stats', "faculty_id = OLD.faculty_id")
+        + _prune('report_monthly_stats', _MONTH.format(row='OLD'))),
+
+    'trg_report_hall_insert': ("AFTER INSERT ON exam_hall_allocations",
+        _hall_booking('NEW', 1)),
+    'trg_report_hall_delete': ("AFTER DELETE ON exam_hall_allocations",
+        _hall_booking('OLD', -1) + _prune('report_hall_stats', _HALL_DAY.format(row='OLD'))),
+    'trg_report_hall_update': ("AFTER UPDATE OF exam_id, hall_id ON exam_hall_allocations",
+        _hall_booking('OLD', -1) + _hall_booking('NEW', 1) + _prune('report_hall_stats', _HALL_DAY.format(row='OLD'))),
+
+    'trg_report_exam_insert': ("AFTER INSERT ON exams",
+        _exam_month('NEW', 1)),
+    # Hall bookings are counted off before the exam goes: ON DELETE CASCADE
+    # removes them ahead of AFTER triggers, when their date can no longer be looked up
+    'trg_report_exam_delete_halls': ("BEFORE DELETE ON exams",
+        _exam_halls('OLD', -1)),
+    'trg_report_exam_delete': ("AFTER DELETE ON exams",
+        _exam_month('OLD', -1)
+        + _prune('report_monthly_stats', _MONTH.format(row='OLD'))
+        + _prune('report_hall_stats', "date = OLD.date")),
+    'trg_report_exam_update': ("AFTER UPDATE OF date, students_count ON exams",
+        _exam_month('OLD', -1) + _exam_halls('OLD', -1) + _exam_month('NEW', 1) + _exam_halls('NEW', 1)
+        + _prune('report_monthly_stats', _MONTH.format(row='OLD'))
+        + _prune('report_hall_stats', "date = OLD.date")),
+}
+
+def install_report_aggregates(c):
+    """Create the summary tables and their triggers, then fill them from the source tables"""
+    for table, spec in AGGREGATES.items():
+        c.execute(f"CREATE TABLE IF NOT EXISTS {table} ({spec['schema']})")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_report_hall_stats_hall ON report_hall_stats (hall_id)")
+    for name, (event, body) in TRIGGERS.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body}\n        END")
+    rebuild_report_aggregates(c)
+
+def replace_trigger(c, name):
+    """Drop and recreate one trigger from TRIGGERS, for migrations that change its definition"""
+    event, body = TRIGGERS[name]
+    c.execute(f"DROP TRIGGER IF EXISTS {name}")
+    c.execute(f"CREATE TRIGGER {name} {event} BEGIN {body}\n        END")
+
+def rebuild_report_aggregates(c):
+    """Recompute every summary table from scratch; the caller commits"""
+    for table, spec in AGGREGATES.items():
+        columns = ", ".join(spec['keys'] + spec['values'])
+        c.execute(f"DELETE FROM {table}")
+        c.execute(f"INSERT INTO {table} ({columns}) {spec['rebuild']}")
+
+def check_report_aggregates(conn):
+    """Return (table, key, expected, stored) for every group that has drifted from its source"""
+    drift = []
+    for table, spec in AGGREGATES.items():
+        width = len(spec['keys'])
+        columns = ", ".join(spec['keys'] + spec['values'])
+        expected = {tuple(row[:width]): tuple(row[width:]) for row in conn.execute(spec['rebuild'])}
+        stored = {tuple(row[:width]): tuple(row[width:]) for row in conn.execute(f"SELECT {columns} FROM {table}")}
+        for key in sorted(set(expected) | set(stored), key=repr):
+            want = expected.get(key)
+            have = stored.get(key)
+            # utilization_sum is a running float total, so compare it rounded
+            if want is None or have is None or [round(v, 6) for v in want] != [round(v, 6) for v in have]:
+                drift.append((table, key, want, have))
+    return drift
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    conn = sqlite3.connect(args[0] if args else DB_NAME)
+
+    drift = check_report_aggregates(conn)
+    for table, key, expected, stored in drift[:50]:
+        print(f"{table} {key}: expected {expected}, stored {stored}")
+
+    if "--rebuild" in sys.argv:
+        rebuild_report_aggregates(conn)
+        conn.commit()
+        print(f"Rebuilt report aggregates ({len(drift)} group(s) had drifted)")
+    elif drift:
+        conn.close()
+        print(f"{len(drift)} report aggregate group(s) have drifted; run with --rebuild to fix")
+        sys.exit(1)
+    else:
+        print("Report aggregates match the source tables")
+    conn.close()
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# The app creates and migrates DB_NAME on import; point it at a scratch file
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DB_NAME', os.path.join(tempfile.mkdtemp(), 'test_seating.db'))
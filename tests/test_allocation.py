@@ -0,0 +1,52 @@
+import sqlite3
+
+import app as appmod
+
+DATE = '2030-01-15'
+
+
+def add_exam(conn, course_code, session='Forenoon'):
+    return conn.execute("""
+        INSERT INTO exams (exam_type, date, session, invigilators_required, course_code, course_name, students_count)
+        VALUES ('End Sem', ?, ?, 1, ?, ?, 30)
+    """, (DATE, session, course_code, course_code)).lastrowid
+
+
+def test_batch_sees_conflict_committed_after_index_was_loaded():
+    with appmod.app.app_context():
+        conn = appmod.get_db_connection()
+        first = add_exam(conn, 'RACE101')
+        second = add_exam(conn, 'RACE102')
+        faculty_id = conn.execute("SELECT faculty_id FROM faculty WHERE is_available = TRUE LIMIT 1").fetchone()[0]
+        conn.commit()
+        appmod.load_busy_slots()
+
+        # Another worker books the same slot; this process's index never hears of it
+        other = sqlite3.connect(appmod.DB_NAME)
+        other.execute("INSERT INTO duty_allocations (exam_id, date, session, faculty_id) VALUES (?, ?, 'Forenoon', ?)",
+                      (first, DATE, faculty_id))
+        other.commit()
+        other.close()
+        assert appmod.busy_faculty_counts(DATE, 'Forenoon').get(faculty_id, 0) == 0
+
+        exam = conn.execute("SELECT * FROM exams WHERE exam_id = ?", (second,)).fetchone()
+        conn.execute("BEGIN IMMEDIATE")
+        results = appmod.assign_faculty_batch(conn, exam, [faculty_id])
+        conn.rollback()
+
+        assert results[0]['status'] == 'error'
+        assert 'Already has a duty' in results[0]['message']
+
+
+def test_snapshot_reads_busy_slots_from_the_database():
+    with appmod.app.app_context():
+        conn = appmod.get_db_connection()
+        exam_id = add_exam(conn, 'RACE201', 'Afternoon')
+        faculty_id = conn.execute("SELECT faculty_id FROM faculty WHERE is_available = TRUE LIMIT 1").fetchone()[0]
+        conn.execute("INSERT INTO duty_allocations (exam_id, date, session, faculty_id) VALUES (?, ?, 'Afternoon', ?)",
+                     (exam_id, DATE, faculty_id))
+        conn.commit()
+
+        _, _, busy_slots = appmod.load_allocation_snapshot(conn, DATE, DATE)
+
+        assert faculty_id in busy_slots[(DATE, 'Afternoon')]
@@ -0,0 +1,69 @@
+from email.utils import formatdate
+
+import pytest
+
+import app as appmod
+
+SINCE = '2000-01-01T00:00:00Z'
+
+
+@pytest.fixture
+def client():
+    appmod.app.config['TESTING'] = True
+    client = appmod.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['username'] = 'admin'
+        sess['role'] = 'admin'
+    return client
+
+
+def add_exams(count):
+    conn = appmod.open_db_connection()
+    ids = [conn.execute("""
+        INSERT INTO exams (exam_type, date, session, invigilators_required, course_code, course_name, students_count)
+        VALUES ('Mid Term', '2031-03-10', 'Afternoon', 1, ?, 'API', 20)
+    """, (f'API{number}',)).lastrowid for number in range(count)]
+    conn.commit()
+    conn.close()
+    return ids
+
+
+def delete_exams(ids):
+    conn = appmod.open_db_connection()
+    conn.executemany("DELETE FROM exams WHERE exam_id = ?", [(exam_id,) for exam_id in ids])
+    conn.commit()
+    conn.close()
+
+
+def test_change_within_the_same_second_is_not_a_304(client):
+    add_exams(1)
+    first = client.get('/api/v1/exams')
+    assert first.status_code == 200
+    assert client.get('/api/v1/exams', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    add_exams(1)
+    headers = {'If-None-Match': first.headers['ETag'], 'If-Modified-Since': formatdate(usegmt=True)}
+    assert client.get('/api/v1/exams', headers=headers).status_code == 200
+    assert client.get('/api/v1/exams', headers={'If-Modified-Since': formatdate(usegmt=True)}).status_code == 200
+
+
+def test_deleted_ids_are_paged_with_the_rows(client):
+    deleted = add_exams(5)
+    delete_exams(deleted)
+
+    seen = []
+    url = f'/api/v1/exams?since={SINCE}&limit=2'
+    cursor = None
+    for _ in range(100):
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        body = response.get_json()
+        assert len(body['data']) <= 2 and len(body['deleted']) <= 2
+        seen.extend(body['deleted'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+
+    assert set(deleted) <= set(seen)
+    assert len(seen) == len(set(seen))
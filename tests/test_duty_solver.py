@@ -0,0 +1,70 @@
+import random
+
+from duty_solver import solve_balanced_allocation
+from app import plan_balanced_allocation, plan_invigilator_allocation, DUTY_REQUIREMENTS
+
+EXAM_TYPES = {duties: exam_type for exam_type, duties in DUTY_REQUIREMENTS.items()}
+
+
+def test_failed_search_does_not_prune_movers():
+    # X reaches the weight-1 class only as a mover behind Y, then fails;
+    # Y must still be tried for the weight-2 exam on its own
+    exams = [(1, '2026-01-01', 'Forenoon', 1, 1), (2, '2026-01-02', 'Forenoon', 1, 2)]
+    faculty = [('X', 10, 5), ('Y', 3, 3)]
+    busy = {('2026-01-02', 'Forenoon'): {'X'}}
+
+    plan, shortfalls = solve_balanced_allocation(exams, faculty, busy)
+
+    assert shortfalls == {}
+    assert sorted(exam_id for exam_id, *_ in plan) == [1, 2]
+
+
+def random_instance(seed):
+    rnd = random.Random(seed)
+    slots = [(f'2026-01-0{day}', session) for day in range(1, rnd.randint(2, 5))
+             for session in ('Forenoon', 'Afternoon')]
+    exams = []
+    for exam_id in range(rnd.randint(1, 10)):
+        date, session = rnd.choice(slots)
+        exams.append({'exam_id': exam_id, 'exam_type': EXAM_TYPES[rnd.choice([1, 2])], 'date': date,
+                      'session': session, 'invigilators_required': rnd.randint(1, 3), 'assigned': 0})
+    faculty = []
+    for faculty_id in range(rnd.randint(1, 8)):
+        total = rnd.randint(1, 6)
+        faculty.append({'faculty_id': faculty_id, 'total_duties': total, 'remaining_duties': rnd.randint(0, total)})
+    busy = {}
+    for f in faculty:
+        for slot in slots:
+            if rnd.random() < 0.2:
+                busy.setdefault(slot, set()).add(f['faculty_id'])
+    return exams, faculty, busy
+
+
+def test_balanced_never_staffs_fewer_seats_than_greedy():
+    exams = [{'exam_id': 1, 'exam_type': EXAM_TYPES[1], 'date': '2026-01-01', 'session': 'Forenoon',
+              'invigilators_required': 1, 'assigned': 0},
+             {'exam_id': 2, 'exam_type': EXAM_TYPES[2], 'date': '2026-01-02', 'session': 'Forenoon',
+              'invigilators_required': 1, 'assigned': 0}]
+    faculty = [{'faculty_id': 'X', 'total_duties': 10, 'remaining_duties': 5},
+               {'faculty_id': 'Y', 'total_duties': 3, 'remaining_duties': 3}]
+    busy = {('2026-01-02', 'Forenoon'): {'X'}}
+    cases = [(exams, faculty, busy)] + [random_instance(seed) for seed in range(500)]
+
+    for exams, faculty, busy in cases:
+        balanced, _ = plan_balanced_allocation(exams, faculty, busy)
+        greedy, _ = plan_invigilator_allocation(exams, faculty, busy)
+        assert len(balanced) >= len(greedy)
+
+
+def test_balanced_plan_respects_budgets_and_slots():
+    for seed in range(500):
+        exams, faculty, busy = random_instance(seed)
+        plan, _ = plan_balanced_allocation(exams, faculty, busy)
+
+        remaining = {f['faculty_id']: f['remaining_duties'] for f in faculty}
+        taken = {slot: set(ids) for slot, ids in busy.items()}
+        for exam_id, date, session, faculty_id, duties in plan:
+            remaining[faculty_id] -= duties
+            assert faculty_id not in taken.setdefault((date, session), set())
+            taken[(date, session)].add(faculty_id)
+        assert min(remaining.values(), default=0) >= 0
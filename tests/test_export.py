@@ -0,0 +1,20 @@
+import pytest
+
+import app as appmod
+
+
+@pytest.mark.parametrize('accept_encoding, gzipped', [
+    ('gzip', True),
+    ('deflate, gzip;q=0.5', True),
+    ('gzip;q=0', False),
+    ('x-gzip-not-really', False),
+    ('identity', False),
+])
+def test_export_gzips_only_when_the_client_accepts_it(accept_encoding, gzipped):
+    client = appmod.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+    response = client.get('/export_schedule', headers={'Accept-Encoding': accept_encoding})
+    response.get_data()
+    assert response.status_code == 200
+    assert (response.headers.get('Content-Encoding') == 'gzip') == gzipped
@@ -0,0 +1,43 @@
+import random
+
+from hall_packing import pack_halls, pack_session
+
+
+def halls_of(*capacities):
+    return [{'hall_id': index, 'capacity': cap} for index, cap in enumerate(capacities, 1)]
+
+
+def seated(allocation, exam_id):
+    return sum(hall['capacity'] for hall in allocation[exam_id])
+
+
+def test_pack_halls_prefers_fewest_halls_then_fewest_empty_seats():
+    chosen = pack_halls(100, halls_of(60, 50, 40, 120))
+    assert [hall['capacity'] for hall in chosen] == [120]
+
+
+def test_session_seats_everyone_when_exam_by_exam_packing_falls_short():
+    # Both greedy orders strand exam 0 here; only a joint split seats both
+    exams = [(0, 117), (1, 137)]
+    halls = halls_of(30, 70, 17, 23, 80, 35)
+
+    allocation, shortfalls = pack_session(exams, halls)
+
+    assert shortfalls == {}
+    assert seated(allocation, 0) >= 117 and seated(allocation, 1) >= 137
+    used = [hall['hall_id'] for chosen in allocation.values() for hall in chosen]
+    assert len(used) == len(set(used))
+
+
+def test_session_never_shares_a_hall_and_reports_true_shortfalls():
+    for seed in range(300):
+        rnd = random.Random(seed)
+        halls = halls_of(*(rnd.choice([17, 23, 30, 35, 45, 60, 80]) for _ in range(rnd.randint(1, 7))))
+        exams = [(exam_id, rnd.randint(10, 150)) for exam_id in range(rnd.randint(1, 4))]
+
+        allocation, shortfalls = pack_session(exams, halls)
+
+        used = [hall['hall_id'] for chosen in allocation.values() for hall in chosen]
+        assert len(used) == len(set(used))
+        for exam_id, seats in exams:
+            assert shortfalls.get(exam_id, 0) == max(seats - seated(allocation, exam_id), 0)
@@ -0,0 +1,83 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import app as appmod
+import job_runner
+from job_runner import JobRunner
+
+
+def add_job(conn, owner, status='running'):
+    job_id = uuid.uuid4().hex
+    conn.execute("""
+        INSERT INTO jobs (job_id, kind, status, progress, created_at, owner)
+        VALUES (?, 'export_schedule', ?, 0, '2030-01-01 00:00:00', ?)
+    """, (job_id, status, owner))
+    return job_id
+
+
+def test_recover_fails_only_jobs_whose_owner_is_gone():
+    runner = JobRunner(appmod.open_db_connection)
+    host = socket.gethostname()
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+
+    conn = appmod.open_db_connection()
+    jobs = {
+        'own live': add_job(conn, runner.owner),
+        'own earlier token': add_job(conn, f"{host}|{os.getpid()}|oldtoken", 'queued'),
+        'exited process': add_job(conn, f"{host}|{exited.pid}|token"),
+        'other live process': add_job(conn, f"{host}|{os.getppid()}|token"),
+        'other host': add_job(conn, f"elsewhere.example|{exited.pid}|token"),
+        'no owner': add_job(conn, None),
+    }
+    conn.commit()
+
+    runner.recover()
+
+    statuses = {name: conn.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()[0]
+                for name, job_id in jobs.items()}
+    conn.close()
+    assert statuses == {
+        'own live': 'running',
+        'own earlier token': 'failed',
+        'exited process': 'failed',
+        'other live process': 'running',
+        'other host': 'running',
+        'no owner': 'failed',
+    }
+
+
+def test_submit_does_not_block_a_running_job_reporting_progress(monkeypatch):
+    monkeypatch.setattr(job_runner, 'STATUS_WRITE_TIMEOUT_MS', 3000)
+    runner = JobRunner(appmod.open_db_connection, max_workers=2)
+    writing = threading.Event()
+
+    @runner.job('hold_write_lock')
+    def hold_write_lock(job):
+        conn = appmod.open_db_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        writing.set()
+        time.sleep(0.2)
+        job.progress(0.5, "Halfway")
+        conn.commit()
+        conn.close()
+
+    @runner.job('read_only', writes=False)
+    def read_only(job):
+        return 'done'
+
+    first = runner.submit('hold_write_lock', {})
+    assert writing.wait(5)
+    started = time.monotonic()
+    second = runner.submit('read_only', {})
+    assert time.monotonic() - started < 2
+
+    for job_id in (first, second):
+        while runner.get(job_id)['status'] in job_runner.ACTIVE_STATUSES:
+            time.sleep(0.02)
+        assert runner.get(job_id)['status'] == 'succeeded'
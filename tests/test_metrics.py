@@ -0,0 +1,30 @@
+import app as appmod
+
+
+def test_metrics_need_a_login_even_from_localhost(monkeypatch):
+    monkeypatch.setitem(appmod.app.config, 'METRICS_TOKEN', '')
+    client = appmod.app.test_client()
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '127.0.0.1'}).status_code == 401
+
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+    assert client.get('/metrics').status_code == 200
+
+
+def test_metrics_accept_the_bearer_token(monkeypatch):
+    monkeypatch.setitem(appmod.app.config, 'METRICS_TOKEN', 'scrape-secret')
+    client = appmod.app.test_client()
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
+
+
+def test_slowest_statement_is_labelled_by_endpoint_only(monkeypatch):
+    monkeypatch.setitem(appmod.app.config, 'METRICS_TOKEN', 'scrape-secret')
+    client = appmod.app.test_client()
+    client.get('/login')
+    text = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'}).get_data(as_text=True)
+
+    slowest = [line for line in text.splitlines() if line.startswith('invigilation_slowest_sql_seconds{')]
+    assert slowest
+    assert all(line.startswith('invigilation_slowest_sql_seconds{endpoint="') and 'statement' not in line
+               for line in slowest)
@@ -0,0 +1,149 @@
+import re
+import sqlite3
+
+import pytest
+
+import app as appmod
+import migrations
+
+# Tables that grow with every exam; reading one end to end is a full scan
+HOT_TABLES = {'exams', 'duty_allocations', 'faculty_duties', 'exam_hall_allocations'}
+
+DATE_FILTER = 'start_date=2030-01-01&end_date=2030-01-31'
+
+
+def table_aliases(sql):
+    """{alias or table name: table} for every table the statement reads"""
+    aliases = {}
+    for table, alias in re.findall(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.IGNORECASE):
+        aliases[table] = table
+        if alias and alias.upper() not in ('ON', 'WHERE', 'JOIN', 'LEFT', 'CROSS', 'INNER', 'GROUP', 'ORDER', 'LIMIT', 'USING'):
+            aliases[alias] = table
+    return aliases
+
+
+def plan(conn, sql, params=()):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def hot_scans(sql, steps, indexed_ok):
+    """Plan steps that read a hot table from end to end"""
+    aliases = table_aliases(sql)
+    scans = []
+    for step in steps:
+        match = re.match(r'SCAN (\w+)', step)
+        if not match or aliases.get(match.group(1)) not in HOT_TABLES:
+            continue
+        if indexed_ok and 'INDEX' in step:
+            continue
+        scans.append(step)
+    return scans
+
+
+@pytest.fixture
+def client():
+    appmod.app.config['TESTING'] = True
+    client = appmod.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['username'] = 'admin'
+        sess['role'] = 'admin'
+    return client
+
+
+@pytest.fixture
+def route_sql(monkeypatch):
+    """Run a route and return every SELECT it issued, with its parameters bound"""
+    seen = []
+    connect = appmod.get_db_connection
+
+    def traced_connection():
+        conn = connect()
+        conn.set_trace_callback(seen.append)
+        return conn
+
+    monkeypatch.setattr(appmod, 'get_db_connection', traced_connection)
+
+    def run(client, url):
+        # A cached page would answer without touching the database
+        appmod.bump_table_versions()
+        seen.clear()
+        response = client.get(url)
+        response.get_data()
+        assert response.status_code == 200, url
+        return [sql for sql in seen if sql.lstrip().upper().startswith(('SELECT', 'WITH'))]
+
+    return run
+
+
+@pytest.fixture
+def exam_id():
+    conn = appmod.open_db_connection()
+    exam_id = conn.execute("""
+        INSERT INTO exams (exam_type, date, session, invigilators_required, course_code, course_name, students_count)
+        VALUES ('End Sem', '2030-01-20', 'Forenoon', 2, 'PLAN101', 'Plans', 40)
+    """).lastrowid
+    conn.commit()
+    conn.close()
+    return exam_id
+
+
+def test_hot_queries_use_indexes():
+    conn = sqlite3.connect(':memory:')
+    migrations.migrate(conn)
+    assert migrations.check_query_plans(conn) == {}
+
+
+def test_schedule_pages_walk_an_index_in_order():
+    conn = appmod.open_db_connection()
+    for sort_by in appmod.SCHEDULE_SORT_KEYS:
+        _, keys = appmod.schedule_sort_keys(sort_by)
+        for direction, comparison in (('ASC', '>'), ('DESC', '<')):
+            first = appmod.schedule_page_sql(sort_by, direction)
+            values = ['x'] * (len(keys) - 2) + [1, 1]
+            condition, params = appmod.keyset_condition(keys, values, comparison, appmod.SCHEDULE_NULLABLE_KEYS)
+            later = appmod.schedule_page_sql(sort_by, direction, keyset=f" AND {condition}")
+            for sql, sql_params in ((first, [50]), (later, [*params, 50])):
+                steps = plan(conn, sql, sql_params)
+                assert not any('TEMP B-TREE' in step for step in steps), (sort_by, direction, steps)
+                assert not hot_scans(sql, steps, indexed_ok=True), (sort_by, direction, steps)
+    conn.close()
+
+
+@pytest.mark.parametrize('url', [
+    '/schedule',
+    '/schedule?sort_by=department&sort_order=desc',
+    '/reports',
+    '/export_schedule?gzip=0',
+    '/assign_invigilators/{exam_id}',
+])
+def test_routes_never_scan_hot_tables_without_an_index(client, route_sql, exam_id, url):
+    conn = appmod.open_db_connection()
+    statements = route_sql(client, url.format(exam_id=exam_id))
+    assert statements
+    for sql in statements:
+        assert not hot_scans(sql, plan(conn, sql), indexed_ok=True), sql
+    conn.close()
+
+
+@pytest.mark.parametrize('url', [
+    '/schedule?' + DATE_FILTER,
+    '/schedule?sort_by=faculty_name&' + DATE_FILTER,
+    '/reports?date_from=2030-01-01&date_to=2030-01-31',
+    '/export_schedule?gzip=0&' + DATE_FILTER,
+])
+def test_date_filtered_routes_only_search_hot_tables(client, route_sql, exam_id, url):
+    conn = appmod.open_db_connection()
+    statements = route_sql(client, url)
+    assert statements
+    for sql in statements:
+        assert not hot_scans(sql, plan(conn, sql), indexed_ok=False), sql
+    conn.close()
+
+
+@pytest.mark.parametrize('sort_by', list(appmod.SCHEDULE_SORT_KEYS))
+def test_unfiltered_schedule_route_needs_no_sort(client, route_sql, sort_by):
+    conn = appmod.open_db_connection()
+    for sql in route_sql(client, f'/schedule?sort_by={sort_by}'):
+        assert not any('TEMP B-TREE' in step for step in plan(conn, sql)), sql
+    conn.close()
@@ -0,0 +1,24 @@
+import sqlite3
+
+import app as appmod
+
+
+def test_write_from_another_process_invalidates_cached_page():
+    client = appmod.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['username'] = 'admin'
+
+    first = client.get('/halls')
+    assert b'Cache Probe Hall' not in first.data
+    assert client.get('/halls', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    # Stands in for another worker or a script: this process's generations never move
+    other = sqlite3.connect(appmod.DB_NAME)
+    other.execute("INSERT INTO halls (hall_name, capacity) VALUES ('Cache Probe Hall', 40)")
+    other.commit()
+    other.close()
+
+    second = client.get('/halls', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert b'Cache Probe Hall' in second.data